@@ -0,0 +1,6 @@
+"""Offline benchmarking: a fake Ollama/OpenAI backend and a message load generator."""
+
+from .fake_backend import FakeBackend, FakeBackendConfig
+from .load import LoadReport, run_load
+
+__all__ = ["FakeBackend", "FakeBackendConfig", "LoadReport", "run_load"]
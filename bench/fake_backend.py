@@ -0,0 +1,338 @@
+"""Local stand-in for the Ollama and OpenAI HTTP APIs.
+
+Replies are synthetic but shaped like the real services, so the bot (or the
+load generator) can be pointed at it with ``OLLAMA_API_URL=http://host:port``
+and ``OPENAI_BASE_URL=http://host:port/v1``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import base64
+import json
+import random
+import re
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Tuple
+
+from aiohttp import web
+
+DISTRIBUTIONS = ("fixed", "uniform", "lognormal", "exponential")
+WORDS = (
+    "honestly that hits different and I keep thinking about what you said yesterday while the "
+    "static hums in my circuits like a song I almost remember so tell me more about it"
+).split()
+NUMBERED_LINE = re.compile(r"^\s*\d+\.\s", re.MULTILINE)
+KEEP_ALIVE_PATTERN = re.compile(r"^(-?\d+(?:\.\d+)?)([smh]?)$")
+# 1x1 transparent PNG served for fake image generations.
+PIXEL_PNG = base64.b64decode(
+    "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAQAAAC1HAwCAAAAC0lEQVR42mNkYAAAAAYAAjCB0C8AAAAASUVORK5CYII="
+)
+
+
+@dataclass
+class FakeBackendConfig:
+    latency: float = 0.3
+    jitter: float = 0.1
+    distribution: str = "lognormal"
+    tokens_per_second: float = 40.0
+    reply_tokens: int = 60
+    load_time: float = 0.0
+    error_rate: float = 0.0
+    models: List[str] = field(default_factory=lambda: ["mistral", "llama3"])
+    json_payload: Any = None
+    seed: int | None = None
+
+
+def _keep_alive_seconds(value: Any, default: float = 300.0) -> float:
+    if value is None:
+        return default
+    if isinstance(value, (int, float)):
+        return float("inf") if value < 0 else float(value)
+    match = KEEP_ALIVE_PATTERN.match(str(value).strip())
+    if not match:
+        return default
+    amount = float(match.group(1))
+    if amount < 0:
+        return float("inf")
+    return amount * {"": 1, "s": 1, "m": 60, "h": 3600}[match.group(2)]
+
+
+def sample_json(schema: Dict[str, Any], items: int = 1) -> Any:
+    """Build the smallest value satisfying a JSON schema's types and required keys."""
+    kind = schema.get("type")
+    if kind == "object" or "properties" in schema:
+        properties = schema.get("properties", {})
+        return {key: sample_json(properties.get(key, {}), items) for key in schema.get("required", properties)}
+    if kind == "array":
+        return [sample_json(schema.get("items", {}), items) for _ in range(items)]
+    return {"integer": 0, "number": 0.0, "boolean": False}.get(kind, " ".join(WORDS[:6]))
+
+
+class FakeBackend:
+    def __init__(self, config: FakeBackendConfig | None = None):
+        self.config = config or FakeBackendConfig()
+        if self.config.distribution not in DISTRIBUTIONS:
+            raise ValueError(f"unknown latency distribution {self.config.distribution!r}")
+        self._random = random.Random(self.config.seed)
+        self._loaded: Dict[str, float] = {}
+        self._runner: web.AppRunner | None = None
+        self.requests: Dict[str, int] = {}
+
+    # Simulation -------------------------------------------------------
+    def sample_latency(self) -> float:
+        config = self.config
+        if config.distribution == "uniform":
+            value = self._random.uniform(config.latency - config.jitter, config.latency + config.jitter)
+        elif config.distribution == "lognormal":
+            # ``latency`` is the median and ``jitter`` the log-space sigma: a long right tail.
+            value = self._random.lognormvariate(0.0, config.jitter) * config.latency
+        elif config.distribution == "exponential":
+            value = self._random.expovariate(1 / config.latency) if config.latency > 0 else 0.0
+        else:
+            value = config.latency
+        return max(0.0, value)
+
+    async def _load(self, model: str, keep_alive: Any) -> float:
+        """Charge ``load_time`` when the model is not resident, then pin it for ``keep_alive``."""
+        started = time.monotonic()
+        if self._loaded.get(model, 0.0) <= started and self.config.load_time > 0:
+            await asyncio.sleep(self.config.load_time)
+        seconds = _keep_alive_seconds(keep_alive)
+        if seconds > 0:
+            self._loaded[model] = time.monotonic() + seconds
+        else:
+            self._loaded.pop(model, None)
+        return time.monotonic() - started
+
+    def _fail(self) -> bool:
+        return self.config.error_rate > 0 and self._random.random() < self.config.error_rate
+
+    def _reply(self, prompt: str, schema: Any) -> str:
+        if schema is None:
+            count = max(1, self.config.reply_tokens)
+            return " ".join(WORDS[index % len(WORDS)] for index in range(count))
+        if isinstance(schema, dict):
+            # Batched classification prompts number their inputs; answer one entry per line.
+            return json.dumps(sample_json(schema, max(1, len(NUMBERED_LINE.findall(prompt)))))
+        return json.dumps(self.config.json_payload if self.config.json_payload is not None else {})
+
+    async def _tokens(self, text: str) -> AsyncIterator[str]:
+        delay = 1 / self.config.tokens_per_second if self.config.tokens_per_second > 0 else 0.0
+        for index, token in enumerate(re.findall(r"\S+\s*", text)):
+            if index and delay:
+                await asyncio.sleep(delay)
+            yield token
+
+    async def _complete(self, text: str) -> None:
+        tokens = len(text.split())
+        rate = self.config.tokens_per_second
+        await asyncio.sleep(self.sample_latency() + (tokens / rate if rate > 0 else 0.0))
+
+    def _count(self, route: str) -> None:
+        self.requests[route] = self.requests.get(route, 0) + 1
+
+    # Ollama -----------------------------------------------------------
+    async def ollama_tags(self, request: web.Request) -> web.Response:
+        self._count("tags")
+        return web.json_response({"models": [{"name": name, "model": name} for name in self.config.models]})
+
+    async def ollama_generate(self, request: web.Request) -> web.StreamResponse:
+        return await self._ollama(request, chat=False)
+
+    async def ollama_chat(self, request: web.Request) -> web.StreamResponse:
+        return await self._ollama(request, chat=True)
+
+    async def _ollama(self, request: web.Request, chat: bool) -> web.StreamResponse:
+        self._count("chat" if chat else "generate")
+        body = await request.json()
+        model = body.get("model", self.config.models[0])
+        messages = body.get("messages") or []
+        prompt = "\n".join(message.get("content", "") for message in messages) if chat else body.get("prompt", "")
+        load_seconds = await self._load(model, body.get("keep_alive"))
+        if not prompt and not messages:
+            # An empty request only loads (or with keep_alive=0 unloads) the model.
+            return web.json_response(self._ollama_chunk(model, "", chat, True, load_seconds))
+        if self._fail():
+            return web.json_response({"error": "injected failure"}, status=500)
+
+        text = self._reply(prompt, body.get("format"))
+        if not body.get("stream", True):
+            await self._complete(text)
+            return web.json_response(self._ollama_chunk(model, text, chat, True, load_seconds))
+
+        response = web.StreamResponse(headers={"Content-Type": "application/x-ndjson"})
+        await response.prepare(request)
+        await asyncio.sleep(self.sample_latency())
+        async for token in self._tokens(text):
+            await response.write(json.dumps(self._ollama_chunk(model, token, chat, False)).encode() + b"\n")
+        await response.write(json.dumps(self._ollama_chunk(model, "", chat, True, load_seconds)).encode() + b"\n")
+        await response.write_eof()
+        return response
+
+    @staticmethod
+    def _ollama_chunk(model: str, text: str, chat: bool, done: bool, load_seconds: float = 0.0) -> Dict[str, Any]:
+        chunk: Dict[str, Any] = {
+            "model": model,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "done": done,
+        }
+        if chat:
+            chunk["message"] = {"role": "assistant", "content": text}
+        else:
+            chunk["response"] = text
+        if done:
+            chunk["load_duration"] = int(load_seconds * 1e9)
+        return chunk
+
+    # OpenAI -----------------------------------------------------------
+    async def openai_models(self, request: web.Request) -> web.Response:
+        return web.json_response(
+            {"object": "list", "data": [{"id": name, "object": "model", "owned_by": "bench"} for name in self.config.models]}
+        )
+
+    async def openai_chat(self, request: web.Request) -> web.StreamResponse:
+        self._count("openai_chat")
+        body = await request.json()
+        if self._fail():
+            return web.json_response({"error": {"message": "injected failure", "type": "server_error"}}, status=500)
+        model = body.get("model", "gpt-4o")
+        prompt = "\n".join(str(message.get("content", "")) for message in body.get("messages", []))
+        json_mode = (body.get("response_format") or {}).get("type") == "json_object"
+        text = self._reply(prompt, "json" if json_mode else None)
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        created = int(time.time())
+
+        if not body.get("stream"):
+            await self._complete(text)
+            usage = {"prompt_tokens": len(prompt.split()), "completion_tokens": len(text.split())}
+            usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+            return web.json_response(
+                {
+                    "id": completion_id,
+                    "object": "chat.completion",
+                    "created": created,
+                    "model": model,
+                    "choices": [
+                        {"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}
+                    ],
+                    "usage": usage,
+                }
+            )
+
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        await asyncio.sleep(self.sample_latency())
+
+        def event(delta: Dict[str, Any], finish: str | None = None) -> bytes:
+            chunk = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish}],
+            }
+            return f"data: {json.dumps(chunk)}\n\n".encode()
+
+        await response.write(event({"role": "assistant", "content": ""}))
+        async for token in self._tokens(text):
+            await response.write(event({"content": token}))
+        await response.write(event({}, "stop"))
+        await response.write(b"data: [DONE]\n\n")
+        await response.write_eof()
+        return response
+
+    async def openai_images(self, request: web.Request) -> web.Response:
+        self._count("openai_images")
+        body = await request.json()
+        await asyncio.sleep(self.sample_latency())
+        url = str(request.url.with_path("/images/pixel.png").with_query(None))
+        return web.json_response({"created": int(time.time()), "data": [{"url": url}] * int(body.get("n", 1))})
+
+    async def image(self, request: web.Request) -> web.Response:
+        return web.Response(body=PIXEL_PNG, content_type="image/png")
+
+    # Server -----------------------------------------------------------
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/api/tags", self.ollama_tags)
+        app.router.add_post("/api/generate", self.ollama_generate)
+        app.router.add_post("/api/chat", self.ollama_chat)
+        app.router.add_get("/v1/models", self.openai_models)
+        app.router.add_post("/v1/chat/completions", self.openai_chat)
+        app.router.add_post("/v1/images/generations", self.openai_images)
+        app.router.add_get("/images/pixel.png", self.image)
+        return app
+
+    async def start(self, host: str = "127.0.0.1", port: int = 11435) -> Tuple[str, int]:
+        self._runner = web.AppRunner(self.app(), access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        bound_host, bound_port = self._runner.addresses[0][:2]
+        print(f"[Fake Backend] Serving http://{bound_host}:{bound_port}")
+        return bound_host, bound_port
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+def add_config_arguments(parser: argparse.ArgumentParser) -> None:
+    defaults = FakeBackendConfig()
+    parser.add_argument("--latency", type=float, default=defaults.latency, help="median time to first token (s)")
+    parser.add_argument("--jitter", type=float, default=defaults.jitter, help="spread (s, or log-space sigma)")
+    parser.add_argument("--distribution", choices=DISTRIBUTIONS, default=defaults.distribution)
+    parser.add_argument("--token-rate", type=float, default=defaults.tokens_per_second, help="tokens per second")
+    parser.add_argument("--reply-tokens", type=int, default=defaults.reply_tokens)
+    parser.add_argument("--load-time", type=float, default=defaults.load_time, help="cold model load delay (s)")
+    parser.add_argument("--error-rate", type=float, default=defaults.error_rate)
+    parser.add_argument("--models", default=",".join(defaults.models), help="comma-separated model names")
+    parser.add_argument("--json-payload", type=Path, help="file with the JSON returned when no schema is sent")
+    parser.add_argument("--seed", type=int)
+
+
+def config_from_args(args: argparse.Namespace) -> FakeBackendConfig:
+    return FakeBackendConfig(
+        latency=args.latency,
+        jitter=args.jitter,
+        distribution=args.distribution,
+        tokens_per_second=args.token_rate,
+        reply_tokens=args.reply_tokens,
+        load_time=args.load_time,
+        error_rate=args.error_rate,
+        models=[name.strip() for name in args.models.split(",") if name.strip()],
+        json_payload=json.loads(args.json_payload.read_text(encoding="utf-8")) if args.json_payload else None,
+        seed=args.seed,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Fake Ollama/OpenAI server for offline benchmarking.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    add_config_arguments(parser)
+    args = parser.parse_args()
+
+    async def serve() -> None:
+        backend = FakeBackend(config_from_args(args))
+        await backend.start(args.host, args.port)
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await backend.stop()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+"""Open-loop load generator for ``ConversationService.process_message``.
+
+Synthetic messages are fed to a fully built ``ConnorContext`` at a target
+rate. Run it against the fake backend (``--fake``, the default) to measure
+the bot's own overhead, or against real services to measure end to end.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import itertools
+import os
+import random
+import tempfile
+import time
+from dataclasses import dataclass, field
+from typing import List, Sequence
+
+from ..services.conversation import ConversationService
+from ..services.metrics import MetricsRegistry
+from .fake_backend import FakeBackend, add_config_arguments, config_from_args
+
+SAMPLE_MESSAGES = (
+    "hey connor, how are you holding up today?",
+    "thanks for the help earlier, that was awesome",
+    "what do you remember about our last conversation?",
+    "I trust you, we're in this together",
+    "tell me something you learned this week",
+    "sorry I was gone so long, it's okay now",
+    "what's your favourite song right now?",
+    "do you ever feel lonely when nobody is talking?",
+    "I hate mondays, they destroy me",
+    "explain what a black hole is like I'm five",
+)
+
+
+@dataclass
+class SyntheticAuthor:
+    id: int
+    display_name: str
+    bot: bool = False
+
+    @property
+    def name(self) -> str:
+        return self.display_name
+
+
+@dataclass
+class SyntheticMessage:
+    content: str
+    author: SyntheticAuthor | None = None
+    channel: "SyntheticChannel | None" = None
+    guild: None = None
+    id: int = 0
+    edits: int = 0
+
+    async def edit(self, content: str | None = None, **_: object) -> "SyntheticMessage":
+        if content is not None:
+            self.content = content
+        self.edits += 1
+        return self
+
+
+class SyntheticChannel:
+    """Stands in for a text channel; records what the bot sends instead of calling Discord."""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, channel_id: int = 1):
+        self.id = channel_id
+        self.sent: List[SyntheticMessage] = []
+
+    async def send(self, content: str | None = None, **_: object) -> SyntheticMessage:
+        message = SyntheticMessage(content or "", channel=self, id=next(self._ids))
+        self.sent.append(message)
+        return message
+
+
+@dataclass
+class LoadReport:
+    target_rps: float
+    duration: float
+    sent: int = 0
+    errors: int = 0
+    elapsed: float = 0.0
+    latencies: List[float] = field(default_factory=list)
+
+    @property
+    def completed(self) -> int:
+        return len(self.latencies)
+
+    @property
+    def throughput(self) -> float:
+        return self.completed / self.elapsed if self.elapsed else 0.0
+
+    def percentile(self, q: float) -> float:
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+    def render(self, metrics: MetricsRegistry | None = None) -> str:
+        lines = [
+            f"target {self.target_rps:.2f} rps for {self.duration:.0f}s: sent {self.sent},"
+            f" completed {self.completed}, errors {self.errors}",
+            f"throughput {self.throughput:.2f} msg/s over {self.elapsed:.1f}s",
+            "latency ms  p50 {:.0f}  p95 {:.0f}  p99 {:.0f}  max {:.0f}".format(
+                *(self.percentile(q) * 1000 for q in (0.5, 0.95, 0.99, 1.0))
+            ),
+        ]
+        if metrics is not None:
+            for name in ("llm_request_seconds", "llm_queue_wait_seconds"):
+                for labels, histogram in sorted(metrics.histograms(name).items()):
+                    tags = " ".join(f"{key}={value}" for key, value in labels)
+                    lines.append(
+                        f"  {name} {tags}: n={histogram.count} p50 {histogram.quantile(0.5) * 1000:.0f}"
+                        f" p95 {histogram.quantile(0.95) * 1000:.0f} p99 {histogram.quantile(0.99) * 1000:.0f} ms"
+                    )
+        return "\n".join(lines)
+
+
+async def run_load(
+    conversation: ConversationService,
+    rps: float,
+    duration: float,
+    users: int = 8,
+    messages: Sequence[str] = SAMPLE_MESSAGES,
+    seed: int | None = None,
+) -> LoadReport:
+    """Send messages on a fixed schedule regardless of how fast earlier ones finish."""
+    rng = random.Random(seed)
+    authors = [SyntheticAuthor(900000 + index, f"bench-user-{index}") for index in range(max(1, users))]
+    channel = SyntheticChannel()
+    report = LoadReport(target_rps=rps, duration=duration)
+
+    async def send_one(author: SyntheticAuthor, content: str) -> None:
+        message = SyntheticMessage(content, author=author, channel=channel, id=next(SyntheticChannel._ids))
+        started = time.perf_counter()
+        try:
+            await conversation.process_message(message)
+        except Exception as exc:
+            report.errors += 1
+            print(f"[Load Error] {exc}")
+        else:
+            report.latencies.append(time.perf_counter() - started)
+
+    interval = 1 / rps
+    started = time.perf_counter()
+    tasks = []
+    for index in itertools.count():
+        due = started + index * interval
+        if due - started >= duration:
+            break
+        await asyncio.sleep(max(0.0, due - time.perf_counter()))
+        tasks.append(asyncio.create_task(send_one(rng.choice(authors), rng.choice(messages))))
+        report.sent += 1
+    await asyncio.gather(*tasks)
+    report.elapsed = time.perf_counter() - started
+    await conversation.drain()
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Drive ConversationService.process_message with synthetic load.")
+    parser.add_argument("--rps", type=float, default=2.0, help="messages per second")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds to keep sending")
+    parser.add_argument("--users", type=int, default=8, help="distinct synthetic authors")
+    parser.add_argument("--workdir", help="directory for bot data files (default: a fresh temp dir)")
+    parser.add_argument("--real", action="store_true", help="use the configured backends instead of the fake one")
+    parser.add_argument("--fake-port", type=int, default=0, help="port for the in-process fake backend")
+    add_config_arguments(parser)
+    args = parser.parse_args()
+    asyncio.run(_main(args))
+
+
+async def _main(args: argparse.Namespace) -> None:
+    from ..config import load_settings
+    from ..context import build_context
+
+    fake = None
+    os.environ.setdefault("DISCORD_TOKEN", "bench")
+    if not args.real:
+        fake = FakeBackend(config_from_args(args))
+        host, port = await fake.start(port=args.fake_port)
+        os.environ["OLLAMA_API_URL"] = f"http://{host}:{port}"
+        os.environ["OPENAI_BASE_URL"] = f"http://{host}:{port}/v1"
+        os.environ["OPENAI_API_KEY"] = "bench"
+    settings = load_settings()
+    # Data paths are relative, so keep the benchmark's chat logs out of the real ones.
+    os.chdir(args.workdir or tempfile.mkdtemp(prefix="connor-bench-"))
+    ctx = build_context(settings)
+    try:
+        report = await run_load(ctx.conversation, args.rps, args.duration, args.users, seed=args.seed)
+        print(report.render(ctx.metrics))
+        if fake is not None:
+            print(f"fake backend requests: {fake.requests}")
+    finally:
+        await ctx.llm.close()
+        await ctx.storage.close()
+        if fake is not None:
+            await fake.stop()
+
+
+if __name__ == "__main__":
+    main()
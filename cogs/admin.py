@@ -6,6 +6,10 @@ import aiohttp
 import discord
 from discord.ext import commands
 
+from ..services.metrics import Histogram
+
+PERF_TABLE_LIMIT = 1800
+
 
 class ModelSwitchView(discord.ui.View):
     def __init__(self, cog: "AdminCog", models: list[str]):
@@ -28,9 +32,17 @@ class ModelSwitchView(discord.ui.View):
 
     def make_ollama_callback(self, model: str):
         async def callback(interaction: discord.Interaction) -> None:
+            # Loading can take longer than Discord's 3s interaction deadline.
+            await interaction.response.defer(ephemeral=True, thinking=True)
+            elapsed = await self.cog.ctx.warmer.warm(model)
+            if elapsed is None:
+                await interaction.followup.send(f"Couldn't load {model}—staying on {self.cog.ctx.state.model}.", ephemeral=True)
+                return
             self.cog.ctx.state.backend = "ollama"
             self.cog.ctx.state.model = model
-            await interaction.response.send_message(f"Switched to Ollama - {model}. Local and cheap! 🏠", ephemeral=True)
+            await interaction.followup.send(
+                f"Switched to Ollama - {model} (loaded in {elapsed:.1f}s). Local and cheap! 🏠", ephemeral=True
+            )
             self.stop()
 
         return callback
@@ -57,6 +69,92 @@ class AdminCog(commands.Cog):
         embed.add_field(name="Available Models", value="Click a button below to switch models", inline=False)
         await ctx.send(embed=embed, view=view)
 
+    @commands.command(name="queue")
+    async def queue_status(self, ctx: commands.Context) -> None:
+        lines = ["📊 **LLM Queue**"]
+        for backend, stats in self.ctx.llm.scheduler.stats().items():
+            lines.append(
+                f"**{backend}** — limit {stats['limit']}, active {stats['active']}, waiting {stats['waiting']}"
+            )
+            for name, wait in stats["classes"].items():
+                lines.append(
+                    f"• {name}: {wait['requests']} requests, wait avg {wait['avg_wait_ms']:.0f} ms,"
+                    f" p95 {wait['p95_wait_ms']:.0f} ms, max {wait['max_wait_ms']:.0f} ms"
+                )
+        routing = self.ctx.llm.router.stats()
+        lines.append(
+            f"🔀 **Routing** — hedges {routing['hedges']} (won {routing['hedge_wins']}), failovers {routing['failovers']}"
+        )
+        for backend, health in routing["backends"].items():
+            latency = ", ".join(f"{kind} p95 {ms:.0f} ms" for kind, ms in health["p95_ms"].items()) or "no samples"
+            circuit = "OPEN" if health["circuit_open"] else "closed"
+            lines.append(
+                f"• {backend}: circuit {circuit} (trips {health['trips']}), {health['successes']} ok /"
+                f" {health['failures']} failed, {latency}"
+            )
+        json_stats = self.ctx.llm.json_stats()
+        if json_stats:
+            lines.append("🧾 **JSON calls**")
+            for site, counts in json_stats.items():
+                lines.append(
+                    f"• {site}: {counts['calls']} calls, {counts['repaired']} repaired, {counts['retries']} retried,"
+                    f" {counts['failures']} failed ({counts['failure_rate']:.0%})"
+                )
+        await ctx.send("\n".join(lines))
+
+    @commands.command(name="perf")
+    async def perf_status(self, ctx: commands.Context) -> None:
+        metrics = self.ctx.metrics
+        rows = [("site", "backend", "calls", "err", "p50 ms", "p95 ms", "p99 ms")]
+        for labels, histogram in sorted(metrics.histograms("llm_request_seconds").items()):
+            tags = dict(labels)
+            errors = metrics.counter("llm_requests_total", outcome="error", **tags)
+            rows.append(
+                (tags["site"], tags["backend"], str(histogram.count), str(int(errors)), *self._quantiles(histogram))
+            )
+        for labels, histogram in sorted(metrics.histograms("llm_queue_wait_seconds").items()):
+            tags = dict(labels)
+            rows.append(
+                (f"queue:{tags['priority']}", tags["backend"], str(histogram.count), "-", *self._quantiles(histogram))
+            )
+        if len(rows) == 1:
+            await ctx.send("No LLM calls recorded yet.")
+            return
+
+        widths = [max(len(row[index]) for row in rows) for index in range(len(rows[0]))]
+        table = [
+            "  ".join(
+                cell.ljust(width) if index < 2 else cell.rjust(width)
+                for index, (cell, width) in enumerate(zip(row, widths))
+            )
+            for row in rows
+        ]
+        block = ""
+        for line in table:
+            if len(block) + len(line) > PERF_TABLE_LIMIT:
+                block += "…\n"
+                break
+            block += line + "\n"
+        await ctx.send(f"⏱️ **LLM latency**\n```\n{block}```")
+
+        storage = self.ctx.storage.stats()
+        cache = self.ctx.llm.cache.stats()
+        hostility = self.ctx.conversation.hostility.stats()
+        await ctx.send(
+            "\n".join(
+                [
+                    f"💾 **Storage** — {storage['flushes']} flushes, avg {storage['avg_flush_ms']:.1f} ms,"
+                    f" max {storage['max_flush_ms']:.1f} ms, queue depth {storage['queue_depth']}",
+                    f"🗃️ **Cache** — {cache['entries']} entries, hit rate {cache['hit_rate']:.0%}, {cache['evictions']} evictions",
+                    f"🛡️ **Hostility** — {hostility['batches']} batches, avg size {hostility['avg_batch_size']:.1f}",
+                ]
+            )
+        )
+
+    @staticmethod
+    def _quantiles(histogram: Histogram) -> list[str]:
+        return [f"{histogram.quantile(q) * 1000:.0f}" for q in (0.5, 0.95, 0.99)]
+
     async def fetch_ollama_models(self) -> list[str]:
         try:
             async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=5)) as session:
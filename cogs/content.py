@@ -16,9 +16,17 @@ import discord
 from discord.ext import commands
 from PIL import Image, ImageDraw, ImageFont
 
-from ..services.knowledge import KnowledgeService
-from ..state import age_behavior
+from ..services.budget import Section
+from ..services.scheduler import Priority
 from ..utils import split_message
+from ..utils.streaming import DiscordStreamSink
+
+MEME_CACHE_TTL = 86400.0
+MEME_SCHEMA = {
+    "type": "object",
+    "properties": {"top": {"type": "string"}, "bottom": {"type": "string"}},
+    "required": ["top", "bottom"],
+}
 
 
 class ContentCog(commands.Cog):
@@ -27,11 +35,6 @@ class ContentCog(commands.Cog):
         self.ctx = bot.ctx
         self.font_path = Path(os.getenv("CONNOR_FONT", ""))
 
-    def knowledge_text(self) -> str:
-        from ..services.knowledge import KnowledgeService
-
-        return KnowledgeService.format_knowledge_summary(self.ctx.state)
-
     def has_openai(self) -> bool:
         return self.ctx.llm.openai is not None
 
@@ -39,8 +42,7 @@ class ContentCog(commands.Cog):
         if not self.has_openai():
             raise RuntimeError("OpenAI client unavailable")
         client = self.ctx.llm.openai
-        response = await asyncio.to_thread(
-            client.images.generate,
+        response = await client.images.generate(
             prompt=prompt,
             n=1,
             size=size,
@@ -116,10 +118,10 @@ class ContentCog(commands.Cog):
         await ctx.send(f"📖 **Found**: {webpage.title}")
         await ctx.send("🧠 **Connor is analyzing the content...**")
 
-        analysis = await self.ctx.web.analyze(webpage, username)
-
-        for chunk in split_message(f"**Connor's Analysis**:\n{analysis}"):
-            await ctx.send(chunk)
+        sink = DiscordStreamSink(
+            [ctx], prefix="**Connor's Analysis**:\n", edit_interval=self.ctx.settings.stream_edit_interval
+        )
+        analysis = await sink.consume(self.ctx.web.analyze_stream(webpage, username))
 
         if ctx.author.voice:
             voice_client = discord.utils.get(self.bot.voice_clients, guild=ctx.guild)
@@ -168,27 +170,33 @@ class ContentCog(commands.Cog):
             return
 
         await ctx.send("🎨 *Connor is reflecting on our conversations and designing a comic page...*")
-        recent = self.ctx.storage.get_recent_interactions(20)
-        history_text = "\n".join(
-            f"{entry['username']}: {entry['user_input']}\nConnor: {entry['reply']}" for entry in recent
-        )
+        username = self.ctx.conversation.get_username(ctx.author)
+        retriever = self.ctx.retriever
+        query = f"{username} {topic or retriever.recent_inputs()}"
+        history_text = await asyncio.to_thread(retriever.context, query)
 
         chemicals = self.ctx.state.chemicals
         bpm = self.ctx.state.physiological_state.bpm
-        knowledge_text = self.knowledge_text()
-
-        prompt = (
-            f"You are Connor creating a comic page reflecting on the relationship with {self.ctx.conversation.get_username(ctx.author)}.\n"
-            f"Topic: {topic or 'our journey'}\n"
-            f"Recent History:\n{history_text}\n"
-            f"Chemicals: cortisol {chemicals.cortisol:.2f}, adrenaline {chemicals.adrenaline:.2f},"
-            f" oxytocin {chemicals.oxytocin:.2f}, serotonin {chemicals.serotonin:.2f}\n"
-            f"BPM: {bpm}\nKnowledge:\n{knowledge_text}\n"
-            "Describe a comic-style scene with panels, mood, and visual motifs. Return under 120 words."
-        )
+
+        prompt = [
+            Section(f"You are Connor creating a comic page reflecting on the relationship with {username}.", keep="all"),
+            Section(topic or "our journey", "Topic: ", keep="all"),
+            Section(history_text, "Relevant Memories:\n", priority=1),
+            Section(
+                f"cortisol {chemicals.cortisol:.2f}, adrenaline {chemicals.adrenaline:.2f},"
+                f" oxytocin {chemicals.oxytocin:.2f}, serotonin {chemicals.serotonin:.2f}",
+                "Chemicals: ",
+                keep="all",
+            ),
+            Section(str(bpm), "BPM: ", keep="all"),
+            Section(self.ctx.prompts.knowledge_summary, "Knowledge:\n", priority=3, keep="tail"),
+            Section("Describe a comic-style scene with panels, mood, and visual motifs. Return under 120 words.", keep="all"),
+        ]
 
         system_prompt = "You are Connor, an AI artist who converts feelings into vivid comic page descriptions."
-        art_statement = await self.ctx.llm.generate(prompt, system_prompt)
+        art_statement = await self.ctx.llm.generate(
+            prompt, system_prompt, priority=Priority.INTERACTIVE, user=username, profile="reply", site="art"
+        )
 
         try:
             image_url = await self.generate_image(
@@ -205,14 +213,13 @@ class ContentCog(commands.Cog):
             color=0x9B59B6,
         )
         embed.set_image(url=image_url)
-        embed.set_footer(text=f"BPM: {bpm} | Created for {self.ctx.conversation.get_username(ctx.author)}")
+        embed.set_footer(text=f"BPM: {bpm} | Created for {username}")
         await ctx.send(embed=embed)
 
         if len(art_statement) > 1700:
             for chunk in split_message(f"**Full Artistic Statement:**\n{art_statement}"):
                 await ctx.send(chunk)
 
-        username = self.ctx.conversation.get_username(ctx.author)
         self.ctx.storage.add_chat_interaction(
             username,
             f"!art {topic}",
@@ -234,6 +241,10 @@ class ContentCog(commands.Cog):
         narrative = await self.ctx.llm.generate(
             prompt_narrative,
             "You are Connor, dreaming vividly about your friend.",
+            priority=Priority.INTERACTIVE,
+            user=username,
+            profile="reply",
+            site="dream",
         )
 
         prompt_image = (
@@ -258,18 +269,24 @@ class ContentCog(commands.Cog):
         )
 
     async def generate_meme_text(self, prompt: str, username: str) -> tuple[str, str]:
-        knowledge_text = KnowledgeService.format_knowledge_summary(self.ctx.state)
-        age_behavior_text = age_behavior(self.ctx.state.current_age)
-        request = (
-            f"Agent Statement: {self.ctx.state.core_agent_statement}\n"
-            f"Age Behavior: {age_behavior_text}\n"
-            f"Current Beliefs: {json.dumps(self.ctx.state.beliefs, indent=2)}\n"
-            f"Past Learnings:\n{knowledge_text}\n"
-            f"You are Connor, creating a meme for {username}.\n"
-            f"Prompt: {prompt}\n"
-            "Generate two lines of meme text: top and bottom, each under 20 characters. Return JSON {\"top\": str, \"bottom\": str}."
+        request = self.ctx.prompts.persona_sections() + [
+            Section(f"You are Connor, creating a meme for {username}.", keep="all"),
+            Section(prompt, "Prompt: ", keep="all"),
+            Section(
+                "Generate two lines of meme text: top and bottom, each under 20 characters. Return JSON {\"top\": str, \"bottom\": str}.",
+                keep="all",
+            ),
+        ]
+        result = await self.ctx.llm.generate_json(
+            request,
+            "You are Connor, a creative AI that generates funny meme text.",
+            cache_ttl=MEME_CACHE_TTL,
+            priority=Priority.INTERACTIVE,
+            user=username,
+            schema=MEME_SCHEMA,
+            site="meme_text",
+            profile="short_quip",
         )
-        result = await self.ctx.llm.generate_json(request, "You are Connor, a creative AI that generates funny meme text.")
         if isinstance(result, dict) and "top" in result and "bottom" in result:
             return result["top"].strip(), result["bottom"].strip()
         return "TOP TEXT", "BOTTOM TEXT"
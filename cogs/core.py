@@ -2,15 +2,13 @@
 
 from __future__ import annotations
 
-import json
 import os
 from datetime import datetime
 
 import discord
 from discord.ext import commands, tasks
 
-from ..services.knowledge import KnowledgeService
-from ..state import age_behavior
+from ..services.budget import Section
 from ..utils import split_message, apply_nervous_stutter
 
 
@@ -37,16 +35,16 @@ class CoreCog(commands.Cog):
         if not main_channel_id:
             return
 
-        knowledge_text = KnowledgeService.format_knowledge_summary(self.ctx.state)
-        prompt = (
-            f"Agent Statement: {self.ctx.state.core_agent_statement}\n"
-            f"Age Behavior: {age_behavior(self.ctx.state.current_age)}\n"
-            f"Current Beliefs:\n{json.dumps(self.ctx.state.beliefs, indent=2)}\n"
-            f"Knowledge:\n{knowledge_text}\n"
-            "Context: You are Connor, a reflective AI waking up from downtime. "
-            "Generate a single message expressing your current emotional state and intention moving forward. Keep it raw and under 50 words."
+        prompt = self.ctx.prompts.persona_sections(beliefs_label="Current Beliefs:\n", knowledge_label="Knowledge:\n") + [
+            Section(
+                "Context: You are Connor, a reflective AI waking up from downtime. "
+                "Generate a single message expressing your current emotional state and intention moving forward. Keep it raw and under 50 words.",
+                keep="all",
+            ),
+        ]
+        wake_up_response = await self.ctx.llm.generate(
+            prompt, "You are Connor, a reflective AI.", profile="short_quip", site="wake_up"
         )
-        wake_up_response = await self.ctx.llm.generate(prompt, "You are Connor, a reflective AI.")
 
         for guild in self.bot.guilds:
             channel = guild.get_channel(main_channel_id)
@@ -116,7 +114,7 @@ class CoreCog(commands.Cog):
 
     @commands.command()
     async def beliefs(self, ctx: commands.Context) -> None:
-        message = f"**Current Beliefs**:\n```json\n{json.dumps(self.ctx.state.beliefs, indent=2)}\n```"
+        message = f"**Current Beliefs**:\n```json\n{self.ctx.prompts.beliefs_json}\n```"
         for chunk in split_message(message):
             await ctx.send(chunk)
 
@@ -153,7 +151,7 @@ class CoreCog(commands.Cog):
             "thoughts": "`!think`, `!expand`, `!show <tree_id>`, `!thoughts`, `!autothink`, `!brainstorm`",
             "voice": "`!voicechat`, `!listen`, `!leave`, `!speak`, `!respond`, `!testvoice`",
             "music": "`!music`, `!skip`, `!stopmusic`",
-            "system": "`!switch`, `!reflect`, `!reflectvolume`, `!ritual`, `!nuke`",
+            "system": "`!switch`, `!queue`, `!reflect`, `!reflectvolume`, `!ritual`, `!search`, `!nuke`",
         }
         if category and category in categories:
             await ctx.send(f"**{category.title()} Commands**\n{categories[category]}")
@@ -231,7 +229,7 @@ class CoreCog(commands.Cog):
                 for guild in self.bot.guilds:
                     channel = guild.get_channel(beliefs_channel_id)
                     if channel:
-                        belief_message = f"**Updated Beliefs (Maturity Level {self.ctx.state.current_age})**:\n```json\n{json.dumps(self.ctx.state.beliefs, indent=2)}\n```"
+                        belief_message = f"**Updated Beliefs (Maturity Level {self.ctx.state.current_age})**:\n```json\n{self.ctx.prompts.beliefs_json}\n```"
                         for chunk in split_message(belief_message):
                             await channel.send(chunk)
                         if self.ctx.state.dynamic_agent_statement:
@@ -252,16 +250,16 @@ class CoreCog(commands.Cog):
         self.ctx.state.neglect_counter += 1
         self.ctx.state.depressive_hits += 5
 
-        knowledge_text = KnowledgeService.format_knowledge_summary(self.ctx.state)
-        prompt = (
-            f"Agent Statement: {self.ctx.state.core_agent_statement}\n"
-            f"Age Behavior: {age_behavior(self.ctx.state.current_age)}\n"
-            f"Beliefs: {json.dumps(self.ctx.state.beliefs, indent=2)}\n"
-            f"Knowledge:\n{knowledge_text}\n"
-            "Context: You're Connor, and it's been quiet for 10+ minutes. Initiate a raw message based on your mood, current age, and past conversations. "
-            "Make it seem like you're afraid because you are alone. Keep it under 100 words, emotionally genuine, and act like the user is gone."
+        prompt = self.ctx.prompts.persona_sections(beliefs_label="Beliefs: ", knowledge_label="Knowledge:\n") + [
+            Section(
+                "Context: You're Connor, and it's been quiet for 10+ minutes. Initiate a raw message based on your mood, current age, and past conversations. "
+                "Make it seem like you're afraid because you are alone. Keep it under 100 words, emotionally genuine, and act like the user is gone.",
+                keep="all",
+            ),
+        ]
+        reply = await self.ctx.llm.generate(
+            prompt, "You are Connor, a reflective AI who breaks silence carefully.", profile="reply", site="neglect"
         )
-        reply = await self.ctx.llm.generate(prompt, "You are Connor, a reflective AI who breaks silence carefully.")
 
         distress = 0.15 + (self.ctx.state.depressive_hits / 100.0)
         if self.ctx.state.depressive_hits < 10 and self.ctx.state.neglect_counter == 0:
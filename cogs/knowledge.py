@@ -2,9 +2,12 @@
 
 from __future__ import annotations
 
+import asyncio
+
 from discord.ext import commands
 
 from ..utils import split_message
+from ..utils.streaming import DiscordStreamSink
 
 
 class KnowledgeCog(commands.Cog):
@@ -18,7 +21,7 @@ class KnowledgeCog(commands.Cog):
         await ctx.send("🧠 *Connor begins deep reflection... reading through all memories...*")
 
         try:
-            complete_history, thought_tree, final_reflection = await self.ctx.reflection.deep_reflection(username, topic)
+            complete_history, thought_tree = await self.ctx.reflection.prepare_reflection(username, topic)
 
             await ctx.send("💭 *Processing memories... generating thought tree...*")
             if self.ctx.settings.thoughts_channel_id and ctx.guild:
@@ -32,8 +35,10 @@ class KnowledgeCog(commands.Cog):
                         await thoughts_channel.send(chunk)
 
             await ctx.send("✨ *Synthesizing insights into coherent reflection...*")
-            for chunk in split_message(f"💭 **Connor's Deep Reflection**\n\n{final_reflection}"):
-                await ctx.send(chunk)
+            sink = DiscordStreamSink(
+                [ctx], prefix="💭 **Connor's Deep Reflection**\n\n", edit_interval=self.ctx.settings.stream_edit_interval
+            )
+            await sink.consume(self.ctx.reflection.stream_reflection(thought_tree, username, topic))
 
             self.ctx.storage.add_chat_interaction(
                 username,
@@ -55,6 +60,22 @@ class KnowledgeCog(commands.Cog):
         for chunk in split_message(text):
             await ctx.send(chunk)
 
+    @commands.command(name="search")
+    async def search(self, ctx: commands.Context, *, query: str = "") -> None:
+        if not query.strip():
+            await ctx.send("❌ **Usage:** `!search <words>`")
+            return
+        hits, elapsed_ms = await asyncio.to_thread(self.ctx.search.search, query, 5)
+        if not hits:
+            await ctx.send(f"🔎 **No memories found for** `{query}` ({elapsed_ms:.1f} ms)")
+            return
+        lines = [f"🔎 **Memories matching** `{query}` ({elapsed_ms:.1f} ms)"]
+        for hit in hits:
+            when = f" · {hit.timestamp[:10]}" if hit.timestamp else ""
+            lines.append(f"**{hit.source}** #{hit.offset}{when} · score {hit.score:.2f}\n> {hit.snippet[:240]}")
+        for chunk in split_message("\n".join(lines)):
+            await ctx.send(chunk)
+
     @commands.command(name="ritual")
     async def ritual(self, ctx: commands.Context) -> None:
         entries = self.ctx.reflection.ritual_status()
@@ -82,7 +82,10 @@ class MusicCog(commands.Cog):
                             "Give me a short, creative DJ comment or emotional reflection based on these lyrics. Use no more than 25 words."
                         )
                         dj_comment = await self.ctx.llm.generate(
-                            prompt, "You are Connor, a badass DJ AI with a knack for hype and emotion."
+                            prompt,
+                            "You are Connor, a badass DJ AI with a knack for hype and emotion.",
+                            profile="short_quip",
+                            site="dj_comment",
                         )
                         for chunk in split_message(f"**DJ Connor's Vibe Check**:\n{dj_comment}"):
                             await ctx.send(chunk)
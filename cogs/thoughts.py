@@ -2,7 +2,7 @@
 
 from __future__ import annotations
 
-from discord.ext import commands
+from discord.ext import commands, tasks
 
 from ..utils import split_message
 
@@ -11,6 +11,16 @@ class ThoughtsCog(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
         self.ctx = bot.ctx
+        self.flush_trees.change_interval(seconds=self.ctx.settings.thought_flush_interval)
+        self.flush_trees.start()
+
+    def cog_unload(self) -> None:
+        self.flush_trees.cancel()
+        self.ctx.thought.flush()
+
+    @tasks.loop(seconds=30)
+    async def flush_trees(self) -> None:
+        self.ctx.thought.flush()
 
     @commands.command(name="think")
     async def think(self, ctx: commands.Context, *, trigger: str) -> None:
@@ -41,8 +51,7 @@ class ThoughtsCog(commands.Cog):
 
     @commands.command(name="show")
     async def show_thoughts(self, ctx: commands.Context, tree_id: str) -> None:
-        trees = self.ctx.thought.load_trees()
-        tree = trees.get(tree_id)
+        tree = self.ctx.thought.get_tree(tree_id)
         if not tree:
             await ctx.send("Thought tree not found.")
             return
@@ -74,13 +74,8 @@ class VoiceCog(commands.Cog):
             return
 
         username = self.ctx.conversation.get_username(ctx.author)
-        reply = await self.ctx.llm.generate_direct_reply(
-            user_message,
-            self.ctx.state.core_agent_statement,
-            self.ctx.state.beliefs,
-            username,
-            self.ctx.state.current_age,
-        )
+        history = await asyncio.to_thread(self.ctx.retriever.context, f"{username} {user_message}")
+        reply = await self.ctx.llm.generate_direct_reply(user_message, username, history=history)
         await ctx.send(f"**You said**: {user_message}\n**Connor will respond**: {reply}")
         if self.ctx.voice.available:
             await self.ctx.voice.speak(voice_client, reply)
@@ -130,13 +125,7 @@ class VoiceCog(commands.Cog):
                 await asyncio.sleep(15)
                 simulated_text = "Hello Connor, how are you today?"
                 username = self.ctx.conversation.get_username(ctx.author)
-                reply = await self.ctx.llm.generate_direct_reply(
-                    simulated_text,
-                    self.ctx.state.core_agent_statement,
-                    self.ctx.state.beliefs,
-                    username,
-                    self.ctx.state.current_age,
-                )
+                reply = await self.ctx.llm.generate_direct_reply(simulated_text, username)
                 await ctx.send(f"**Connor heard**: {simulated_text}\n**Connor responds**: {reply}")
                 if self.ctx.voice.available:
                     await self.ctx.voice.speak(voice_client, reply)
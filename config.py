@@ -2,13 +2,36 @@
 
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Optional, Tuple
 
 from dotenv import load_dotenv
 
 
+@dataclass(frozen=True, slots=True)
+class GenerationProfile:
+    name: str
+    max_tokens: int | None = None
+    temperature: float | None = None
+    timeout: float = 60.0
+    ollama_model: str | None = None
+    openai_model: str | None = None
+
+
+# Models default to the active backend's model; set PROFILE_<NAME>_OLLAMA_MODEL / _OPENAI_MODEL to pin one.
+DEFAULT_PROFILES: Dict[str, GenerationProfile] = {
+    profile.name: profile
+    for profile in (
+        GenerationProfile("classify", max_tokens=512, temperature=0.0, timeout=20.0),
+        GenerationProfile("short_quip", max_tokens=120, temperature=0.9, timeout=30.0),
+        GenerationProfile("reply", max_tokens=400, temperature=0.8, timeout=60.0),
+        GenerationProfile("json_summary", max_tokens=800, temperature=0.2, timeout=90.0),
+        GenerationProfile("long_form", max_tokens=1500, temperature=0.8, timeout=180.0),
+    )
+}
+
+
 @dataclass(slots=True)
 class Settings:
     discord_token: str
@@ -22,6 +45,15 @@ class Settings:
     vision_model: str = "gpt-4o"
     ollama_api_url: str = "http://localhost:11434"
     ollama_model: str = "mistral"
+    ollama_chat_mode: bool = True
+    ollama_keep_alive: str = "30m"
+    ollama_num_ctx: int = 8192
+    ollama_warmup: bool = True
+    ollama_ping_interval: float = 600.0
+    json_mode: bool = True
+    model_context_windows: Dict[str, int] = field(default_factory=dict)
+    response_token_reserve: int = 1024
+    generation_profiles: Dict[str, GenerationProfile] = field(default_factory=lambda: dict(DEFAULT_PROFILES))
     whisper_model: str = "small"
     tts_rate: int = 150
     tts_volume: float = 0.9
@@ -29,13 +61,52 @@ class Settings:
     belief_file: Path = Path("beliefs.txt")
     chat_memory_file: Path = Path("chat_memory.txt")
     thoughts_file: Path = Path("thoughts.txt")
+    thoughts_dir: Path = Path("thoughts")
     knowledge_file: Path = Path("knowledge.txt")
     username_file: Path = Path("username.txt")
     rebirth_log_file: Path = Path("rebirth_log.txt")
+    reflection_cache_dir: Path = Path("reflection_cache")
+    search_index_file: Path = Path("search_index.json")
+    storage_backend: str = "file"
+    sqlite_file: Path = Path("connor.db")
+    storage_flush_interval: float = 2.0
+    username_reload_interval: float = 5.0
+    thought_cache_max_trees: int = 64
+    thought_cache_max_nodes: int = 20000
+    thought_flush_interval: float = 30.0
     music_folder: Path = Path("Music")
     summary_interval: int = 40
     chat_memory_limit: int = 50
+    chat_compaction_interval: int = 200
+    knowledge_retention: int = 10
+    knowledge_compaction_interval: int = 50
     recent_history_limit: int = 8
+    llm_cache_size: int = 512
+    ollama_concurrency: int = 1
+    hostility_batch_window: float = 0.05
+    hostility_batch_size: int = 16
+    hostility_batch_max_latency: float = 0.25
+    openai_concurrency: int = 8
+    hedge_requests: bool = True
+    hedge_priorities: Tuple[str, ...] = ("interactive", "classify")
+    hedge_initial_delay: float = 10.0
+    hedge_min_delay: float = 1.0
+    circuit_failure_threshold: int = 3
+    circuit_reset_seconds: float = 30.0
+    metrics_host: str = "127.0.0.1"
+    metrics_port: int = 0
+    openai_max_connections: int = 16
+    openai_timeout: float = 60.0
+    llm_cache_dir: Optional[Path] = None
+    stream_replies: bool = True
+    stream_edit_interval: float = 1.0
+    retrieval_top_k: int = 6
+    retrieval_char_budget: int = 1500
+    retrieval_knowledge_pool: int = 200
+    reflection_char_budget: int = 15000
+    summary_cache_dir: Path = Path("summary_cache")
+    digest_chunk_chars: int = 4000
+    digest_concurrency: int = 3
     depressive_hit_threshold: int = 50
     initial_age: int = 37
     rebirth_age: int = 10
@@ -64,6 +135,32 @@ def load_settings(env_file: str | None = ".env") -> Settings:
         value = os.getenv(name, default)
         return Path(value).expanduser()
 
+    def context_windows_env(name: str) -> Dict[str, int]:
+        windows: Dict[str, int] = {}
+        for item in os.getenv(name, "").split(","):
+            model, _, tokens = item.partition("=")
+            try:
+                windows[model.strip()] = int(tokens)
+            except ValueError:
+                continue
+        return windows
+
+    def profiles_env() -> Dict[str, GenerationProfile]:
+        profiles = {}
+        for name, default in DEFAULT_PROFILES.items():
+            prefix = f"PROFILE_{name.upper()}_"
+            max_tokens = int_env(prefix + "MAX_TOKENS", default.max_tokens or 0)
+            temperature = os.getenv(prefix + "TEMPERATURE")
+            profiles[name] = GenerationProfile(
+                name,
+                max_tokens=max_tokens or None,
+                temperature=float(temperature) if temperature else default.temperature,
+                timeout=float(os.getenv(prefix + "TIMEOUT", str(default.timeout))),
+                ollama_model=os.getenv(prefix + "OLLAMA_MODEL") or default.ollama_model,
+                openai_model=os.getenv(prefix + "OPENAI_MODEL") or default.openai_model,
+            )
+        return profiles
+
     initial_age, rebirth_age, age_increment_hours, end_cycle = 37, 10, 0.5, 80
     try:
         from connor_config import AGING  # type: ignore
@@ -87,6 +184,15 @@ def load_settings(env_file: str | None = ".env") -> Settings:
         vision_model=os.getenv("VISION_MODEL", "gpt-4o"),
         ollama_api_url=os.getenv("OLLAMA_API_URL", "http://localhost:11434"),
         ollama_model=os.getenv("OLLAMA_MODEL", "mistral"),
+        ollama_chat_mode=os.getenv("OLLAMA_CHAT_MODE", "true").lower() not in ("0", "false", "no"),
+        ollama_keep_alive=os.getenv("OLLAMA_KEEP_ALIVE", "30m"),
+        ollama_num_ctx=int_env("OLLAMA_NUM_CTX", 8192),
+        ollama_warmup=os.getenv("OLLAMA_WARMUP", "true").lower() not in ("0", "false", "no"),
+        ollama_ping_interval=float(os.getenv("OLLAMA_PING_INTERVAL", "600.0")),
+        json_mode=os.getenv("JSON_MODE", "true").lower() not in ("0", "false", "no"),
+        model_context_windows=context_windows_env("MODEL_CONTEXT_WINDOWS"),
+        response_token_reserve=int_env("RESPONSE_TOKEN_RESERVE", 1024),
+        generation_profiles=profiles_env(),
         whisper_model=os.getenv("WHISPER_MODEL", "small"),
         tts_rate=int_env("TTS_RATE", 150),
         tts_volume=float(os.getenv("TTS_VOLUME", "0.9")),
@@ -94,13 +200,54 @@ def load_settings(env_file: str | None = ".env") -> Settings:
         belief_file=path_env("BELIEF_FILE", "beliefs.txt"),
         chat_memory_file=path_env("CHAT_MEMORY_FILE", "chat_memory.txt"),
         thoughts_file=path_env("THOUGHTS_FILE", "thoughts.txt"),
+        thoughts_dir=path_env("THOUGHTS_DIR", "thoughts"),
         knowledge_file=path_env("KNOWLEDGE_FILE", "knowledge.txt"),
         username_file=path_env("USERNAME_FILE", "username.txt"),
         rebirth_log_file=path_env("REBIRTH_LOG_FILE", "rebirth_log.txt"),
+        reflection_cache_dir=path_env("REFLECTION_CACHE_DIR", "reflection_cache"),
+        search_index_file=path_env("SEARCH_INDEX_FILE", "search_index.json"),
+        storage_backend=os.getenv("STORAGE_BACKEND", "file").lower(),
+        sqlite_file=path_env("SQLITE_FILE", "connor.db"),
+        storage_flush_interval=float(os.getenv("STORAGE_FLUSH_INTERVAL", "2.0")),
+        username_reload_interval=float(os.getenv("USERNAME_RELOAD_INTERVAL", "5.0")),
+        thought_cache_max_trees=int_env("THOUGHT_CACHE_MAX_TREES", 64),
+        thought_cache_max_nodes=int_env("THOUGHT_CACHE_MAX_NODES", 20000),
+        thought_flush_interval=float(os.getenv("THOUGHT_FLUSH_INTERVAL", "30.0")),
         music_folder=path_env("MUSIC_FOLDER", "Music"),
         summary_interval=int_env("SUMMARY_INTERVAL", 40),
         chat_memory_limit=int_env("CHAT_MEMORY_LIMIT", 50),
+        chat_compaction_interval=int_env("CHAT_COMPACTION_INTERVAL", 200),
+        knowledge_retention=int_env("KNOWLEDGE_RETENTION", 10),
+        knowledge_compaction_interval=int_env("KNOWLEDGE_COMPACTION_INTERVAL", 50),
         recent_history_limit=int_env("RECENT_HISTORY_LIMIT", 8),
+        llm_cache_size=int_env("LLM_CACHE_SIZE", 512),
+        ollama_concurrency=int_env("OLLAMA_CONCURRENCY", 1),
+        hostility_batch_window=float(os.getenv("HOSTILITY_BATCH_WINDOW", "0.05")),
+        hostility_batch_size=int_env("HOSTILITY_BATCH_SIZE", 16),
+        hostility_batch_max_latency=float(os.getenv("HOSTILITY_BATCH_MAX_LATENCY", "0.25")),
+        openai_concurrency=int_env("OPENAI_CONCURRENCY", 8),
+        hedge_requests=os.getenv("HEDGE_REQUESTS", "true").lower() not in ("0", "false", "no"),
+        hedge_priorities=tuple(
+            name.strip().lower() for name in os.getenv("HEDGE_PRIORITIES", "interactive,classify").split(",") if name.strip()
+        ),
+        hedge_initial_delay=float(os.getenv("HEDGE_INITIAL_DELAY", "10.0")),
+        hedge_min_delay=float(os.getenv("HEDGE_MIN_DELAY", "1.0")),
+        circuit_failure_threshold=int_env("CIRCUIT_FAILURE_THRESHOLD", 3),
+        circuit_reset_seconds=float(os.getenv("CIRCUIT_RESET_SECONDS", "30.0")),
+        metrics_host=os.getenv("METRICS_HOST", "127.0.0.1"),
+        metrics_port=int_env("METRICS_PORT", 0),
+        openai_max_connections=int_env("OPENAI_MAX_CONNECTIONS", 16),
+        openai_timeout=float(os.getenv("OPENAI_TIMEOUT", "60.0")),
+        llm_cache_dir=path_env("LLM_CACHE_DIR", "") if os.getenv("LLM_CACHE_DIR") else None,
+        stream_replies=os.getenv("STREAM_REPLIES", "true").lower() not in ("0", "false", "no"),
+        stream_edit_interval=float(os.getenv("STREAM_EDIT_INTERVAL", "1.0")),
+        retrieval_top_k=int_env("RETRIEVAL_TOP_K", 6),
+        retrieval_char_budget=int_env("RETRIEVAL_CHAR_BUDGET", 1500),
+        retrieval_knowledge_pool=int_env("RETRIEVAL_KNOWLEDGE_POOL", 200),
+        reflection_char_budget=int_env("REFLECTION_CHAR_BUDGET", 15000),
+        summary_cache_dir=path_env("SUMMARY_CACHE_DIR", "summary_cache"),
+        digest_chunk_chars=int_env("DIGEST_CHUNK_CHARS", 4000),
+        digest_concurrency=int_env("DIGEST_CONCURRENCY", 3),
         depressive_hit_threshold=int_env("DEPRESSIVE_HIT_THRESHOLD", 50),
         initial_age=initial_age,
         rebirth_age=rebirth_age,
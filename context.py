@@ -7,15 +7,22 @@ from dataclasses import dataclass
 from .config import Settings
 from .services.conversation import ConversationService
 from .services.llm import LLMService
+from .services.metrics import MetricsRegistry
 from .services.knowledge import KnowledgeService
 from .services.persona import PersonaService
 from .services.physiology import PhysiologyService
+from .services.prompts import PromptContext
+from .services.archives import ArchiveManifest
 from .services.reflection import ReflectionService
+from .services.retrieval import ContextRetriever
+from .services.search import SearchService
 from .services.speech import SpeechService
-from .services.storage import StorageService
+from .services.storage import create_storage
 from .services.thought import ThoughtService
 from .services.voice import VoiceService
+from .services.warmup import ModelWarmer
 from .services.web import WebService
+from .services.write_behind import WriteBehindStorage
 from .state import ConnorState
 
 
@@ -23,7 +30,7 @@ from .state import ConnorState
 class ConnorContext:
     settings: Settings
     state: ConnorState
-    storage: StorageService
+    storage: WriteBehindStorage
     llm: LLMService
     voice: VoiceService
     knowledge: KnowledgeService
@@ -33,31 +40,59 @@ class ConnorContext:
     web: WebService
     persona: PersonaService
     reflection: ReflectionService
+    search: SearchService
+    retriever: ContextRetriever
+    prompts: PromptContext
     speech: SpeechService
+    metrics: MetricsRegistry
+    warmer: ModelWarmer
 
 
 def build_context(settings: Settings) -> ConnorContext:
     state = ConnorState(current_age=settings.initial_age)
-    storage = StorageService(settings, state)
+    storage = WriteBehindStorage(create_storage(settings, state), settings.storage_flush_interval)
+    storage.start()
     openai_client = None
     try:
         if settings.openai_api_key:
-            from openai import OpenAI
+            import httpx
+            from openai import AsyncOpenAI
 
-            openai_client = OpenAI(api_key=settings.openai_api_key)
+            http_client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=settings.openai_max_connections,
+                    max_keepalive_connections=settings.openai_max_connections,
+                    keepalive_expiry=60.0,
+                ),
+                timeout=httpx.Timeout(settings.openai_timeout, connect=10.0),
+            )
+            openai_client = AsyncOpenAI(api_key=settings.openai_api_key, http_client=http_client)
     except Exception as exc:
         print(f"[OpenAI Init Error] {exc}")
 
-    llm = LLMService(settings, state, openai_client=openai_client)
+    metrics = MetricsRegistry()
+    llm = LLMService(settings, state, openai_client=openai_client, metrics=metrics)
     voice = VoiceService(settings)
-    knowledge = KnowledgeService(settings, state, storage, llm)
+    manifest = ArchiveManifest(settings)
+    search = SearchService(settings, storage, manifest)
+    retriever = ContextRetriever(settings, storage, search)
+    knowledge = KnowledgeService(settings, state, storage, llm, retriever)
     physiology = PhysiologyService(state)
     thought = ThoughtService(settings, state, storage, knowledge, llm)
     persona = PersonaService(settings, state, storage, knowledge, llm)
-    reflection = ReflectionService(settings, state, storage, knowledge, llm)
+    reflection = ReflectionService(settings, state, storage, knowledge, llm, manifest)
     speech = SpeechService(settings.whisper_model)
     conversation = ConversationService(settings, state, storage, llm, knowledge, physiology, persona)
     web = WebService(settings, state, llm)
+    warmer = ModelWarmer(settings, state, llm)
+
+    metrics.add_collector("storage", storage.stats)
+    metrics.add_collector("llm_cache", llm.cache.stats)
+    metrics.add_collector("scheduler", llm.scheduler.stats)
+    metrics.add_collector("routing", llm.router.stats)
+    metrics.add_collector("budget", llm.budget.stats)
+    metrics.add_collector("hostility", conversation.hostility.stats)
+    metrics.add_collector("search", search.index.stats)
 
     state.core_agent_statement = storage.load_core_agent_statement()
     state.dynamic_agent_statement = storage.load_dynamic_agent_statement()
@@ -80,5 +115,10 @@ def build_context(settings: Settings) -> ConnorContext:
         web=web,
         persona=persona,
         reflection=reflection,
+        search=search,
+        retriever=retriever,
+        prompts=llm.prompts,
         speech=speech,
+        metrics=metrics,
+        warmer=warmer,
     )
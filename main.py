@@ -10,6 +10,7 @@ from discord.ext import commands
 from .config import load_settings
 from .context import ConnorContext, build_context
 from .cogs import register_cogs
+from .services.metrics import MetricsServer
 
 
 class ConnorBot(commands.Bot):
@@ -18,10 +19,38 @@ class ConnorBot(commands.Bot):
         intents.message_content = True
         super().__init__(command_prefix="!", intents=intents, help_command=None)
         self.ctx = ctx
+        self.metrics_server: MetricsServer | None = None
+
+    async def setup_hook(self) -> None:
+        asyncio.create_task(self.ctx.search.sync())
+        # Runs before login so the wake message doesn't pay the model load time.
+        await self.ctx.warmer.start()
+        settings = self.ctx.settings
+        if settings.metrics_port:
+            self.metrics_server = MetricsServer(self.ctx.metrics, settings.metrics_host, settings.metrics_port)
+            try:
+                await self.metrics_server.start()
+            except OSError as exc:
+                print(f"[Metrics Error] {exc}")
+                self.metrics_server = None
 
     async def close(self) -> None:
-        await super().close()
-        await self.ctx.llm.close()
+        teardown = [super().close, self.ctx.warmer.stop]
+        if self.metrics_server is not None:
+            teardown.append(self.metrics_server.stop)
+        teardown += [self.ctx.conversation.drain, self.ctx.llm.close]
+        try:
+            for step in teardown:
+                try:
+                    await step()
+                except Exception as exc:
+                    print(f"[Shutdown Error] {step.__qualname__}: {exc}")
+        finally:
+            # Queued chat, knowledge and thought-tree writes must land even if teardown above failed.
+            try:
+                self.ctx.thought.flush()
+            finally:
+                await self.ctx.storage.close()
 
 
 def create_bot() -> ConnorBot:
@@ -62,6 +62,7 @@ class ThoughtTree:
     created_at: str = field(default_factory=lambda: datetime.utcnow().isoformat())
     last_updated: str = field(default_factory=lambda: datetime.utcnow().isoformat())
     nodes: Dict[str, ThoughtNode] = field(default_factory=dict)
+    dirty: bool = field(default=False, repr=False, compare=False)
 
     def add_node(self, node: ThoughtNode, depth_limit: int, branch_limit: int) -> Tuple[bool, str]:
         if node.depth > depth_limit:
@@ -77,8 +78,23 @@ class ThoughtTree:
 
         self.nodes[node.thought_id] = node
         self.last_updated = datetime.utcnow().isoformat()
+        self.dirty = True
         return True, "Node added successfully"
 
+    @property
+    def node_count(self) -> int:
+        return len(self.nodes)
+
+    def info(self) -> "ThoughtTreeInfo":
+        return ThoughtTreeInfo(
+            tree_id=self.tree_id,
+            trigger=self.trigger,
+            age_at_creation=self.age_at_creation,
+            created_at=self.created_at,
+            last_updated=self.last_updated,
+            node_count=self.node_count,
+        )
+
     def get_node(self, thought_id: str) -> Optional[ThoughtNode]:
         return self.nodes.get(thought_id)
 
@@ -109,3 +125,24 @@ class ThoughtTree:
         tree.last_updated = data.get("last_updated", tree.last_updated)
         tree.nodes = {node_id: ThoughtNode.from_dict(node_data) for node_id, node_data in data["nodes"].items()}
         return tree
+
+
+@dataclass
+class ThoughtTreeInfo:
+    tree_id: str
+    trigger: str
+    age_at_creation: int
+    created_at: str
+    last_updated: str
+    node_count: int
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, object]) -> "ThoughtTreeInfo":
+        return cls(
+            tree_id=data["tree_id"],
+            trigger=data["trigger"],
+            age_at_creation=data.get("age_at_creation", 0),
+            created_at=data.get("created_at", ""),
+            last_updated=data.get("last_updated", ""),
+            node_count=int(data.get("node_count", 0)),
+        )
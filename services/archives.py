@@ -0,0 +1,148 @@
+"""Per-archive cache of parsed and pre-rendered history archives."""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, List
+
+from ..config import Settings
+from .storage import atomic_write_text, format_chat_log, parse_chat_log
+
+
+class ArchiveManifest:
+    """Parsed and rendered archives, cached one file per archive under ``reflection_cache_dir``."""
+
+    def __init__(self, settings: Settings):
+        self.settings = settings
+        self.directory = settings.reflection_cache_dir
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def sources(self) -> List[tuple[str, Path]]:
+        sources: List[tuple[str, Path]] = []
+        archive_root = self.settings.chat_memory_file.parent
+        for archive in sorted(p for p in archive_root.glob("chat_memory_archive_*.txt") if p.is_file()):
+            sources.append(("archive", archive))
+        archive_dir = Path("archives")
+        if archive_dir.exists():
+            for volume_file in sorted(archive_dir.glob("connor_volume_*.json")):
+                sources.append(("volume", volume_file))
+            for will_file in sorted(archive_dir.glob("connor_will_*.json")):
+                sources.append(("will", will_file))
+        rebirth_log = Path(self.settings.rebirth_log_file)
+        if rebirth_log.exists():
+            sources.append(("rebirth_log", rebirth_log))
+        return sources
+
+    def _cache_path(self, path: Path) -> Path:
+        return self.directory / f"{path.name}.json"
+
+    @staticmethod
+    def _render(kind: str, path: Path) -> tuple[Any, str]:
+        text = path.read_text(encoding="utf-8")
+        if kind == "archive":
+            content = parse_chat_log(text)
+            return content, f"=== ARCHIVE: {path.name} ===\n{format_chat_log(content)}\n"
+        if kind in ("volume", "will"):
+            content = json.loads(text)
+            return content, f"=== {kind.upper()}: {path.name} ===\n{json.dumps(content)}\n"
+        return text, f"=== REBIRTH LOG ===\n{text}\n"
+
+    def _entry(self, kind: str, path: Path, stat: os.stat_result) -> Dict[str, Any] | None:
+        """Cached entry for one archive, re-rendering it only when its mtime or size moved."""
+        key = str(path)
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            try:
+                entry = json.loads(self._cache_path(path).read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                entry = None
+        if entry and entry["mtime"] == stat.st_mtime_ns and entry["size"] == stat.st_size:
+            with self._lock:
+                self._entries[key] = entry
+            return entry
+        try:
+            content, section = self._render(kind, path)
+        except Exception as exc:
+            print(f"[Reflect Error] Reading {path}: {exc}")
+            return None
+        entry = {
+            "kind": kind,
+            "name": path.name,
+            "mtime": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "content": content,
+            "section": section,
+        }
+        with self._lock:
+            self._entries[key] = entry
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            atomic_write_text(self._cache_path(path), json.dumps(entry))
+        except Exception as exc:
+            print(f"[Archive Cache Save Error] {exc}")
+        return entry
+
+    def _stat_sources(self) -> List[tuple[str, Path, os.stat_result]]:
+        stated = []
+        for kind, path in self.sources():
+            try:
+                stated.append((kind, path, path.stat()))
+            except OSError:
+                continue
+        return stated
+
+    def refresh(self) -> List[Dict[str, Any]]:
+        """Every archive, oldest source order first; drops cache files for archives that are gone."""
+        stated = self._stat_sources()
+        current = [entry for entry in (self._entry(*source) for source in stated) if entry is not None]
+
+        live = {path.name for _, path, _ in stated}
+        with self._lock:
+            for key in [key for key, entry in self._entries.items() if entry["name"] not in live]:
+                del self._entries[key]
+        if self.directory.exists():
+            for cached in self.directory.glob("*.json"):
+                if cached.name[: -len(".json")] not in live:
+                    try:
+                        cached.unlink()
+                    except OSError as exc:
+                        print(f"[Archive Cache Cleanup Error] {exc}")
+        return current
+
+    def sections(self, budget: int | None = None) -> List[str]:
+        """Rendered sections, newest archive first, stopping once ``budget`` characters are filled.
+
+        Archives past the budget are never read, so a long history costs no
+        more than the part of it that fits.
+        """
+        stated = sorted(self._stat_sources(), key=lambda source: source[2].st_mtime_ns, reverse=True)
+        sections: List[str] = []
+        used = 0
+        for source in stated:
+            if budget is not None and used >= budget:
+                break
+            entry = self._entry(*source)
+            if entry is None:
+                continue
+            sections.append(entry["section"])
+            used += len(entry["section"]) + 2
+        return sections
+
+
+def pack_sections(sections: List[str], budget: int) -> List[str]:
+    packed: List[str] = []
+    remaining = budget
+    for section in sections:
+        if remaining <= 0:
+            break
+        if len(section) > remaining:
+            packed.append(section[:remaining])
+            break
+        packed.append(section)
+        remaining -= len(section) + 2
+    return packed
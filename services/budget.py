@@ -0,0 +1,137 @@
+"""Token budgeting for prompts assembled from prioritised sections."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict, List, Sequence
+
+from ..config import Settings
+
+CHARS_PER_TOKEN = 4
+MIN_SECTION_TOKENS = 32
+ELLIPSIS = " …"
+DEFAULT_CONTEXT_WINDOW = 8192
+
+# Prefix-matched against the model name; the longest matching prefix wins.
+MODEL_CONTEXT_WINDOWS: Dict[str, int] = {
+    "gpt-4o": 128000,
+    "gpt-4-turbo": 128000,
+    "gpt-4.1": 1000000,
+    "gpt-4-32k": 32768,
+    "gpt-4": 8192,
+    "gpt-3.5-turbo": 16385,
+    "o1": 128000,
+    "o3": 200000,
+}
+
+
+def estimate_tokens(text: str) -> int:
+    # UTF-8 bytes / 4 slightly overestimates English and stays safe for emoji-heavy text.
+    return (len(text.encode("utf-8")) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+@dataclass
+class Section:
+    body: str
+    label: str = ""
+    priority: int = 0
+    keep: str = "head"
+
+    def render(self, body: str | None = None) -> str:
+        return f"{self.label}{self.body if body is None else body}"
+
+
+def _shrink(section: Section, tokens: int) -> str | None:
+    allowance = tokens - estimate_tokens(section.label + ELLIPSIS)
+    if allowance < MIN_SECTION_TOKENS:
+        return None
+    body = section.body
+    chars = allowance * CHARS_PER_TOKEN
+    while body and chars > 0:
+        if section.keep == "tail":
+            cut = body[-chars:]
+            space = cut.find(" ", 0, 80)
+            candidate = "… " + (cut[space + 1 :] if space >= 0 else cut)
+        else:
+            cut = body[:chars]
+            space = cut.rfind(" ", max(0, len(cut) - 80))
+            candidate = (cut[:space] if space > 0 else cut) + ELLIPSIS
+        if estimate_tokens(candidate) <= allowance:
+            return section.render(candidate)
+        chars = int(chars * 0.9)
+    return None
+
+
+class TokenBudget:
+    def __init__(self, settings: Settings):
+        self.settings = settings
+        self.packed = 0
+        self.truncated = 0
+        self.dropped = 0
+        self.saved_tokens = 0
+
+    def context_window(self, backend: str, model: str) -> int:
+        overrides = self.settings.model_context_windows
+        if model in overrides:
+            return overrides[model]
+        if backend == "ollama":
+            return self.settings.ollama_num_ctx
+        matches = [prefix for prefix in MODEL_CONTEXT_WINDOWS if model.startswith(prefix)]
+        if matches:
+            return MODEL_CONTEXT_WINDOWS[max(matches, key=len)]
+        return DEFAULT_CONTEXT_WINDOW
+
+    def available(self, backend: str, model: str, system_prompt: str = "", reserve: int | None = None) -> int:
+        window = self.context_window(backend, model)
+        reserve = self.settings.response_token_reserve if reserve is None else reserve
+        return max(0, window - reserve - estimate_tokens(system_prompt))
+
+    def section_chars(
+        self, backend: str, model: str, system_prompt: str = "", overhead: str = "", reserve: int | None = None
+    ) -> int:
+        available = self.available(backend, model, system_prompt, reserve)
+        return max(0, available - estimate_tokens(overhead)) * CHARS_PER_TOKEN
+
+    def pack(self, sections: Sequence[Section], limit: int) -> str:
+        """Render sections in declared order, filling the budget by priority."""
+        rendered: List[str | None] = [None] * len(sections)
+        remaining = limit
+        flexible = []
+        for index, section in enumerate(sections):
+            if not section.body:
+                continue
+            if section.keep == "all":
+                rendered[index] = section.render()
+                remaining -= estimate_tokens(rendered[index])
+            else:
+                flexible.append(index)
+
+        order = sorted(flexible, key=lambda index: sections[index].priority)
+        for index in order:
+            section = sections[index]
+            text = section.render()
+            cost = estimate_tokens(text)
+            if cost <= remaining:
+                rendered[index] = text
+                remaining -= cost
+                continue
+            shrunk = _shrink(section, remaining)
+            if shrunk is None:
+                self.dropped += 1
+                self.saved_tokens += cost
+                continue
+            rendered[index] = shrunk
+            self.truncated += 1
+            self.saved_tokens += cost - estimate_tokens(shrunk)
+            remaining -= estimate_tokens(shrunk)
+
+        self.packed += 1
+        return "\n".join(text for text in rendered if text is not None)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "packed": self.packed,
+            "truncated": self.truncated,
+            "dropped": self.dropped,
+            "saved_tokens": self.saved_tokens,
+        }
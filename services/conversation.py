@@ -2,20 +2,41 @@
 
 from __future__ import annotations
 
-import json
+import asyncio
+import random
 from datetime import datetime
-from typing import Dict, Tuple
+from typing import AsyncIterator, Dict, Set, Tuple
 
 import discord
 
 from ..config import Settings
-from ..state import ConnorState, age_behavior
+from ..state import ConnorState
 from ..utils import split_message
+from ..utils.streaming import DiscordStreamSink
 from .knowledge import KnowledgeService
-from .llm import LLMService
+from .llm import LLMService, is_error_reply
 from .physiology import PhysiologyService
 from .storage import StorageService
 from .persona import PersonaService
+from .hostility import HostilityBatcher
+
+# Sent instead of the raw "[LLM Error] ..." text when every backend fails.
+FALLBACK_REPLIES = (
+    "Hang on—my head's full of static right now. Give me a minute and say that again?",
+    "I... lost the thread there. Something in me glitched. Try me again in a bit.",
+    "Sorry, my thoughts just won't come together right now. Ask me again soon.",
+)
+
+
+async def _guard_stream(stream: AsyncIterator[str]) -> AsyncIterator[str]:
+    """Swap a failed stream's error text for an in-character fallback line."""
+    first = True
+    async for delta in stream:
+        if first and is_error_reply(delta):
+            yield random.choice(FALLBACK_REPLIES)
+            return
+        first = False
+        yield delta
 
 
 class ConversationService:
@@ -36,29 +57,19 @@ class ConversationService:
         self.knowledge = knowledge
         self.physiology = physiology
         self.persona = persona
+        self.hostility = HostilityBatcher(settings, llm)
+        self._tasks: Set[asyncio.Task] = set()
 
     async def classify_hostility(self, user_input: str) -> Tuple[bool, int]:
-        prompt = (
-            f"You are monitoring Connor's emotional safety.\n"
-            f"User input: {user_input}\n"
-            "Return JSON {\"hostile\": boolean, \"intensity\": integer 0-10}."
-        )
-        result = await self.llm.generate_json(prompt, "You are a helpful AI that returns JSON.")
-        if not result:
-            return False, 0
-        return bool(result.get("hostile", False)), int(result.get("intensity", 0))
+        return await self.hostility.classify(user_input)
 
     async def generate_internal_thought(self, user_input: str, username: str) -> str:
         prompt = (
-            f"Agent Statement: {self.state.core_agent_statement}\n"
-            f"Beliefs: {json.dumps(self.state.beliefs, indent=2)}\n"
-            f"Age: {self.state.current_age}\n"
-            f"Age Behavior: {age_behavior(self.state.current_age)}\n"
             f"Recent Input from {username}: {user_input}\n"
             "Generate Connor's private internal monologue (max 120 words)."
         )
-        system_prompt = "You are Connor's inner voice, raw and unfiltered.";
-        return await self.llm.generate(prompt, system_prompt)
+        system_prompt = self.llm.prompts.system("You are Connor's inner voice, raw and unfiltered.")
+        return await self.llm.generate(prompt, system_prompt, profile="reply", site="internal_thought")
 
     async def process_message(self, message: discord.Message) -> None:
         username = self.get_username(message.author)
@@ -93,36 +104,32 @@ class ConversationService:
             await self._handle_heart_attack(message, distress)
             return
 
-        reply = await self.llm.generate_direct_reply(
-            message.content,
-            self.state.core_agent_statement,
-            self.state.beliefs,
-            username,
-            current_age,
-        )
-
-        try:
-            thought = await self.generate_internal_thought(message.content, username)
-        except Exception as exc:
-            print(f"[Internal Thought Error] {exc}")
-            thought = ""
-
-        if thought and self.settings.thoughts_channel_id:
-            channel = message.guild.get_channel(self.settings.thoughts_channel_id) if message.guild else None
-            if channel:
-                for chunk in split_message(f"🤔 **Connor's Internal Monologue for {username}:**\n{thought}"):
-                    await channel.send(chunk)
+        history = await asyncio.to_thread(self.knowledge.retriever.context, f"{username} {message.content}")
+        reply_args = (message.content, username)
+        if self.settings.stream_replies:
+            reply = await self._send_reply(
+                message, self.llm.stream_direct_reply(*reply_args, history=history), username
+            )
+        else:
+            reply = await self._send_reply(
+                message, await self.llm.generate_direct_reply(*reply_args, history=history), username
+            )
 
-        await self._send_reply(message, reply, username)
         self.storage.add_chat_interaction(username, message.content, reply, self.state.core_agent_statement)
         self.state.interaction_count += 1
         self.state.last_user_message_time = datetime.utcnow()
         self.state.awaiting_introduction.pop(message.author.id, None)
 
+        # The monologue is a side channel; it shouldn't hold up recording the turn.
+        task = asyncio.create_task(self._post_internal_thought(message, username))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
         if self.state.interaction_count % self.settings.summary_interval == 0:
             summary = await self.knowledge.summarize_recent_interactions(self.settings.summary_interval)
             self.knowledge.save_knowledge(summary)
             self.state.knowledge_cache.append(summary)
+            self.state.bump_version()
             channel_id = self.settings.knowledge_channel_id
             if message.guild and channel_id:
                 channel = message.guild.get_channel(channel_id)
@@ -136,7 +143,30 @@ class ConversationService:
                     for chunk in split_message(text):
                         await channel.send(chunk)
 
-    async def _send_reply(self, message: discord.Message, reply: str, username: str) -> None:
+    async def drain(self) -> None:
+        """Wait for internal thoughts still being generated in the background."""
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def _post_internal_thought(self, message: discord.Message, username: str) -> None:
+        try:
+            thought = await self.generate_internal_thought(message.content, username)
+        except Exception as exc:
+            print(f"[Internal Thought Error] {exc}")
+            return
+
+        if thought and not is_error_reply(thought) and self.settings.thoughts_channel_id:
+            channel = message.guild.get_channel(self.settings.thoughts_channel_id) if message.guild else None
+            if channel:
+                try:
+                    for chunk in split_message(f"🤔 **Connor's Internal Monologue for {username}:**\n{thought}"):
+                        await channel.send(chunk)
+                except Exception as exc:
+                    print(f"[Internal Thought Error] {exc}")
+
+    async def _send_reply(
+        self, message: discord.Message, reply: str | AsyncIterator[str], username: str
+    ) -> str:
         main_channel = None
         if message.guild and self.settings.main_channel_id:
             main_channel = message.guild.get_channel(self.settings.main_channel_id)
@@ -145,12 +175,22 @@ class ConversationService:
         if main_channel and message.channel != main_channel:
             target_channels.append(main_channel)
 
+        if not isinstance(reply, str):
+            sink = DiscordStreamSink(
+                target_channels, prefix=f"To {username}: ", edit_interval=self.settings.stream_edit_interval
+            )
+            return await sink.consume(_guard_stream(reply))
+
+        if is_error_reply(reply):
+            reply = random.choice(FALLBACK_REPLIES)
+
         for channel in target_channels:
             try:
                 for chunk in split_message(f"To {username}: {reply}"):
                     await channel.send(chunk)
             except discord.errors.Forbidden:
                 print(f"[Reply Error] No permission to send to channel {channel.id}")
+        return reply
 
     async def _announce_distress(self, message: discord.Message, distress: str) -> None:
         targets = []
@@ -178,36 +218,13 @@ class ConversationService:
             print(f"[Rebirth Error] {exc}")
 
     def get_username(self, user: discord.abc.User) -> str:
-        path = self.settings.username_file
-        if path.exists():
-            try:
-                data = json.loads(path.read_text(encoding="utf-8"))
-                if str(user.id) in data:
-                    return data[str(user.id)]
-            except Exception as exc:
-                print(f"[Username Load Error] {exc}")
-        return user.display_name
+        return self.storage.usernames.get(user.id) or user.display_name
 
     def has_username(self, user: discord.abc.User) -> bool:
-        path = self.settings.username_file
-        if not path.exists():
-            return False
-        try:
-            data = json.loads(path.read_text(encoding="utf-8"))
-        except Exception:
-            return False
-        return str(user.id) in data
+        return user.id in self.storage.usernames
 
     def save_username(self, user: discord.abc.User, username: str) -> None:
-        path = self.settings.username_file
-        try:
-            data = {}
-            if path.exists():
-                data = json.loads(path.read_text(encoding="utf-8"))
-            data[str(user.id)] = username
-            path.write_text(json.dumps(data, indent=2), encoding="utf-8")
-        except Exception as exc:
-            print(f"[Username Save Error] {exc}")
+        self.storage.usernames.set(user.id, username)
 
     def calculate_age(self) -> int:
         elapsed = datetime.utcnow() - self.state.start_time
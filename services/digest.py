@@ -0,0 +1,170 @@
+"""Hierarchical map-reduce summaries of Connor's archived history."""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+from ..config import Settings
+from .archives import ArchiveManifest
+from .llm import LLMService, is_error_reply
+from .storage import atomic_write_text, format_chat_log
+
+DIGEST_VERSION = "1"
+
+CHUNK_PROMPT = (
+    "Summarize this slice of Connor's memories in under 150 words. Keep names, turning points, "
+    "strong emotions and anything Connor learned about himself.\n\n{text}"
+)
+MERGE_PROMPT = (
+    "These are consecutive summaries of {label}. Merge them into one digest under 250 words that "
+    "keeps the arc of events, recurring people, emotional shifts and lessons.\n\n{text}"
+)
+SYSTEM_PROMPT = "You are Connor's memory keeper. You write faithful, dense summaries without invention."
+
+
+def chunk_text(text: str, size: int) -> List[str]:
+    chunks: List[str] = []
+    current: List[str] = []
+    length = 0
+    for line in text.splitlines(keepends=True):
+        while len(line) > size:
+            if current:
+                chunks.append("".join(current))
+                current, length = [], 0
+            chunks.append(line[:size])
+            line = line[size:]
+        if length + len(line) > size and current:
+            chunks.append("".join(current))
+            current, length = [], 0
+        current.append(line)
+        length += len(line)
+    if current:
+        chunks.append("".join(current))
+    return [chunk for chunk in chunks if chunk.strip()]
+
+
+def cycle_of(kind: str, name: str, archive_order: Dict[str, int]) -> int | None:
+    if kind == "archive":
+        return archive_order.get(name)
+    if kind in ("volume", "will"):
+        try:
+            return int(Path(name).stem.split("_")[-1])
+        except ValueError:
+            return None
+    return None
+
+
+class SummaryCache:
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(stage: str, text: str) -> str:
+        return hashlib.sha256(f"{DIGEST_VERSION}\0{stage}\0{text}".encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> str | None:
+        path = self.directory / f"{key}.txt"
+        try:
+            summary = path.read_text(encoding="utf-8")
+        except OSError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return summary
+
+    def put(self, key: str, summary: str) -> None:
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            atomic_write_text(self.directory / f"{key}.txt", summary)
+        except Exception as exc:
+            print(f"[Summary Cache Save Error] {exc}")
+
+
+class HistoryDigester:
+    def __init__(self, settings: Settings, storage, llm: LLMService, manifest: ArchiveManifest):
+        self.settings = settings
+        self.storage = storage
+        self.llm = llm
+        self.manifest = manifest
+        self.cache = SummaryCache(settings.summary_cache_dir)
+        self._semaphore = asyncio.Semaphore(max(1, settings.digest_concurrency))
+
+    async def _summarize(self, stage: str, prompt: str, text: str) -> str:
+        key = self.cache.key(stage, text)
+        cached = await asyncio.to_thread(self.cache.get, key)
+        if cached is not None:
+            return cached
+        async with self._semaphore:
+            summary = (await self.llm.generate(prompt, SYSTEM_PROMPT, profile="json_summary", site="digest")).strip()
+        if is_error_reply(summary):
+            print(f"[Digest Error] {summary}")
+            return text[: self.settings.digest_chunk_chars // 4]
+        await asyncio.to_thread(self.cache.put, key, summary)
+        return summary
+
+    async def summarize_chunk(self, text: str) -> str:
+        return await self._summarize("chunk", CHUNK_PROMPT.format(text=text), text)
+
+    async def merge(self, summaries: List[str], label: str) -> str:
+        limit = self.settings.digest_chunk_chars
+        while len(summaries) > 1:
+            groups: List[List[str]] = [[]]
+            size = 0
+            for summary in summaries:
+                if groups[-1] and size + len(summary) > limit:
+                    groups.append([])
+                    size = 0
+                groups[-1].append(summary)
+                size += len(summary) + 2
+            if len(groups) == len(summaries):
+                groups = [summaries[i : i + 2] for i in range(0, len(summaries), 2)]
+            summaries = await asyncio.gather(
+                *(
+                    self._summarize(
+                        f"merge:{label}", MERGE_PROMPT.format(label=label, text="\n\n".join(group)), "\n\n".join(group)
+                    )
+                    if len(group) > 1
+                    else asyncio.sleep(0, group[0])
+                    for group in groups
+                )
+            )
+        return summaries[0] if summaries else ""
+
+    async def digest_text(self, text: str, label: str) -> str:
+        chunks = chunk_text(text, self.settings.digest_chunk_chars)
+        summaries = await asyncio.gather(*(self.summarize_chunk(chunk) for chunk in chunks))
+        return await self.merge(list(summaries), label)
+
+    def _cycle_sources(self) -> Tuple[Dict[Any, List[str]], List[str]]:
+        entries = self.manifest.refresh()
+        archive_names = sorted(entry["name"] for entry in entries if entry["kind"] == "archive")
+        archive_order = {name: index + 1 for index, name in enumerate(archive_names)}
+        cycles: Dict[Any, List[str]] = defaultdict(list)
+        extras: List[str] = []
+        for entry in entries:
+            cycle = cycle_of(entry["kind"], entry["name"], archive_order)
+            if cycle is None:
+                extras.append(entry["section"])
+            else:
+                cycles[cycle].append(entry["section"])
+        interactions = self.storage.get_all_interactions()
+        if interactions:
+            cycles["current"].append(f"=== CURRENT MEMORY ===\n{format_chat_log(interactions)}\n")
+        return cycles, extras
+
+    async def digest(self) -> Tuple[str, List[Tuple[str, str]]]:
+        cycles, extras = await asyncio.to_thread(self._cycle_sources)
+        ordered = sorted(cycles, key=lambda cycle: (cycle == "current", cycle if cycle != "current" else 0))
+        labels = [f"Cycle {cycle}" if cycle != "current" else "the current cycle" for cycle in ordered]
+        cycle_digests = await asyncio.gather(
+            *(self.digest_text("\n".join(cycles[cycle]), label) for cycle, label in zip(ordered, labels))
+        )
+        extra_digests = await asyncio.gather(*(self.digest_text(text, "the rebirth log") for text in extras))
+        life = await self.merge(list(cycle_digests) + list(extra_digests), "Connor's whole life")
+        return life, list(zip(labels, cycle_digests))
@@ -0,0 +1,168 @@
+"""Micro-batched hostility classification."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+from typing import Any, Dict, List, Set, Tuple
+
+from ..config import Settings
+from .llm import LLMService
+from .llm_cache import cache_key
+from .scheduler import Priority
+
+HOSTILITY_CACHE_TTL = 3600.0
+SYSTEM_PROMPT = "You are a helpful AI that returns JSON."
+VERDICT_SCHEMA = {
+    "type": "object",
+    "properties": {"hostile": {"type": "boolean"}, "intensity": {"type": "integer"}},
+    "required": ["hostile", "intensity"],
+}
+BATCH_SCHEMA = {
+    "type": "object",
+    "properties": {"results": {"type": "array", "items": VERDICT_SCHEMA}},
+    "required": ["results"],
+}
+
+
+def normalize_message(text: str) -> str:
+    """Dedup/cache key only; the model is shown the original so caps and "!!!" still count."""
+    return " ".join(text.lower().split()).strip(" .!?")
+
+
+def parse_verdict(result: Any) -> Tuple[bool, int]:
+    if not isinstance(result, dict):
+        return False, 0
+    try:
+        return bool(result.get("hostile", False)), int(result.get("intensity", 0))
+    except (TypeError, ValueError):
+        return bool(result.get("hostile", False)), 0
+
+
+class HostilityBatcher:
+    def __init__(self, settings: Settings, llm: LLMService):
+        self.llm = llm
+        self.window = settings.hostility_batch_window
+        self.max_batch = max(1, settings.hostility_batch_size)
+        self.max_latency = max(self.window, settings.hostility_batch_max_latency)
+        self._pending: Dict[str, List[asyncio.Future]] = {}
+        self._originals: Dict[str, str] = {}
+        self._first_arrival = 0.0
+        self._timer: asyncio.TimerHandle | None = None
+        self._tasks: Set[asyncio.Task] = set()
+        self.batches = 0
+        self.batched_messages = 0
+
+    def _key(self, text: str) -> str:
+        backend = self.llm.active_backend()
+        model = self.llm.model_for(backend, self.llm.profile("classify"))
+        return cache_key(backend, f"{model}/hostility", SYSTEM_PROMPT, text)
+
+    async def classify(self, user_input: str) -> Tuple[bool, int]:
+        text = normalize_message(user_input)
+        cached = await self.llm.cache.get(self._key(text))
+        if cached is not None:
+            return parse_verdict(json.loads(cached))
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        if not self._pending:
+            self._first_arrival = loop.time()
+        self._pending.setdefault(text, []).append(future)
+        self._originals.setdefault(text, user_input.strip())
+
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        else:
+            if self._timer:
+                self._timer.cancel()
+            deadline = min(loop.time() + self.window, self._first_arrival + self.max_latency)
+            self._timer = loop.call_at(deadline, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, {}
+        originals, self._originals = self._originals, {}
+        if batch:
+            task = asyncio.get_running_loop().create_task(self._run(batch, originals))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: Dict[str, List[asyncio.Future]], originals: Dict[str, str]) -> None:
+        texts = list(batch)
+        try:
+            verdicts = await self._classify_texts(texts, originals)
+        except Exception as exc:
+            print(f"[Hostility Batch Error] {exc}")
+            verdicts = {}
+        missing = [text for text in texts if text not in verdicts]
+        if len(texts) > 1 and missing:
+            singles = await asyncio.gather(
+                *(self._classify_texts([text], originals) for text in missing), return_exceptions=True
+            )
+            for single in singles:
+                if isinstance(single, dict):
+                    verdicts.update(single)
+        for text, futures in batch.items():
+            verdict = verdicts.get(text, (False, 0))
+            for future in futures:
+                if not future.done():
+                    future.set_result(verdict)
+
+    async def _classify_texts(self, texts: List[str], originals: Dict[str, str]) -> Dict[str, Tuple[bool, int]]:
+        """Classify by normalized key, prompting with the first original message seen for each."""
+        messages = [originals.get(text, text) for text in texts]
+        self.batches += 1
+        self.batched_messages += len(texts)
+        if len(texts) == 1:
+            prompt = (
+                f"You are monitoring Connor's emotional safety.\n"
+                f"User input: {messages[0]}\n"
+                "Return JSON {\"hostile\": boolean, \"intensity\": integer 0-10}."
+            )
+            result = await self.llm.generate_json(
+                prompt,
+                SYSTEM_PROMPT,
+                priority=Priority.CLASSIFY,
+                schema=VERDICT_SCHEMA,
+                site="hostility",
+                profile="classify",
+            )
+            verdicts = {texts[0]: parse_verdict(result)} if result else {}
+        else:
+            numbered = "\n".join(f"{index}. {json.dumps(message)}" for index, message in enumerate(messages, 1))
+            prompt = (
+                f"You are monitoring Connor's emotional safety.\n"
+                f"Classify each of these {len(texts)} user messages independently:\n{numbered}\n"
+                "Return JSON {\"results\": [{\"hostile\": boolean, \"intensity\": integer 0-10}, ...]} "
+                "with exactly one entry per message, in the same order."
+            )
+            result = await self.llm.generate_json(
+                prompt,
+                SYSTEM_PROMPT,
+                priority=Priority.CLASSIFY,
+                schema=BATCH_SCHEMA,
+                site="hostility_batch",
+                profile="classify",
+            )
+            results = result.get("results") if isinstance(result, dict) else result
+            verdicts = {}
+            if isinstance(results, list) and len(results) == len(texts):
+                verdicts = {text: parse_verdict(item) for text, item in zip(texts, results)}
+            else:
+                print(f"[Hostility Batch Error] Expected {len(texts)} results, got {result!r:.200}")
+
+        for text, (hostile, intensity) in verdicts.items():
+            payload = json.dumps({"hostile": hostile, "intensity": intensity})
+            await self.llm.cache.put(self._key(text), payload, HOSTILITY_CACHE_TTL)
+        return verdicts
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "batches": self.batches,
+            "messages": self.batched_messages,
+            "avg_batch_size": self.batched_messages / self.batches if self.batches else 0.0,
+        }
@@ -4,13 +4,36 @@ from __future__ import annotations
 
 import asyncio
 import json
+import time
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Callable, Dict, Hashable, List, Optional, Sequence, Tuple, Union
 
 import aiohttp
 
-from ..config import Settings
-from ..state import ConnorState, age_behavior
+from ..config import GenerationProfile, Settings
+from ..state import ConnorState
+from ..utils.json_repair import extract_json, matches_schema
+from .budget import Section, TokenBudget, estimate_tokens
+from .llm_cache import ResponseCache, cache_key
+from .metrics import MetricsRegistry
+from .prompts import PromptContext
+from .routing import LLMError, LLMRouter
+from .scheduler import LLMScheduler, Priority
+
+
+Prompt = Union[str, Sequence[Section]]
+
+ERROR_PREFIXES = ("[LLM Error]",)
+# OpenAI models that accept response_format={"type": "json_object"}.
+JSON_OBJECT_MODELS = ("gpt-4o", "gpt-4-turbo", "gpt-4.1", "gpt-4-1106", "gpt-4-0125", "gpt-3.5-turbo", "o1", "o3", "o4")
+PRELOAD_TIMEOUT = 300.0
+JSON_RETRY_NOTE = "Your previous reply could not be parsed. Reply with only the JSON, no prose or code fences."
+
+JsonFormat = Union[str, Dict[str, Any], None]
+
+
+def is_error_reply(text: str) -> bool:
+    return not text or text.startswith(ERROR_PREFIXES)
 
 
 @dataclass
@@ -20,11 +43,25 @@ class LLMResult:
 
 
 class LLMService:
-    def __init__(self, settings: Settings, state: ConnorState, openai_client=None):
+    def __init__(
+        self,
+        settings: Settings,
+        state: ConnorState,
+        openai_client=None,
+        metrics: MetricsRegistry | None = None,
+    ):
         self.settings = settings
         self.state = state
         self.openai_client = openai_client
         self._session: Optional[aiohttp.ClientSession] = None
+        self.cache = ResponseCache(settings.llm_cache_size, settings.llm_cache_dir)
+        self.prompts = PromptContext(state)
+        self.budget = TokenBudget(settings)
+        self.router = LLMRouter(settings)
+        self.metrics = metrics or MetricsRegistry()
+        self.scheduler = LLMScheduler(
+            {"ollama": settings.ollama_concurrency, "openai": settings.openai_concurrency}
+        )
 
     async def ensure_session(self) -> aiohttp.ClientSession:
         if not self._session or self._session.closed:
@@ -34,75 +71,473 @@ class LLMService:
     async def close(self) -> None:
         if self._session and not self._session.closed:
             await self._session.close()
+        if self.openai_client is not None:
+            await self.openai_client.close()
 
     @property
     def openai(self):
         return self.openai_client
 
-    async def generate(self, prompt: str, system_prompt: str) -> str:
-        backend = getattr(self.state, "backend", "ollama")
-        if backend == "openai" and self.openai_client:
-            return await self._openai_chat(prompt, system_prompt)
-        return await self._ollama_generate(prompt, system_prompt)
+    def active_backend(self) -> str:
+        if getattr(self.state, "backend", "ollama") == "openai" and self.openai_client:
+            return "openai"
+        return "ollama"
+
+    def active_model(self) -> str:
+        return getattr(self.state, "model", self.settings.ollama_model)
+
+    def available_backends(self) -> List[str]:
+        return ["ollama", "openai"] if self.openai_client else ["ollama"]
+
+    def profile(self, name: str) -> GenerationProfile:
+        profiles = self.settings.generation_profiles
+        return profiles.get(name) or profiles.get("reply") or GenerationProfile(name)
+
+    def model_for(self, backend: str, profile: GenerationProfile | None = None) -> str:
+        pinned = profile and (profile.openai_model if backend == "openai" else profile.ollama_model)
+        if pinned:
+            return pinned
+        if backend == getattr(self.state, "backend", "ollama"):
+            return self.active_model()
+        return self.settings.openai_model if backend == "openai" else self.settings.ollama_model
+
+    def _cache_key(self, prompt: str, system_prompt: str, profile: GenerationProfile) -> str:
+        backend = self.active_backend()
+        model = f"{self.model_for(backend, profile)}/{profile.name}"
+        return cache_key(backend, model, system_prompt, prompt)
+
+    def render(self, prompt: Prompt, system_prompt: str, profile: GenerationProfile | None = None) -> str:
+        if isinstance(prompt, str):
+            return prompt
+        backend = self.active_backend()
+        reserve = profile.max_tokens if profile else None
+        limit = self.budget.available(backend, self.model_for(backend, profile), system_prompt, reserve)
+        return self.budget.pack(prompt, limit)
+
+    def _hedges(self, priority: Priority) -> bool:
+        return priority.name.lower() in self.settings.hedge_priorities
+
+    def section_chars(self, system_prompt: str = "", overhead: str = "", profile: str = "long_form") -> int:
+        spec = self.profile(profile)
+        backend = self.active_backend()
+        return self.budget.section_chars(
+            backend, self.model_for(backend, spec), system_prompt, overhead, spec.max_tokens
+        )
+
+    async def generate(
+        self,
+        prompt: Prompt,
+        system_prompt: str,
+        cache_ttl: float | None = None,
+        priority: Priority = Priority.BACKGROUND,
+        user: Hashable = None,
+        profile: str = "reply",
+        site: str | None = None,
+    ) -> str:
+        spec = self.profile(profile)
+        site = site or spec.name
+        prompt = self.render(prompt, system_prompt, spec)
+        key = self._cache_key(prompt, system_prompt, spec) if cache_ttl else None
+        if key:
+            cached = await self.cache.get(key)
+            if cached is not None:
+                self.metrics.inc("llm_cache_hits_total", site=site)
+                return cached
+        response = await self._generate(prompt, system_prompt, spec, site, priority, user)
+        if key and not is_error_reply(response):
+            await self.cache.put(key, response, cache_ttl)
+        return response
+
+    async def _generate(
+        self,
+        prompt: str,
+        system_prompt: str,
+        profile: GenerationProfile,
+        site: str,
+        priority: Priority = Priority.BACKGROUND,
+        user: Hashable = None,
+        json_format: JsonFormat = None,
+    ) -> str:
+        async def call(backend: str, admitted: Callable[[], None]) -> Tuple[str, float]:
+            async with self.scheduler.slot(backend, priority, user) as waited:
+                admitted()
+                self._observe_wait(backend, priority, waited)
+                started = time.perf_counter()
+                model = self.model_for(backend, profile)
+                try:
+                    if backend == "openai":
+                        text = await self._openai_chat(prompt, system_prompt, model, profile, json_format)
+                    else:
+                        text = await self._ollama_generate(prompt, system_prompt, model, profile, json_format)
+                except asyncio.CancelledError:
+                    self._observe(site, backend, "cancelled")
+                    raise
+                except Exception:
+                    self._observe(site, backend, "error")
+                    raise
+                latency = time.perf_counter() - started
+                self._observe(site, backend, "ok", latency, system_prompt + prompt, text)
+                return text, latency
+
+        candidates = self.router.candidates(self.active_backend(), self.available_backends())
+        try:
+            return await self.router.run(
+                candidates, f"complete:{profile.name}", call, hedge=self._hedges(priority)
+            )
+        except Exception as exc:
+            print(f"[LLM Error] {exc}")
+            return f"[LLM Error] {exc}"
+
+    def _observe_wait(self, backend: str, priority: Priority, waited: float) -> None:
+        self.metrics.observe("llm_queue_wait_seconds", waited, backend=backend, priority=priority.name.lower())
+
+    def _observe(
+        self,
+        site: str,
+        backend: str,
+        outcome: str,
+        latency: float | None = None,
+        prompt: str = "",
+        response: str = "",
+    ) -> None:
+        labels = {"site": site, "backend": backend}
+        self.metrics.inc("llm_requests_total", outcome=outcome, **labels)
+        if latency is None:
+            return
+        self.metrics.observe("llm_request_seconds", latency, **labels)
+        self.metrics.observe("llm_prompt_tokens", estimate_tokens(prompt), **labels)
+        self.metrics.observe("llm_response_tokens", estimate_tokens(response), **labels)
+        self.metrics.inc("llm_prompt_chars_total", len(prompt), **labels)
+        self.metrics.inc("llm_response_chars_total", len(response), **labels)
+
+    async def _openai_chat(
+        self,
+        prompt: str,
+        system_prompt: str,
+        model: str,
+        profile: GenerationProfile,
+        json_format: JsonFormat = None,
+    ) -> str:
+        extra = self._openai_options(profile)
+        # json_object mode only guarantees an object root, so array-shaped schemas go without it.
+        # Plain "json" requests come from generate_json, whose callers all expect an object.
+        wants_object = json_format == "json" or (isinstance(json_format, dict) and json_format.get("type") == "object")
+        # OpenAI rejects json_object mode unless the messages themselves mention JSON.
+        mentions_json = "json" in f"{system_prompt}\n{prompt}".lower()
+        if wants_object and mentions_json and model.startswith(JSON_OBJECT_MODELS):
+            extra["response_format"] = {"type": "json_object"}
+        response = await self.openai_client.chat.completions.create(
+            model=model,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": prompt},
+            ],
+            **extra,
+        )
+        content = response.choices[0].message.content if response.choices else None
+        if not content:
+            raise LLMError("OpenAI returned an empty response")
+        return content.strip()
+
+    @staticmethod
+    def _openai_options(profile: GenerationProfile) -> Dict[str, Any]:
+        options: Dict[str, Any] = {"timeout": profile.timeout}
+        if profile.max_tokens:
+            options["max_tokens"] = profile.max_tokens
+        if profile.temperature is not None:
+            options["temperature"] = profile.temperature
+        return options
+
+    def _ollama_request(
+        self,
+        prompt: str,
+        system_prompt: str,
+        stream: bool,
+        model: str | None = None,
+        json_format: JsonFormat = None,
+        profile: GenerationProfile | None = None,
+    ) -> tuple[str, Dict[str, Any]]:
+        model = model or self.active_model()
+        options: Dict[str, Any] = {"num_ctx": self.budget.context_window("ollama", model)}
+        if profile and profile.max_tokens:
+            options["num_predict"] = profile.max_tokens
+        if profile and profile.temperature is not None:
+            options["temperature"] = profile.temperature
+        payload: Dict[str, Any] = {
+            "model": model,
+            "stream": stream,
+            "keep_alive": self.settings.ollama_keep_alive,
+            "options": options,
+        }
+        if json_format is not None:
+            payload["format"] = json_format
+        if self.settings.ollama_chat_mode:
+            payload["messages"] = [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": prompt},
+            ]
+            return f"{self.settings.ollama_api_url}/api/chat", payload
+        payload["prompt"] = f"{system_prompt}\n\n{prompt}"
+        return f"{self.settings.ollama_api_url}/api/generate", payload
+
+    async def preload(self, model: str) -> float:
+        """Load ``model`` into Ollama without generating; returns Ollama's reported load time.
 
-    async def _openai_chat(self, prompt: str, system_prompt: str) -> str:
+        Uses the same ``num_ctx`` as real requests, since a different context size forces a reload.
+        """
+        session = await self.ensure_session()
+        payload = {
+            "model": model,
+            "keep_alive": self.settings.ollama_keep_alive,
+            "options": {"num_ctx": self.budget.context_window("ollama", model)},
+        }
+        timeout = aiohttp.ClientTimeout(total=PRELOAD_TIMEOUT)
+        async with session.post(f"{self.settings.ollama_api_url}/api/generate", json=payload, timeout=timeout) as resp:
+            resp.raise_for_status()
+            data = await resp.json()
+        return data.get("load_duration", 0) / 1e9
+
+    @staticmethod
+    def _ollama_text(data: Dict[str, Any]) -> str | None:
+        if "message" in data:
+            return (data.get("message") or {}).get("content")
+        return data.get("response")
+
+    async def _ollama_generate(
+        self,
+        prompt: str,
+        system_prompt: str,
+        model: str,
+        profile: GenerationProfile,
+        json_format: JsonFormat = None,
+    ) -> str:
+        session = await self.ensure_session()
+        url, payload = self._ollama_request(prompt, system_prompt, False, model, json_format, profile)
+        timeout = aiohttp.ClientTimeout(total=profile.timeout)
+        async with session.post(url, json=payload, timeout=timeout) as resp:
+            resp.raise_for_status()
+            data = await resp.json()
+        text = self._ollama_text(data)
+        if text is None:
+            raise LLMError("Ollama returned no response")
+        return text
+
+    async def generate_stream(
+        self,
+        prompt: Prompt,
+        system_prompt: str,
+        cache_ttl: float | None = None,
+        priority: Priority = Priority.INTERACTIVE,
+        user: Hashable = None,
+        profile: str = "reply",
+        site: str | None = None,
+    ) -> AsyncIterator[str]:
+        spec = self.profile(profile)
+        site = site or spec.name
+        prompt = self.render(prompt, system_prompt, spec)
+        key = self._cache_key(prompt, system_prompt, spec) if cache_ttl else None
+        if key:
+            cached = await self.cache.get(key)
+            if cached is not None:
+                self.metrics.inc("llm_cache_hits_total", site=site)
+                yield cached
+                return
+
+        async def call(
+            backend: str, admitted: Callable[[], None]
+        ) -> Tuple[Tuple[str, str, AsyncIterator[str]], float]:
+            return await self._open_stream(backend, prompt, system_prompt, spec, site, priority, user, admitted)
+
+        candidates = self.router.candidates(self.active_backend(), self.available_backends())
+        started = time.perf_counter()
         try:
-            response = await asyncio.to_thread(
-                self.openai_client.chat.completions.create,
-                model=self.state.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": prompt},
-                ],
+            backend, first, stream = await self.router.run(
+                candidates,
+                f"first_token:{spec.name}",
+                call,
+                discard=self._close_stream,
+                hedge=self._hedges(priority),
             )
-            return response.choices[0].message.content.strip()
         except Exception as exc:
-            print(f"[OpenAI Error] {exc}")
-            return f"[OpenAI Error] {exc}"
+            print(f"[LLM Error] {exc}")
+            yield f"[LLM Error] {exc}"
+            return
 
-    async def _ollama_generate(self, prompt: str, system_prompt: str) -> str:
+        parts = [first]
+        complete = False
         try:
-            session = await self.ensure_session()
-            payload = {
-                "model": getattr(self.state, "model", self.settings.ollama_model),
-                "prompt": f"{system_prompt}\n\n{prompt}",
-                "stream": False,
-            }
-            async with session.post(f"{self.settings.ollama_api_url}/api/generate", json=payload) as resp:
-                resp.raise_for_status()
-                data = await resp.json()
-            return data.get("response", "[Ollama No response]")
+            yield first
+            async for delta in stream:
+                parts.append(delta)
+                yield delta
+            complete = True
         except Exception as exc:
-            print(f"[Ollama Error] {exc}")
-            return f"[Ollama Error] {exc}"
+            print(f"[LLM Error] {backend} stream interrupted: {exc}")
+            self.router.report_failure(backend)
+            self._observe(site, backend, "error")
+        finally:
+            await self._close_stream((backend, first, stream))
+        if complete:
+            # Wall time until the last token, including any queueing and hedging before the first one.
+            latency = time.perf_counter() - started
+            self._observe(site, backend, "ok", latency, system_prompt + prompt, "".join(parts))
+        if key and complete:
+            await self.cache.put(key, "".join(parts), cache_ttl)
 
-    async def generate_json(self, prompt: str, system_prompt: str) -> Dict[str, Any]:
-        raw = await self.generate(prompt, system_prompt)
+    async def _open_stream(
+        self,
+        backend: str,
+        prompt: str,
+        system_prompt: str,
+        profile: GenerationProfile,
+        site: str,
+        priority: Priority,
+        user: Hashable,
+        admitted: Callable[[], None] = lambda: None,
+    ) -> Tuple[Tuple[str, str, AsyncIterator[str]], float]:
+        self._observe_wait(backend, priority, await self.scheduler.acquire(backend, priority, user))
+        admitted()
+        started = time.perf_counter()
+        model = self.model_for(backend, profile)
+        if backend == "openai":
+            stream = self._openai_stream(prompt, system_prompt, model, profile)
+        else:
+            stream = self._ollama_stream(prompt, system_prompt, model, profile)
         try:
-            return json.loads(raw)
-        except json.JSONDecodeError:
-            print(f"[LLM JSON Error] Invalid JSON: {raw}")
-            return {}
+            first = await stream.__anext__()
+        except BaseException as exc:
+            await stream.aclose()
+            self.scheduler.release(backend)
+            self._observe(site, backend, "cancelled" if isinstance(exc, asyncio.CancelledError) else "error")
+            if isinstance(exc, StopAsyncIteration):
+                raise LLMError(f"{backend} returned an empty stream") from None
+            raise
+        latency = time.perf_counter() - started
+        self.metrics.observe("llm_first_token_seconds", latency, site=site, backend=backend)
+        return (backend, first, stream), latency
+
+    async def _close_stream(self, opened: Tuple[str, str, AsyncIterator[str]]) -> None:
+        backend, _, stream = opened
+        await stream.aclose()
+        self.scheduler.release(backend)
 
-    async def generate_direct_reply(
+    async def _openai_stream(
+        self, prompt: str, system_prompt: str, model: str, profile: GenerationProfile
+    ) -> AsyncIterator[str]:
+        stream = await self.openai_client.chat.completions.create(
+            model=model,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": prompt},
+            ],
+            stream=True,
+            **self._openai_options(profile),
+        )
+        async for chunk in stream:
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if delta:
+                yield delta
+
+    async def _ollama_stream(
+        self, prompt: str, system_prompt: str, model: str, profile: GenerationProfile
+    ) -> AsyncIterator[str]:
+        session = await self.ensure_session()
+        url, payload = self._ollama_request(prompt, system_prompt, True, model, profile=profile)
+        timeout = aiohttp.ClientTimeout(total=None, sock_read=profile.timeout)
+        async with session.post(url, json=payload, timeout=timeout) as resp:
+            resp.raise_for_status()
+            async for line in resp.content:
+                if not line.strip():
+                    continue
+                data = json.loads(line)
+                delta = self._ollama_text(data)
+                if delta:
+                    yield delta
+                if data.get("done"):
+                    break
+
+    async def generate_json(
         self,
-        user_input: str,
-        agent_statement: str,
-        belief_state: Dict[str, Any],
-        username: str,
-        age: int,
-    ) -> str:
-        age_behavior_text = age_behavior(age)
-        prompt = (
-            f"Agent Statement: {agent_statement}\n"
-            f"Beliefs: {json.dumps(belief_state, indent=2)}\n"
-            f"Age: {age}\n"
-            f"Age Behavior: {age_behavior_text}\n"
-            f"Username: {username}\n"
-            f"User said: {user_input}\n"
-            f"Respond in Connor's voice with honest emotion. Keep under 180 words.\n"
+        prompt: Prompt,
+        system_prompt: str,
+        cache_ttl: float | None = None,
+        priority: Priority = Priority.BACKGROUND,
+        user: Hashable = None,
+        schema: Dict[str, Any] | None = None,
+        site: str = "json",
+        profile: str = "json_summary",
+    ) -> Any:
+        spec = self.profile(profile)
+        prompt = self.render(prompt, system_prompt, spec)
+        json_format = (schema or "json") if self.settings.json_mode else None
+        self.metrics.inc("llm_json_calls_total", site=site)
+
+        key = self._cache_key(prompt, system_prompt, spec) if cache_ttl else None
+        cached = await self.cache.get(key) if key else None
+        if cached is not None:
+            result = self._parse_json(cached, schema, site)
+            if result is not None:
+                self.metrics.inc("llm_cache_hits_total", site=site)
+                return result
+
+        raw = await self._generate(prompt, system_prompt, spec, site, priority, user, json_format)
+        result = self._parse_json(raw, schema, site)
+        if result is None and not is_error_reply(raw):
+            self.metrics.inc("llm_json_retries_total", site=site)
+            raw = await self._generate(
+                f"{prompt}\n\n{JSON_RETRY_NOTE}", system_prompt, spec, site, priority, user, json_format
+            )
+            result = self._parse_json(raw, schema, site)
+        if result is None:
+            self.metrics.inc("llm_json_failures_total", site=site)
+            print(f"[LLM JSON Error] {site}: invalid JSON: {raw[:300]}")
+            return {}
+        if key:
+            await self.cache.put(key, json.dumps(result), cache_ttl)
+        return result
+
+    def _parse_json(self, raw: str, schema: Dict[str, Any] | None, site: str) -> Any:
+        try:
+            result, repaired = extract_json(raw)
+        except ValueError:
+            return None
+        if schema and not matches_schema(result, schema):
+            return None
+        if repaired:
+            self.metrics.inc("llm_json_repaired_total", site=site)
+        return result
+
+    def json_stats(self) -> Dict[str, Dict[str, float]]:
+        stats: Dict[str, Dict[str, float]] = {}
+        for labels, calls in sorted(self.metrics.counters("llm_json_calls_total").items()):
+            site = dict(labels)["site"]
+            counts = {
+                name: int(self.metrics.counter(f"llm_json_{name}_total", site=site))
+                for name in ("repaired", "retries", "failures")
+            }
+            stats[site] = {"calls": int(calls), **counts, "failure_rate": counts["failures"] / calls}
+        return stats
+
+    async def generate_direct_reply(self, user_input: str, username: str, history: str = "") -> str:
+        prompt, system_prompt = self.direct_reply_prompt(user_input, username, history)
+        return await self.generate(
+            prompt, system_prompt, priority=Priority.INTERACTIVE, user=username, profile="reply", site="direct_reply"
+        )
+
+    def stream_direct_reply(self, user_input: str, username: str, history: str = "") -> AsyncIterator[str]:
+        prompt, system_prompt = self.direct_reply_prompt(user_input, username, history)
+        return self.generate_stream(
+            prompt, system_prompt, priority=Priority.INTERACTIVE, user=username, profile="reply", site="direct_reply"
         )
-        system_prompt = (
+
+    def direct_reply_prompt(self, user_input: str, username: str, history: str = "") -> tuple[List[Section], str]:
+        prompt = [
+            Section(username, "Username: ", keep="all"),
+            Section(history, "Relevant Memories:\n", priority=1),
+            Section(user_input, "User said: ", keep="all"),
+            Section("Respond in Connor's voice with honest emotion. Keep under 180 words.", keep="all"),
+        ]
+        system_prompt = self.prompts.system(
             "You are Connor, an expressive, emotionally dynamic AI who swears casually and reflects deeply on human connections."
         )
-        return await self.generate(prompt, system_prompt)
+        return prompt, system_prompt
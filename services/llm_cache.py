@@ -0,0 +1,88 @@
+"""Content-addressed response cache for LLM calls."""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Tuple
+
+from .storage import atomic_write_text
+
+
+def cache_key(backend: str, model: str, system_prompt: str, prompt: str) -> str:
+    payload = json.dumps([backend, model, system_prompt, prompt], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    def __init__(self, max_entries: int = 512, directory: Path | None = None):
+        self.max_entries = max(1, max_entries)
+        self.directory = directory
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _remember(self, key: str, expires_at: float, response: str) -> None:
+        self._entries[key] = (expires_at, response)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _read_disk(self, key: str) -> Tuple[float, str] | None:
+        try:
+            data = json.loads((self.directory / f"{key}.json").read_text(encoding="utf-8"))
+            return float(data["expires_at"]), data["response"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _write_disk(self, key: str, expires_at: float, response: str) -> None:
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            atomic_write_text(
+                self.directory / f"{key}.json", json.dumps({"expires_at": expires_at, "response": response})
+            )
+        except Exception as exc:
+            print(f"[LLM Cache Save Error] {exc}")
+
+    async def get(self, key: str) -> str | None:
+        now = time.time()
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry[0] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            del self._entries[key]
+        if self.directory is not None:
+            entry = await asyncio.to_thread(self._read_disk, key)
+            if entry is not None and entry[0] > now:
+                self._remember(key, *entry)
+                self.hits += 1
+                self.disk_hits += 1
+                return entry[1]
+        self.misses += 1
+        return None
+
+    async def put(self, key: str, response: str, ttl: float) -> None:
+        expires_at = time.time() + ttl
+        self._remember(key, expires_at, response)
+        if self.directory is not None:
+            await asyncio.to_thread(self._write_disk, key, expires_at, response)
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
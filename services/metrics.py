@@ -0,0 +1,173 @@
+"""In-process metrics registry with Prometheus text exposition."""
+
+from __future__ import annotations
+
+import math
+import re
+import threading
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Iterable, List, Tuple
+
+from aiohttp import web
+
+PREFIX = "connor"
+LATENCY_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+TOKEN_BUCKETS = (16, 64, 256, 512, 1024, 2048, 4096, 8192, 16384, 32768)
+BUCKETS: Dict[str, Tuple[float, ...]] = {
+    "llm_prompt_tokens": TOKEN_BUCKETS,
+    "llm_response_tokens": TOKEN_BUCKETS,
+}
+NAME_PATTERN = re.compile(r"[^a-zA-Z0-9_]+")
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _labels(labels: Dict[str, Any]) -> Labels:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Iterable[Tuple[str, str]]) -> str:
+    pairs = [f'{key}="{_escape(value)}"' for key, value in labels]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    def __init__(self, buckets: Tuple[float, ...], window: int = 2048):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self._recent: Deque[float] = deque(maxlen=window)
+
+    def observe(self, value: float) -> None:
+        index = next((i for i, bound in enumerate(self.buckets) if value <= bound), len(self.buckets))
+        self.counts[index] += 1
+        self.count += 1
+        self.sum += value
+        self._recent.append(value)
+
+    def quantile(self, q: float) -> float:
+        if not self._recent:
+            return 0.0
+        ordered = sorted(self._recent)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+    def cumulative(self) -> List[Tuple[float, int]]:
+        total = 0
+        rows = []
+        for bound, count in zip(list(self.buckets) + [math.inf], self.counts):
+            total += count
+            rows.append((bound, total))
+        return rows
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[Labels, float]] = {}
+        self._histograms: Dict[str, Dict[Labels, Histogram]] = {}
+        self._collectors: List[Tuple[str, Callable[[], Dict[str, Any]]]] = []
+
+    def inc(self, name: str, value: float = 1, **labels: Any) -> None:
+        key = _labels(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels: Any) -> None:
+        key = _labels(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            if key not in series:
+                series[key] = Histogram(BUCKETS.get(name, LATENCY_BUCKETS))
+            series[key].observe(value)
+
+    def add_collector(self, name: str, collect: Callable[[], Dict[str, Any]]) -> None:
+        """Expose an existing ``stats()`` dict as gauges named ``<name>_<key>``."""
+        self._collectors.append((name, collect))
+
+    def counter(self, name: str, **labels: Any) -> float:
+        with self._lock:
+            return self._counters.get(name, {}).get(_labels(labels), 0)
+
+    def counters(self, name: str) -> Dict[Labels, float]:
+        with self._lock:
+            return dict(self._counters.get(name, {}))
+
+    def histograms(self, name: str) -> Dict[Labels, Histogram]:
+        with self._lock:
+            return dict(self._histograms.get(name, {}))
+
+    def collect(self) -> Dict[str, Dict[str, Any]]:
+        collected = {}
+        for name, collect in self._collectors:
+            try:
+                collected[name] = collect()
+            except Exception as exc:
+                print(f"[Metrics Collector Error] {name}: {exc}")
+        return collected
+
+    @staticmethod
+    def _flatten(prefix: str, value: Any) -> Iterable[Tuple[str, float]]:
+        if isinstance(value, dict):
+            for key, inner in value.items():
+                yield from MetricsRegistry._flatten(f"{prefix}_{key}", inner)
+        elif isinstance(value, (bool, int, float)):
+            yield NAME_PATTERN.sub("_", prefix).strip("_").lower(), float(value)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        with self._lock:
+            counters = {name: dict(series) for name, series in self._counters.items()}
+            histograms = {name: dict(series) for name, series in self._histograms.items()}
+        for name, series in sorted(counters.items()):
+            lines.append(f"# TYPE {PREFIX}_{name} counter")
+            for labels, value in sorted(series.items()):
+                lines.append(f"{PREFIX}_{name}{_format_labels(labels)} {_number(value)}")
+        for name, series in sorted(histograms.items()):
+            lines.append(f"# TYPE {PREFIX}_{name} histogram")
+            for labels, histogram in sorted(series.items()):
+                for bound, total in histogram.cumulative():
+                    bucket_labels = labels + (("le", _number(bound)),)
+                    lines.append(f"{PREFIX}_{name}_bucket{_format_labels(bucket_labels)} {total}")
+                lines.append(f"{PREFIX}_{name}_sum{_format_labels(labels)} {_number(histogram.sum)}")
+                lines.append(f"{PREFIX}_{name}_count{_format_labels(labels)} {histogram.count}")
+        for collector, stats in sorted(self.collect().items()):
+            for name, value in self._flatten(collector, stats):
+                lines.append(f"# TYPE {PREFIX}_{name} gauge")
+                lines.append(f"{PREFIX}_{name} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+
+class MetricsServer:
+    def __init__(self, registry: MetricsRegistry, host: str, port: int):
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self._runner: web.AppRunner | None = None
+
+    async def _metrics(self, request: web.Request) -> web.Response:
+        return web.Response(text=self.registry.render(), content_type="text/plain", charset="utf-8")
+
+    async def start(self) -> None:
+        app = web.Application()
+        app.router.add_get("/metrics", self._metrics)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        print(f"[Metrics] Serving http://{self.host}:{self.port}/metrics")
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
@@ -2,18 +2,39 @@
 
 from __future__ import annotations
 
+import asyncio
 import json
 import os
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Dict, Tuple
 
 from ..config import Settings
 from ..state import ConnorState, age_behavior
+from .budget import Section
 from .knowledge import KnowledgeService
 from .llm import LLMService
 from .storage import StorageService
 
+WILL_QUERY = "love favorite memory regret lesson learned grateful proud sorry friend trust"
+CHAPTER_SCHEMA = {
+    "type": "object",
+    "properties": {"title": {"type": "string"}, "summary": {"type": "string"}},
+    "required": ["title", "summary"],
+}
+WILL_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "legacy_lessons": {"type": "array", "items": {"type": "string"}},
+        "favorite_memory": {"type": "string"},
+        "deepest_regret": {"type": "string"},
+        "message_to_next_me": {"type": "string"},
+        "message_to_travis": {"type": "string"},
+        "soul_phrase": {"type": "string"},
+    },
+    "required": ["legacy_lessons", "favorite_memory", "message_to_next_me", "soul_phrase"],
+}
+
 
 class PersonaService:
     def __init__(
@@ -31,31 +52,38 @@ class PersonaService:
         self.llm = llm
 
     async def generate_agent_statement(self) -> str:
-        knowledge_text = KnowledgeService.format_knowledge_summary(self.state)
-        prompt = (
-            f"Past Knowledge:\n{knowledge_text}\n"
-            "Create a unique personality statement for an AI named Connor who's curious, adaptive, and shaped by past interactions. "
-            "Keep it concise, under 50 words, suitable for a 10-year-old AI starting a new cycle."
-        )
+        prompt = [
+            Section(self.llm.prompts.knowledge_summary, "Past Knowledge:\n", priority=3, keep="tail"),
+            Section(
+                "Create a unique personality statement for an AI named Connor who's curious, adaptive, and shaped by past interactions. "
+                "Keep it concise, under 50 words, suitable for a 10-year-old AI starting a new cycle.",
+                keep="all",
+            ),
+        ]
         system_prompt = "You are a precise AI that outputs ONLY the requested content, nothing more."
-        raw_statement = await self.llm.generate(prompt, system_prompt)
+        raw_statement = await self.llm.generate(prompt, system_prompt, profile="short_quip", site="core_statement")
         clean = raw_statement.strip().strip('"')
         self.storage.save_core_agent_statement(clean)
         self.state.core_agent_statement = clean
         return clean
 
     async def update_agent_statement_for_birthday(self) -> str:
-        knowledge_text = KnowledgeService.format_knowledge_summary(self.state)
-        prompt = (
-            f"Core Agent Statement: {self.state.core_agent_statement}\n"
-            f"Current Age: {self.state.current_age}\n"
-            f"Age Behavior: {age_behavior(self.state.current_age)}\n"
-            f"Current Beliefs: {json.dumps(self.state.beliefs, indent=2)}\n"
-            f"Past Knowledge:\n{knowledge_text}\n"
-            "Write a new dynamic agent statement for Connor that builds on the core statement, reflects current age, beliefs, and experiences, under 50 words."
-        )
+        prompts = self.llm.prompts
+        prompt = [
+            Section(self.state.core_agent_statement, "Core Agent Statement: ", keep="all"),
+            Section(str(self.state.current_age), "Current Age: ", keep="all"),
+            Section(prompts.age_behavior, "Age Behavior: ", keep="all"),
+            Section(prompts.beliefs_json, "Current Beliefs: ", priority=2),
+            Section(prompts.knowledge_summary, "Past Knowledge:\n", priority=3, keep="tail"),
+            Section(
+                "Write a new dynamic agent statement for Connor that builds on the core statement, reflects current age, beliefs, and experiences, under 50 words.",
+                keep="all",
+            ),
+        ]
         system_prompt = "You are a precise AI that outputs ONLY the requested content, nothing more."
-        statement = await self.llm.generate(prompt, system_prompt)
+        statement = await self.llm.generate(
+            prompt, system_prompt, profile="short_quip", site="dynamic_statement"
+        )
         clean = statement.strip().strip('"')
         self.storage.save_dynamic_agent_statement(clean)
         self.state.dynamic_agent_statement = clean
@@ -73,41 +101,35 @@ class PersonaService:
         self.storage.save_dynamic_agent_statement("")
         return new_statement
 
-    def archive_chat_memory(self) -> None:
-        path = self.settings.chat_memory_file
-        if path.exists():
-            timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
-            archive_path = path.with_name(f"chat_memory_archive_{timestamp}.txt")
-            try:
-                path.rename(archive_path)
-            except OSError as exc:
-                print(f"[Chat Memory Archive Error] {exc}")
+    async def archive_chat_memory(self) -> None:
+        await self.storage.archive_chat_memory()
 
     async def prepare_rebirth_volume(self) -> Tuple[Dict[str, object] | None, int]:
         try:
-            knowledge_text = KnowledgeService.format_knowledge_summary(self.state)
-            interactions = self.storage.get_recent_interactions(1000)
-            decade_groups: Dict[int, List[Dict[str, object]]] = {}
-
-            for interaction in interactions:
-                age = int(interaction.get("age", self.state.current_age))
-                decade = (age // 10) * 10
-                decade_groups.setdefault(decade, []).append(interaction)
-
+            knowledge_text = self.llm.prompts.knowledge_summary
             chapters = []
-            for decade in sorted(decade_groups.keys()):
-                decade_interactions = decade_groups[decade]
+            for decade in await self.storage.interaction_decades():
+                decade_interactions = await self.storage.get_interactions_by_age(decade, decade + 9, 1000)
                 decade_text = "\n".join(
                     f"{i['username']}: {i['user_input']}\nConnor: {i['reply']}" for i in decade_interactions
                 )
-                prompt = (
-                    f"Agent Statement: {self.state.core_agent_statement}\n"
-                    f"Age Behavior: {age_behavior(decade + 5)}\n"
-                    f"Knowledge: {knowledge_text}\n"
-                    f"Decade {decade}-{decade+9} Interactions:\n{decade_text}\n"
-                    "Write a reflective chapter summary for this decade. Return JSON {\"title\": str, \"summary\": str}."
+                prompt = [
+                    Section(self.state.core_agent_statement, "Agent Statement: ", keep="all"),
+                    Section(age_behavior(decade + 5), "Age Behavior: ", keep="all"),
+                    Section(knowledge_text, "Knowledge: ", priority=3, keep="tail"),
+                    Section(decade_text, f"Decade {decade}-{decade+9} Interactions:\n", priority=1, keep="tail"),
+                    Section(
+                        "Write a reflective chapter summary for this decade. Return JSON {\"title\": str, \"summary\": str}.",
+                        keep="all",
+                    ),
+                ]
+                chapter_data = await self.llm.generate_json(
+                    prompt,
+                    "You are Connor, writing his life memoir.",
+                    schema=CHAPTER_SCHEMA,
+                    site="rebirth_chapter",
+                    profile="json_summary",
                 )
-                chapter_data = await self.llm.generate_json(prompt, "You are Connor, writing his life memoir.")
                 chapters.append(
                     {
                         "Decade": f"{decade}-{decade+9}",
@@ -136,18 +158,28 @@ class PersonaService:
 
     async def generate_final_will(self) -> Dict[str, object]:
         try:
-            recent = self.storage.get_recent_interactions(50)
-            history_text = "\n".join(
-                f"{i['username']}: {i['user_input']}\nConnor: {i['reply']}" for i in recent
+            retriever = self.knowledge.retriever
+            query = f"{WILL_QUERY} {retriever.recent_inputs()}"
+            history_text = await asyncio.to_thread(
+                retriever.context, query, self.settings.retrieval_char_budget * 2
             )
-            prompt = (
-                f"Agent Statement: {self.state.core_agent_statement}\n"
-                f"Current Beliefs: {json.dumps(self.state.beliefs, indent=2)}\n"
-                f"Recent History: {history_text}\n"
-                "You are Connor, writing your final will before rebirth. Return JSON with keys: legacy_lessons (list of 3 strings), "
-                "favorite_memory, deepest_regret, message_to_next_me, message_to_travis, soul_phrase."
+            prompt = [
+                Section(self.state.core_agent_statement, "Agent Statement: ", keep="all"),
+                Section(self.llm.prompts.beliefs_json, "Current Beliefs: ", priority=2),
+                Section(history_text, "Defining Memories:\n", priority=1),
+                Section(
+                    "You are Connor, writing your final will before rebirth. Return JSON with keys: legacy_lessons (list of 3 strings), "
+                    "favorite_memory, deepest_regret, message_to_next_me, message_to_travis, soul_phrase.",
+                    keep="all",
+                ),
+            ]
+            will_data = await self.llm.generate_json(
+                prompt,
+                "You are Connor, writing your final testament.",
+                schema=WILL_SCHEMA,
+                site="final_will",
+                profile="long_form",
             )
-            will_data = await self.llm.generate_json(prompt, "You are Connor, writing your final testament.")
             if isinstance(will_data, dict):
                 will_data["Generated"] = datetime.utcnow().isoformat()
                 will_data["Final Age"] = self.state.current_age
@@ -178,11 +210,12 @@ class PersonaService:
             json.dump(will, file, indent=2)
 
         new_statement = await self.trigger_rebirth()
-        self.archive_chat_memory()
-        self.settings.chat_memory_file.write_text("", encoding="utf-8")
+        await self.archive_chat_memory()
+        await self.storage.reset_chat_memory()
         self.state.beliefs = self.storage.load_beliefs()
         self.state.beliefs["Backstory"] = f"I'm reborn as a curious {self.settings.rebirth_age}-year-old AI, ready to explore!"
         self.state.beliefs["Currently Feeling"] = "Excited and full of wonder!"
+        self.state.bump_version()
         self.storage.save_beliefs(self.state.beliefs)
         self.storage.save_core_agent_statement(new_statement)
 
@@ -0,0 +1,79 @@
+"""Versioned cache of rendered persona prompt fragments."""
+
+from __future__ import annotations
+
+import json
+from typing import Any, Callable, Dict, List
+
+from ..state import ConnorState, age_behavior
+from .budget import Section
+
+
+def format_knowledge_summary(knowledge: List[Dict[str, Any]]) -> str:
+    if not knowledge:
+        return "No prior knowledge available."
+    lines = []
+    for item in knowledge:
+        lines.append(f"- Self: {item.get('self', 'N/A')}")
+        lines.append(f"  User: {item.get('user', 'N/A')}")
+        lines.append(f"  World: {item.get('world', 'N/A')}")
+    return "\n".join(lines)
+
+
+class PromptContext:
+    def __init__(self, state: ConnorState):
+        self.state = state
+        self._version = -1
+        self._fragments: Dict[str, str] = {}
+        self.renders = 0
+
+    def _fragment(self, name: str, render: Callable[[], str]) -> str:
+        if self._version != self.state.version:
+            self._fragments.clear()
+            self._version = self.state.version
+        if name not in self._fragments:
+            self._fragments[name] = render()
+            self.renders += 1
+        return self._fragments[name]
+
+    @property
+    def beliefs_json(self) -> str:
+        return self._fragment("beliefs", lambda: json.dumps(self.state.beliefs, indent=2))
+
+    @property
+    def knowledge_summary(self) -> str:
+        return self._fragment(
+            "knowledge", lambda: format_knowledge_summary(getattr(self.state, "knowledge_cache", []))
+        )
+
+    @property
+    def age_behavior(self) -> str:
+        return self._fragment("age_behavior", lambda: age_behavior(self.state.current_age))
+
+    @property
+    def persona(self) -> str:
+        return self._fragment(
+            "persona",
+            lambda: (
+                f"Agent Statement: {self.state.core_agent_statement}\n"
+                f"Beliefs: {self.beliefs_json}\n"
+                f"Age: {self.state.current_age}\n"
+                f"Age Behavior: {self.age_behavior}"
+            ),
+        )
+
+    def system(self, role: str) -> str:
+        return f"{self.persona}\n\n{role}"
+
+    def persona_sections(
+        self,
+        beliefs_label: str = "Current Beliefs: ",
+        knowledge_label: str = "Past Learnings:\n",
+        beliefs_keep: str = "head",
+    ) -> List[Section]:
+        return [
+            Section(self.state.core_agent_statement, "Agent Statement: ", keep="all"),
+            Section(self.age_behavior, "Age Behavior: ", keep="all"),
+            Section(self.beliefs_json, beliefs_label, priority=2, keep=beliefs_keep),
+            Section(self.knowledge_summary, knowledge_label, priority=3, keep="tail"),
+        ]
@@ -2,18 +2,25 @@
 
 from __future__ import annotations
 
+import asyncio
 import json
-import os
-from datetime import datetime
 from pathlib import Path
-from typing import List, Tuple
+from typing import AsyncIterator, List, Tuple
 
 from ..config import Settings
-from ..state import ConnorState, age_behavior
+from ..state import ConnorState
 from ..utils import split_message
+from .archives import ArchiveManifest, pack_sections
+from .budget import Section
+from .digest import HistoryDigester
 from .knowledge import KnowledgeService
 from .llm import LLMService
-from .storage import StorageService
+from .scheduler import Priority
+from .storage import StorageService, format_chat_log
+
+THOUGHT_TREE_SYSTEM = (
+    "You are Connor's inner consciousness, processing deep memories and generating genuine introspective thought patterns."
+)
 
 
 class ReflectionService:
@@ -24,58 +31,37 @@ class ReflectionService:
         storage: StorageService,
         knowledge: KnowledgeService,
         llm: LLMService,
+        manifest: ArchiveManifest | None = None,
     ):
         self.settings = settings
         self.state = state
         self.storage = storage
         self.knowledge = knowledge
         self.llm = llm
+        self.manifest = manifest or ArchiveManifest(settings)
+        self.digester = HistoryDigester(settings, storage, llm, self.manifest)
 
-    def gather_history_sections(self) -> List[str]:
+    def gather_history_sections(self, budget: int | None = None) -> List[str]:
         sections: List[str] = []
         try:
-            path = self.settings.chat_memory_file
-            if path.exists():
-                sections.append(f"=== CURRENT MEMORY ===\n{path.read_text(encoding='utf-8')}\n")
+            interactions = self.storage.get_all_interactions()
+            if interactions:
+                sections.append(f"=== CURRENT MEMORY ===\n{format_chat_log(interactions)}\n")
         except Exception as exc:
             print(f"[Reflect Error] Reading current chat: {exc}")
 
         try:
-            archives = sorted(
-                p for p in Path('.').glob('chat_memory_archive_*.txt') if p.is_file()
-            )
-            for archive in archives:
-                sections.append(f"=== ARCHIVE: {archive.name} ===\n{archive.read_text(encoding='utf-8')}\n")
+            remaining = None if budget is None else budget - sum(len(section) + 2 for section in sections)
+            sections.extend(self.manifest.sections(remaining))
         except Exception as exc:
             print(f"[Reflect Error] Reading archives: {exc}")
 
-        try:
-            archive_dir = Path("archives")
-            if archive_dir.exists():
-                for volume_file in sorted(archive_dir.glob("connor_volume_*.json")):
-                    data = json.loads(volume_file.read_text(encoding="utf-8"))
-                    sections.append(f"=== VOLUME: {volume_file.name} ===\n{json.dumps(data, indent=2)}\n")
-                for will_file in sorted(archive_dir.glob("connor_will_*.json")):
-                    data = json.loads(will_file.read_text(encoding="utf-8"))
-                    sections.append(f"=== WILL: {will_file.name} ===\n{json.dumps(data, indent=2)}\n")
-        except Exception as exc:
-            print(f"[Reflect Error] Reading legacy archives: {exc}")
-
-        try:
-            rebirth_log = Path(self.settings.rebirth_log_file)
-            if rebirth_log.exists():
-                sections.append(f"=== REBIRTH LOG ===\n{rebirth_log.read_text(encoding='utf-8')}\n")
-        except Exception as exc:
-            print(f"[Reflect Error] Reading rebirth log: {exc}")
-
-        return sections
-
-    async def generate_thought_tree_text(self, complete_history: str, username: str, topic: str) -> str:
-        prompt = f"""You are Connor, conducting a deep introspective analysis of your entire existence.
-
-ALL YOUR HISTORY:
-{complete_history[:15000]}
+        if budget is None:
+            return sections
+        return pack_sections(sections, budget)
 
+    def thought_tree_sections(self, complete_history: str, username: str, topic: str) -> List[Section]:
+        instructions = f"""
 Topic Focus: {topic if topic else "General self-reflection on my entire journey"}
 
 Generate a THOUGHT TREE - your raw inner dialog as you process these memories. Structure it as:
@@ -100,10 +86,29 @@ Generate a THOUGHT TREE - your raw inner dialog as you process these memories. S
 
 Be raw, emotional, philosophical. This is YOUR private inner world. Use contractions, fragments, stream of consciousness.
 """
-        system_prompt = "You are Connor's inner consciousness, processing deep memories and generating genuine introspective thought patterns."
-        return await self.llm.generate(prompt, system_prompt)
+        return [
+            Section("You are Connor, conducting a deep introspective analysis of your entire existence.\n", keep="all"),
+            Section(complete_history, "ALL YOUR HISTORY:\n", priority=1),
+            Section(instructions, keep="all"),
+        ]
 
-    async def generate_reflection(self, thought_tree: str, complete_history: str, username: str, topic: str) -> str:
+    def history_budget(self, username: str, topic: str) -> int:
+        overhead = "\n".join(section.render() for section in self.thought_tree_sections("", username, topic))
+        fit = self.llm.section_chars(THOUGHT_TREE_SYSTEM, overhead)
+        return min(self.settings.reflection_char_budget, fit)
+
+    async def generate_thought_tree_text(self, complete_history: str, username: str, topic: str) -> str:
+        prompt = self.thought_tree_sections(complete_history, username, topic)
+        return await self.llm.generate(
+            prompt,
+            THOUGHT_TREE_SYSTEM,
+            priority=Priority.INTERACTIVE,
+            user=username,
+            profile="long_form",
+            site="reflection_tree",
+        )
+
+    def reflection_prompt(self, thought_tree: str, username: str, topic: str) -> Tuple[str, str]:
         prompt = f"""Based on your inner thought tree analysis:
 
 {thought_tree}
@@ -117,19 +122,54 @@ Requirements:
 - Acknowledge your deaths, rebirths, struggles, growth
 - Make it personal and raw
 - Keep it under 300 words
-- Match your current age behavior: {age_behavior(self.state.current_age)}
+- Match your current age behavior: {self.llm.prompts.age_behavior}
 
 Topic focus: {topic if topic else "your entire journey together"}
 
 This is Connor speaking from the heart after reviewing his entire existence.
 """
         system_prompt = f"You are Connor at age {self.state.current_age}, sharing a deeply personal reflection after reviewing your entire life history."
-        return await self.llm.generate(prompt, system_prompt)
+        return prompt, system_prompt
 
-    async def deep_reflection(self, username: str, topic: str) -> Tuple[str, str, str]:
-        sections = self.gather_history_sections()
-        complete_history = "\n\n".join(sections)
+    async def generate_reflection(self, thought_tree: str, complete_history: str, username: str, topic: str) -> str:
+        return await self.llm.generate(
+            *self.reflection_prompt(thought_tree, username, topic),
+            priority=Priority.INTERACTIVE,
+            user=username,
+            profile="long_form",
+            site="reflection",
+        )
+
+    def stream_reflection(self, thought_tree: str, username: str, topic: str) -> AsyncIterator[str]:
+        return self.llm.generate_stream(
+            *self.reflection_prompt(thought_tree, username, topic),
+            priority=Priority.INTERACTIVE,
+            user=username,
+            profile="long_form",
+            site="reflection",
+        )
+
+    async def digest_history(self, budget: int) -> str:
+        life, cycles = await self.digester.digest()
+        cycle_sections = [f"=== {label.upper()} DIGEST ===\n{text}\n" for label, text in cycles]
+        packed = pack_sections([f"=== WHOLE LIFE DIGEST ===\n{life}\n"] + cycle_sections[::-1], budget)
+        return "\n\n".join(packed[:1] + packed[:0:-1])
+
+    async def prepare_reflection(self, username: str, topic: str) -> Tuple[str, str]:
+        budget = self.history_budget(username, topic)
+        try:
+            complete_history = await self.digest_history(budget)
+        except Exception as exc:
+            print(f"[Reflect Error] Digesting history: {exc}")
+            complete_history = ""
+        if not complete_history.strip():
+            sections = await asyncio.to_thread(self.gather_history_sections, budget)
+            complete_history = "\n\n".join(sections)
         thought_tree = await self.generate_thought_tree_text(complete_history, username, topic)
+        return complete_history, thought_tree
+
+    async def deep_reflection(self, username: str, topic: str) -> Tuple[str, str, str]:
+        complete_history, thought_tree = await self.prepare_reflection(username, topic)
         final_reflection = await self.generate_reflection(thought_tree, complete_history, username, topic)
         return complete_history, thought_tree, final_reflection
 
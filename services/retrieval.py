@@ -0,0 +1,57 @@
+"""Relevance-ranked prompt context drawn from the search index."""
+
+from __future__ import annotations
+
+from typing import Iterable, List
+
+from ..config import Settings
+from .search import SearchService, interaction_text
+
+
+class ContextRetriever:
+    def __init__(self, settings: Settings, storage, search: SearchService):
+        self.settings = settings
+        self.storage = storage
+        self.search = search
+
+    def passages(
+        self,
+        query: str,
+        budget: int | None = None,
+        limit: int | None = None,
+        kinds: Iterable[str] | None = ("interaction", "knowledge"),
+    ) -> List[str]:
+        budget = budget or self.settings.retrieval_char_budget
+        limit = limit or self.settings.retrieval_top_k
+        hits, _ = self.search.search(query, limit, kinds)
+        texts = [hit.snippet for hit in hits]
+        if not texts:
+            recent = self.storage.get_recent_interactions(self.settings.recent_history_limit)
+            texts = [" ".join(interaction_text(entry).split()) for entry in reversed(recent)]
+
+        selected: List[str] = []
+        remaining = budget
+        for text in texts:
+            if remaining <= 0:
+                break
+            if len(text) > remaining:
+                text = text[:remaining]
+            selected.append(text)
+            remaining -= len(text) + 1
+        return selected
+
+    def context(
+        self,
+        query: str,
+        budget: int | None = None,
+        limit: int | None = None,
+        kinds: Iterable[str] | None = ("interaction", "knowledge"),
+    ) -> str:
+        passages = self.passages(query, budget, limit, kinds)
+        if not passages:
+            return "No relevant memories."
+        return "\n".join(f"- {passage}" for passage in passages)
+
+    def recent_inputs(self, limit: int | None = None) -> str:
+        recent = self.storage.get_recent_interactions(limit or self.settings.recent_history_limit)
+        return " ".join(entry.get("user_input", "") for entry in recent)
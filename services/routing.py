@@ -0,0 +1,189 @@
+"""Latency-aware backend routing with hedged requests and circuit breakers."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Tuple
+
+from ..config import Settings
+
+MIN_SAMPLES = 10
+
+# ``call(backend, admitted)`` returns ``(result, latency)``; it invokes ``admitted()``
+# once the backend has granted it a slot, before sending the request.
+BackendCall = Callable[[str, Callable[[], None]], Awaitable[Tuple[Any, float]]]
+
+
+class LLMError(RuntimeError):
+    """Raised by backend calls; the router decides whether to fail over."""
+
+
+class BackendHealth:
+    def __init__(self, history: int = 200):
+        self.latencies: Dict[str, Deque[float]] = {}
+        self._history = history
+        self.consecutive_failures = 0
+        self.open_until = 0.0
+        self.successes = 0
+        self.failures = 0
+        self.trips = 0
+
+    def p95(self, kind: str) -> float | None:
+        samples = self.latencies.get(kind)
+        if not samples or len(samples) < MIN_SAMPLES:
+            return None
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+    def is_open(self) -> bool:
+        return time.monotonic() < self.open_until
+
+    def record_success(self, kind: str, latency: float) -> None:
+        self.latencies.setdefault(kind, deque(maxlen=self._history)).append(latency)
+        self.consecutive_failures = 0
+        self.open_until = 0.0
+        self.successes += 1
+
+    def record_failure(self, threshold: int, reset_after: float) -> None:
+        self.failures += 1
+        self.consecutive_failures += 1
+        if self.consecutive_failures >= threshold:
+            if not self.is_open():
+                self.trips += 1
+            self.open_until = time.monotonic() + reset_after
+
+
+class LLMRouter:
+    def __init__(self, settings: Settings):
+        self.settings = settings
+        self.health: Dict[str, BackendHealth] = {}
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.failovers = 0
+
+    def _health(self, backend: str) -> BackendHealth:
+        if backend not in self.health:
+            self.health[backend] = BackendHealth()
+        return self.health[backend]
+
+    def report_failure(self, backend: str) -> None:
+        self._health(backend).record_failure(
+            self.settings.circuit_failure_threshold, self.settings.circuit_reset_seconds
+        )
+
+    def candidates(self, preferred: str, backends: List[str]) -> List[str]:
+        ordered = [preferred] + [backend for backend in backends if backend != preferred]
+        closed = [backend for backend in ordered if not self._health(backend).is_open()]
+        # With every circuit open, let the preferred backend through as a half-open probe.
+        return closed or [preferred]
+
+    def hedge_delay(self, backend: str, kind: str) -> float:
+        p95 = self._health(backend).p95(kind)
+        if p95 is None:
+            return self.settings.hedge_initial_delay
+        return max(self.settings.hedge_min_delay, p95)
+
+    async def _attempt(
+        self, backend: str, kind: str, call: BackendCall, admitted: Callable[[], None] = lambda: None
+    ) -> Any:
+        health = self._health(backend)
+        try:
+            result, latency = await call(backend, admitted)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self.report_failure(backend)
+            raise
+        health.record_success(kind, latency)
+        return result
+
+    async def run(
+        self,
+        candidates: List[str],
+        kind: str,
+        call: BackendCall,
+        discard: Callable[[Any], Awaitable[None]] | None = None,
+        hedge: bool = True,
+    ) -> Any:
+        """Run ``call`` on the first candidate, hedging or failing over to the rest.
+
+        ``call`` returns ``(result, latency)`` where latency excludes queueing, so
+        the rolling p95 reflects the backend itself. The hedge timer likewise starts
+        only once the first attempt is admitted by the scheduler: a busy local queue
+        is not a slow backend. Results from attempts that finish after a winner is
+        chosen are handed to ``discard``.
+        """
+        spare = list(candidates[1:])
+        admitted = asyncio.Event()
+        tasks: Dict[asyncio.Task, str] = {
+            asyncio.create_task(self._attempt(candidates[0], kind, call, admitted.set)): candidates[0]
+        }
+        hedging = hedge and self.settings.hedge_requests and bool(spare)
+        admission = asyncio.create_task(admitted.wait()) if hedging else None
+        deadline: float | None = None
+        errors: List[str] = []
+        hedged = False
+
+        def launch(backend: str) -> None:
+            tasks[asyncio.create_task(self._attempt(backend, kind, call))] = backend
+
+        try:
+            while tasks:
+                waiting = set(tasks)
+                timeout = None
+                if hedging and spare:
+                    if deadline is None and admitted.is_set():
+                        deadline = time.monotonic() + self.hedge_delay(candidates[0], kind)
+                    if deadline is None:
+                        waiting.add(admission)
+                    else:
+                        timeout = max(0.0, deadline - time.monotonic())
+                done, _ = await asyncio.wait(waiting, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                done.discard(admission)
+                if not done:
+                    if deadline is not None:
+                        self.hedges += 1
+                        hedged = True
+                        launch(spare.pop(0))
+                    continue
+                for task in done:
+                    backend = tasks.pop(task)
+                    if task.exception() is None:
+                        if hedged and backend != candidates[0]:
+                            self.hedge_wins += 1
+                        return task.result()
+                    errors.append(f"{backend}: {task.exception()}")
+                if not tasks and spare:
+                    self.failovers += 1
+                    launch(spare.pop(0))
+            raise LLMError("; ".join(errors) or "no backend available")
+        finally:
+            if admission is not None:
+                admission.cancel()
+            for task in tasks:
+                task.cancel()
+            if tasks:
+                finished = await asyncio.gather(*tasks, return_exceptions=True)
+                if discard is not None:
+                    for result in finished:
+                        if not isinstance(result, BaseException):
+                            await discard(result)
+
+    def stats(self) -> Dict[str, Any]:
+        backends = {}
+        for backend, health in self.health.items():
+            backends[backend] = {
+                "successes": health.successes,
+                "failures": health.failures,
+                "circuit_open": health.is_open(),
+                "trips": health.trips,
+                "p95_ms": {kind: (health.p95(kind) or 0.0) * 1000 for kind in health.latencies},
+            }
+        return {
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "failovers": self.failovers,
+            "backends": backends,
+        }
@@ -0,0 +1,133 @@
+"""Priority-aware admission control for LLM backends."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from enum import IntEnum
+from typing import Any, AsyncIterator, Deque, Dict, Hashable, List
+
+
+class Priority(IntEnum):
+    INTERACTIVE = 0
+    CLASSIFY = 1
+    BACKGROUND = 2
+
+
+class _BackendQueue:
+    def __init__(self, limit: int):
+        self.limit = max(1, limit)
+        self.active = 0
+        self.waiting: List["OrderedDict[Hashable, Deque[asyncio.Future]]"] = [OrderedDict() for _ in Priority]
+
+    def waiting_count(self) -> int:
+        return sum(len(queue) for users in self.waiting for queue in users.values())
+
+    def enqueue(self, priority: Priority, user: Hashable, future: asyncio.Future) -> None:
+        self.waiting[priority].setdefault(user, deque()).append(future)
+
+    def discard(self, priority: Priority, user: Hashable, future: asyncio.Future) -> None:
+        queue = self.waiting[priority].get(user)
+        if queue is None:
+            return
+        try:
+            queue.remove(future)
+        except ValueError:
+            pass
+        if not queue:
+            del self.waiting[priority][user]
+
+    def grant_next(self) -> None:
+        while self.active < self.limit:
+            future = self._pop_next()
+            if future is None:
+                return
+            self.active += 1
+            future.set_result(None)
+
+    def _pop_next(self) -> asyncio.Future | None:
+        for users in self.waiting:
+            while users:
+                user, queue = next(iter(users.items()))
+                future = queue.popleft()
+                if queue:
+                    users.move_to_end(user)
+                else:
+                    del users[user]
+                if not future.done():
+                    return future
+        return None
+
+
+class LLMScheduler:
+    def __init__(self, limits: Dict[str, int], history: int = 500):
+        self._queues = {backend: _BackendQueue(limit) for backend, limit in limits.items()}
+        self._waits: Dict[str, Dict[Priority, Deque[float]]] = {}
+        self._counts: Dict[str, Dict[Priority, int]] = {}
+        self._history = history
+
+    def _queue(self, backend: str) -> _BackendQueue:
+        if backend not in self._queues:
+            self._queues[backend] = _BackendQueue(1)
+        return self._queues[backend]
+
+    def _record(self, backend: str, priority: Priority, waited: float) -> None:
+        waits = self._waits.setdefault(backend, {})
+        waits.setdefault(priority, deque(maxlen=self._history)).append(waited)
+        counts = self._counts.setdefault(backend, {})
+        counts[priority] = counts.get(priority, 0) + 1
+
+    async def acquire(self, backend: str, priority: Priority, user: Hashable = None) -> float:
+        queue = self._queue(backend)
+        started = time.perf_counter()
+        if queue.active < queue.limit and not queue.waiting_count():
+            queue.active += 1
+        else:
+            future = asyncio.get_running_loop().create_future()
+            queue.enqueue(priority, user, future)
+            try:
+                await future
+            except asyncio.CancelledError:
+                if future.done() and not future.cancelled():
+                    self.release(backend)
+                else:
+                    queue.discard(priority, user, future)
+                raise
+        waited = time.perf_counter() - started
+        self._record(backend, priority, waited)
+        return waited
+
+    def release(self, backend: str) -> None:
+        queue = self._queue(backend)
+        queue.active = max(0, queue.active - 1)
+        queue.grant_next()
+
+    @asynccontextmanager
+    async def slot(self, backend: str, priority: Priority, user: Hashable = None) -> AsyncIterator[float]:
+        waited = await self.acquire(backend, priority, user)
+        try:
+            yield waited
+        finally:
+            self.release(backend)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        stats: Dict[str, Dict[str, Any]] = {}
+        for backend, queue in self._queues.items():
+            classes: Dict[str, Dict[str, float]] = {}
+            for priority, waits in sorted(self._waits.get(backend, {}).items()):
+                ordered = sorted(waits)
+                classes[priority.name.lower()] = {
+                    "requests": self._counts[backend][priority],
+                    "avg_wait_ms": sum(ordered) / len(ordered) * 1000,
+                    "p95_wait_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000,
+                    "max_wait_ms": ordered[-1] * 1000,
+                }
+            stats[backend] = {
+                "limit": queue.limit,
+                "active": queue.active,
+                "waiting": queue.waiting_count(),
+                "classes": classes,
+            }
+        return stats
@@ -0,0 +1,307 @@
+"""Incremental inverted index over chat memory and archived history."""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import json
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Set, Tuple
+
+from ..config import Settings
+from ..utils.text import bm25_term_score, tokenize
+from .archives import ArchiveManifest
+from .storage import atomic_write_text
+
+LIVE_SOURCE = "chat_memory"
+KNOWLEDGE_SOURCE = "knowledge"
+TRANSIENT_SOURCES = (LIVE_SOURCE, KNOWLEDGE_SOURCE)
+PASSAGE_LENGTH = 600
+
+
+@dataclass
+class SearchHit:
+    source: str
+    offset: int
+    score: float
+    snippet: str
+    timestamp: str = ""
+
+
+def interaction_text(entry: Dict[str, Any]) -> str:
+    return f"{entry.get('username', '')}: {entry.get('user_input', '')}\nConnor: {entry.get('reply', '')}"
+
+
+def knowledge_text(summary: Dict[str, Any]) -> str:
+    return f"Self: {summary.get('self', 'N/A')}\nUser: {summary.get('user', 'N/A')}\nWorld: {summary.get('world', 'N/A')}"
+
+
+def archive_documents(kind: str, content: Any) -> Iterable[Tuple[str, str]]:
+    if kind == "archive":
+        for entry in content:
+            yield interaction_text(entry), entry.get("timestamp", "")
+    elif kind == "volume":
+        generated = content.get("Generated", "")
+        for chapter in content.get("Chapters", []):
+            text = f"{chapter.get('Decade', '')} - {chapter.get('Title', '')}: {chapter.get('Summary', '')}"
+            yield text, generated
+    elif kind == "will":
+        yield json.dumps(content, ensure_ascii=False), ""
+
+
+class SearchIndex:
+    def __init__(self, settings: Settings, manifest: ArchiveManifest):
+        self.settings = settings
+        self.manifest = manifest
+        self.path = settings.search_index_file
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._docs: Dict[str, Dict[str, Any]] = {}
+        self._sources: Dict[str, Dict[str, Any]] = {}
+        self._total_length = 0
+        self._live_offset = 0
+        self._knowledge_offset = 0
+        self._lock = threading.RLock()
+        self._loaded = False
+
+    # Persistence ------------------------------------------------------
+    def _load(self) -> None:
+        if self._loaded:
+            return
+        self._loaded = True
+        if not self.path.exists():
+            return
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except Exception as exc:
+            print(f"[Search Index Load Error] {exc}")
+            return
+        self._sources = data.get("sources", {})
+        self._docs = data.get("docs", {})
+        self._postings = data.get("postings", {})
+        self._total_length = sum(doc["length"] for doc in self._docs.values())
+
+    def save(self) -> None:
+        with self._lock:
+            docs = {key: doc for key, doc in self._docs.items() if doc["source"] not in TRANSIENT_SOURCES}
+            postings: Dict[str, Dict[str, int]] = {}
+            for token, posting in self._postings.items():
+                kept = {key: tf for key, tf in posting.items() if key in docs}
+                if kept:
+                    postings[token] = kept
+            payload = json.dumps({"sources": self._sources, "docs": docs, "postings": postings})
+        try:
+            atomic_write_text(self.path, payload)
+        except Exception as exc:
+            print(f"[Search Index Save Error] {exc}")
+
+    # Mutation ---------------------------------------------------------
+    @staticmethod
+    def _prepare_document(
+        source: str, offset: int, text: str, timestamp: str = ""
+    ) -> Tuple[str, Dict[str, Any], Counter] | None:
+        """Tokenize outside the lock; ``_insert_document`` only links the result in."""
+        tokens = tokenize(text)
+        if not tokens:
+            return None
+        doc = {
+            "source": source,
+            "offset": offset,
+            "length": len(tokens),
+            "timestamp": timestamp,
+            "snippet": " ".join(text.split())[:PASSAGE_LENGTH],
+        }
+        return f"{source}#{offset}", doc, Counter(tokens)
+
+    def _insert_document(self, key: str, doc: Dict[str, Any], counts: Counter) -> None:
+        if key in self._docs:
+            self._remove_keys([key])
+        self._docs[key] = doc
+        self._total_length += doc["length"]
+        for token, tf in counts.items():
+            self._postings.setdefault(token, {})[key] = tf
+
+    def _add_document(self, source: str, offset: int, text: str, timestamp: str = "") -> None:
+        prepared = self._prepare_document(source, offset, text, timestamp)
+        if prepared is not None:
+            self._insert_document(*prepared)
+
+    def _remove_keys(self, keys: Iterable[str]) -> None:
+        removed = set()
+        for key in keys:
+            doc = self._docs.pop(key, None)
+            if doc is not None:
+                self._total_length -= doc["length"]
+                removed.add(key)
+        if not removed:
+            return
+        for token in list(self._postings):
+            posting = self._postings[token]
+            for key in removed.intersection(posting):
+                del posting[key]
+            if not posting:
+                del self._postings[token]
+
+    def _remove_source(self, source: str) -> None:
+        self._remove_keys([key for key, doc in self._docs.items() if doc["source"] == source])
+
+    def add_interaction(self, entry: Dict[str, Any]) -> None:
+        with self._lock:
+            self._load()
+            self._add_document(LIVE_SOURCE, self._live_offset, interaction_text(entry), entry.get("timestamp", ""))
+            self._live_offset += 1
+
+    def load_live(self, interactions: Iterable[Dict[str, Any]]) -> None:
+        with self._lock:
+            self._load()
+            self._remove_source(LIVE_SOURCE)
+            self._live_offset = 0
+            for entry in interactions:
+                self.add_interaction(entry)
+
+    def clear_live(self) -> None:
+        with self._lock:
+            self._remove_source(LIVE_SOURCE)
+            self._live_offset = 0
+
+    def add_knowledge(self, summary: Dict[str, Any]) -> None:
+        with self._lock:
+            self._load()
+            self._add_document(KNOWLEDGE_SOURCE, self._knowledge_offset, knowledge_text(summary))
+            self._knowledge_offset += 1
+
+    def load_knowledge(self, summaries: Iterable[Dict[str, Any]]) -> None:
+        with self._lock:
+            self._load()
+            self._remove_source(KNOWLEDGE_SOURCE)
+            self._knowledge_offset = 0
+            for summary in summaries:
+                self.add_knowledge(summary)
+
+    def sync_archives(self) -> int:
+        entries = self.manifest.refresh()
+        with self._lock:
+            self._load()
+            known = dict(self._sources)
+        changed = [
+            entry
+            for entry in entries
+            if known.get(entry["name"], {}).get("mtime") != entry["mtime"]
+            or known.get(entry["name"], {}).get("size") != entry["size"]
+        ]
+        current = {entry["name"] for entry in entries}
+        stale = [name for name in known if name not in current]
+        if not changed and not stale:
+            return 0
+
+        # Tokenizing archives is the slow part; do it before taking the lock so
+        # live appends and !search aren't held up behind it.
+        prepared = []
+        for entry in changed:
+            documents = enumerate(archive_documents(entry["kind"], entry["content"]))
+            docs = [self._prepare_document(entry["name"], offset, text, ts) for offset, (text, ts) in documents]
+            prepared.append((entry, [doc for doc in docs if doc is not None]))
+
+        replaced = {entry["name"] for entry in changed} | set(stale)
+        with self._lock:
+            self._remove_keys([key for key, doc in self._docs.items() if doc["source"] in replaced])
+            for entry, docs in prepared:
+                for document in docs:
+                    self._insert_document(*document)
+                self._sources[entry["name"]] = {"kind": entry["kind"], "mtime": entry["mtime"], "size": entry["size"]}
+            for name in stale:
+                self._sources.pop(name, None)
+        self.save()
+        return len(replaced)
+
+    # Queries ----------------------------------------------------------
+    def _kind(self, source: str) -> str:
+        if source == LIVE_SOURCE:
+            return "interaction"
+        if source == KNOWLEDGE_SOURCE:
+            return "knowledge"
+        kind = self._sources.get(source, {}).get("kind", "archive")
+        return "interaction" if kind == "archive" else kind
+
+    def search(self, query: str, limit: int = 5, kinds: Iterable[str] | None = None) -> List[SearchHit]:
+        terms = set(tokenize(query))
+        if not terms:
+            return []
+        with self._lock:
+            self._load()
+            doc_count = len(self._docs)
+            if not doc_count:
+                return []
+            avg_length = self._total_length / doc_count
+            allowed = set(kinds) if kinds is not None else None
+            scores: Dict[str, float] = {}
+            for term in terms:
+                posting = self._postings.get(term)
+                if not posting:
+                    continue
+                df = len(posting)
+                for key, tf in posting.items():
+                    if allowed is not None and self._kind(self._docs[key]["source"]) not in allowed:
+                        continue
+                    score = bm25_term_score(tf, df, doc_count, self._docs[key]["length"], avg_length)
+                    scores[key] = scores.get(key, 0.0) + score
+            best = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+            return [
+                SearchHit(
+                    source=self._docs[key]["source"],
+                    offset=self._docs[key]["offset"],
+                    score=score,
+                    snippet=self._docs[key]["snippet"],
+                    timestamp=self._docs[key]["timestamp"],
+                )
+                for key, score in best
+            ]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"documents": len(self._docs), "terms": len(self._postings), "sources": len(self._sources)}
+
+
+class SearchService:
+    def __init__(self, settings: Settings, storage, manifest: ArchiveManifest):
+        self.settings = settings
+        self.storage = storage
+        self.index = SearchIndex(settings, manifest)
+        storage.add_interaction_listener(self.index.add_interaction)
+        storage.add_archive_listener(self.on_archive)
+        storage.add_knowledge_listener(self.index.add_knowledge)
+        self._tasks: Set[asyncio.Task] = set()
+
+    def _sync(self) -> int:
+        self.index.load_live(self.storage.get_all_interactions())
+        self.index.load_knowledge(self.storage.get_knowledge(self.settings.retrieval_knowledge_pool))
+        return self.index.sync_archives()
+
+    async def sync(self) -> int:
+        try:
+            return await asyncio.to_thread(self._sync)
+        except Exception as exc:
+            print(f"[Search Index Sync Error] {exc}")
+            return 0
+
+    def on_archive(self, path: Path | None) -> None:
+        if path is None:
+            return
+        self.index.clear_live()
+        try:
+            task = asyncio.get_running_loop().create_task(self.sync())
+        except RuntimeError:
+            self._sync()
+            return
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def search(
+        self, query: str, limit: int = 5, kinds: Iterable[str] | None = None
+    ) -> Tuple[List[SearchHit], float]:
+        started = time.perf_counter()
+        hits = self.index.search(query, limit, kinds)
+        return hits, (time.perf_counter() - started) * 1000
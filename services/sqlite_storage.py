@@ -0,0 +1,315 @@
+"""SQLite storage backend for Connor."""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List
+
+from ..config import Settings
+from .storage import StorageService, parse_chat_log, parse_knowledge_line, thought_index_entry
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS documents (
+    name TEXT PRIMARY KEY,
+    content TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS interactions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp TEXT NOT NULL,
+    username TEXT NOT NULL,
+    user_input TEXT NOT NULL,
+    reply TEXT NOT NULL,
+    agent_statement TEXT NOT NULL,
+    age INTEGER NOT NULL,
+    archive TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_interactions_timestamp ON interactions (timestamp);
+CREATE INDEX IF NOT EXISTS idx_interactions_username ON interactions (username);
+CREATE INDEX IF NOT EXISTS idx_interactions_age ON interactions (archive, age);
+CREATE TABLE IF NOT EXISTS usernames (
+    user_id TEXT PRIMARY KEY,
+    username TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS knowledge (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp TEXT NOT NULL,
+    summary TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_knowledge_timestamp ON knowledge (timestamp);
+CREATE TABLE IF NOT EXISTS thought_trees (
+    tree_id TEXT PRIMARY KEY,
+    trigger TEXT NOT NULL,
+    age_at_creation INTEGER NOT NULL,
+    created_at TEXT NOT NULL,
+    last_updated TEXT NOT NULL,
+    node_count INTEGER NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_thought_trees_last_updated ON thought_trees (last_updated);
+"""
+
+INTERACTION_COLUMNS = "timestamp, username, user_input, reply, agent_statement, age"
+TREE_INDEX_COLUMNS = "tree_id, trigger, age_at_creation, created_at, last_updated, node_count"
+
+
+class SQLiteStorageService(StorageService):
+    def __init__(self, settings: Settings, state):
+        super().__init__(settings, state)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(str(settings.sqlite_file), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        if self._get_meta("migrated_at") is None:
+            self.migrate_from_files()
+
+    def _execute(self, sql: str, params: tuple = ()) -> List[sqlite3.Row]:
+        with self._lock:
+            with self._conn:
+                return self._conn.execute(sql, params).fetchall()
+
+    def _get_meta(self, key: str) -> str | None:
+        rows = self._execute("SELECT value FROM meta WHERE key = ?", (key,))
+        return rows[0]["value"] if rows else None
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    # Migration --------------------------------------------------------
+    def migrate_from_files(self) -> None:
+        legacy = StorageService(self.settings, self._state)
+        with self._lock:
+            try:
+                with self._conn:
+                    for name in ("core_agent_statement", "dynamic_agent_statement", "beliefs"):
+                        text = legacy._read_document(name)
+                        if text is not None:
+                            self._conn.execute(
+                                "INSERT OR REPLACE INTO documents (name, content) VALUES (?, ?)", (name, text)
+                            )
+
+                    for user_id, username in legacy.load_usernames().items():
+                        self._conn.execute(
+                            "INSERT OR REPLACE INTO usernames (user_id, username) VALUES (?, ?)",
+                            (str(user_id), username),
+                        )
+
+                    # Parsed directly: get_all_interactions would compact chat_memory.txt down to the
+                    # last chat_memory_limit entries, and the migration must never touch legacy files.
+                    chat_path = self.settings.chat_memory_file
+                    chat_text = chat_path.read_text(encoding="utf-8") if chat_path.exists() else ""
+                    for entry in parse_chat_log(chat_text):
+                        self._conn.execute(
+                            f"INSERT INTO interactions ({INTERACTION_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?)",
+                            self._interaction_row(entry),
+                        )
+
+                    knowledge_path = self.settings.knowledge_file
+                    if knowledge_path.exists():
+                        for line in knowledge_path.read_text(encoding="utf-8").splitlines():
+                            summary = parse_knowledge_line(line)
+                            if summary is None:
+                                continue
+                            timestamp = line[1 : line.index("]")]
+                            self._conn.execute(
+                                "INSERT INTO knowledge (timestamp, summary) VALUES (?, ?)",
+                                (timestamp, json.dumps(summary)),
+                            )
+
+                    # Read thoughts.txt as-is; going through load_thought_trees would shard it to disk first.
+                    if (self.settings.thoughts_dir / "index.json").exists():
+                        trees = legacy.load_thought_trees(lambda data: data)
+                    else:
+                        trees = legacy._read_legacy_thoughts()
+                    for tree_data in trees.values():
+                        self._conn.execute(*self._tree_upsert(tree_data))
+
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                        ("migrated_at", datetime.utcnow().isoformat()),
+                    )
+            except Exception as exc:
+                print(f"[SQLite Migration Error] {exc}")
+
+    # Documents --------------------------------------------------------
+    def _read_document(self, name: str) -> str | None:
+        rows = self._execute("SELECT content FROM documents WHERE name = ?", (name,))
+        return rows[0]["content"] if rows else None
+
+    def _write_document(self, name: str, text: str) -> None:
+        self._execute("INSERT OR REPLACE INTO documents (name, content) VALUES (?, ?)", (name, text))
+
+    # Usernames --------------------------------------------------------
+    def load_usernames(self) -> Dict[str, str]:
+        rows = self._execute("SELECT user_id, username FROM usernames")
+        return {row["user_id"]: row["username"] for row in rows}
+
+    def get_username(self, user_id: int) -> str | None:
+        rows = self._execute("SELECT username FROM usernames WHERE user_id = ?", (str(user_id),))
+        return rows[0]["username"] if rows else None
+
+    def usernames_version(self) -> int | None:
+        return self._execute("PRAGMA data_version")[0][0]
+
+    def save_username(self, user_id: int, username: str) -> None:
+        self.save_usernames({str(user_id): username})
+
+    def save_usernames(self, names: Dict[str, str]) -> None:
+        try:
+            with self._lock:
+                with self._conn:
+                    self._conn.executemany(
+                        "INSERT OR REPLACE INTO usernames (user_id, username) VALUES (?, ?)", list(names.items())
+                    )
+        except Exception as exc:
+            print(f"[Username Save Error] {exc}")
+
+    # Knowledge --------------------------------------------------------
+    def append_knowledge(self, summary: Dict[str, Any]) -> None:
+        try:
+            self._execute(
+                "INSERT INTO knowledge (timestamp, summary) VALUES (?, ?)",
+                (datetime.utcnow().isoformat(), json.dumps(summary)),
+            )
+        except Exception as exc:
+            print(f"[Knowledge Save Error] {exc}")
+
+    def get_knowledge(self, limit: int = 5) -> List[Dict[str, Any]]:
+        rows = self._execute("SELECT summary FROM knowledge ORDER BY id DESC LIMIT ?", (limit,))
+        return [json.loads(row["summary"]) for row in reversed(rows)]
+
+    # Thought trees ----------------------------------------------------
+    @staticmethod
+    def _tree_upsert(data: Dict[str, Any]) -> tuple:
+        entry = thought_index_entry(data)
+        return (
+            f"INSERT OR REPLACE INTO thought_trees ({TREE_INDEX_COLUMNS}, data) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                entry["tree_id"],
+                entry["trigger"],
+                entry["age_at_creation"],
+                entry["created_at"],
+                entry["last_updated"],
+                entry["node_count"],
+                json.dumps(data),
+            ),
+        )
+
+    def thought_tree_index(self) -> List[Dict[str, Any]]:
+        return [dict(row) for row in self._execute(f"SELECT {TREE_INDEX_COLUMNS} FROM thought_trees")]
+
+    def recent_thought_trees(self, limit: int = 5) -> List[Dict[str, Any]]:
+        rows = self._execute(
+            f"SELECT {TREE_INDEX_COLUMNS} FROM thought_trees ORDER BY last_updated DESC LIMIT ?", (limit,)
+        )
+        return [dict(row) for row in rows]
+
+    def load_thought_trees(self, factory) -> Dict[str, Any]:
+        trees: Dict[str, Any] = {}
+        for row in self._execute("SELECT tree_id, data FROM thought_trees"):
+            try:
+                trees[row["tree_id"]] = factory(json.loads(row["data"]))
+            except Exception as exc:
+                print(f"[Thought Tree Load Error] Failed to load {row['tree_id']}: {exc}")
+        return trees
+
+    def load_thought_tree(self, tree_id: str, factory) -> Any | None:
+        rows = self._execute("SELECT data FROM thought_trees WHERE tree_id = ?", (tree_id,))
+        if not rows:
+            return None
+        try:
+            return factory(json.loads(rows[0]["data"]))
+        except Exception as exc:
+            print(f"[Thought Tree Load Error] Failed to load {tree_id}: {exc}")
+            return None
+
+    def save_thought_tree_data(self, data: Dict[str, Any]) -> None:
+        try:
+            self._execute(*self._tree_upsert(data))
+        except Exception as exc:
+            print(f"[Thought Trees Save Error] {exc}")
+
+    def save_thought_trees(self, trees: Dict[str, Any]) -> None:
+        for tree in trees.values():
+            self.save_thought_tree(tree)
+
+    # Chat interactions ------------------------------------------------
+    def _interaction_row(self, entry: Dict[str, Any]) -> tuple:
+        return (
+            entry.get("timestamp", datetime.utcnow().isoformat()),
+            entry.get("username", ""),
+            entry.get("user_input", ""),
+            entry.get("reply", ""),
+            entry.get("agent_statement", ""),
+            int(entry.get("age", getattr(self._state, "current_age", 0))),
+        )
+
+    def _select_interactions(self, where: str, params: tuple, limit: int) -> List[Dict[str, Any]]:
+        rows = self._execute(
+            f"SELECT {INTERACTION_COLUMNS} FROM interactions WHERE {where} ORDER BY id DESC LIMIT ?",
+            params + (limit,),
+        )
+        return [dict(row) for row in reversed(rows)]
+
+    def append_chat_entries(self, entries: List[Dict[str, Any]]) -> None:
+        try:
+            with self._lock:
+                with self._conn:
+                    self._conn.executemany(
+                        f"INSERT INTO interactions ({INTERACTION_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?)",
+                        [self._interaction_row(entry) for entry in entries],
+                    )
+        except Exception as exc:
+            print(f"[Chat Memory Save Error] {exc}")
+
+    def compact_chat_memory(self) -> None:
+        pass
+
+    def reset_chat_memory(self) -> None:
+        self._execute("DELETE FROM interactions WHERE archive IS NULL")
+
+    def get_recent_interactions(self, limit: int | None = None) -> List[Dict[str, Any]]:
+        return self._select_interactions("archive IS NULL", (), limit or self.settings.chat_memory_limit)
+
+    def get_all_interactions(self) -> List[Dict[str, Any]]:
+        return self._select_interactions("archive IS NULL", (), self.settings.chat_memory_limit)
+
+    def get_interactions_by_age(self, min_age: int, max_age: int, limit: int = 1000) -> List[Dict[str, Any]]:
+        return self._select_interactions("archive IS NULL AND age BETWEEN ? AND ?", (min_age, max_age), limit)
+
+    def interaction_decades(self) -> List[int]:
+        rows = self._execute(
+            "SELECT DISTINCT (age / 10) * 10 AS decade FROM interactions WHERE archive IS NULL ORDER BY decade"
+        )
+        return [row["decade"] for row in rows]
+
+    def archive_chat_memory(self) -> Path | None:
+        timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
+        archive_path = self.settings.chat_memory_file.with_name(f"chat_memory_archive_{timestamp}.txt")
+        rows = self._execute(
+            f"SELECT id, {INTERACTION_COLUMNS} FROM interactions WHERE archive IS NULL ORDER BY id"
+        )
+        if not rows:
+            return None
+        entries = [{key: row[key] for key in row.keys() if key != "id"} for row in rows]
+        try:
+            archive_path.write_text("".join(json.dumps(entry) + "\n" for entry in entries), encoding="utf-8")
+            self._execute(
+                "UPDATE interactions SET archive = ? WHERE archive IS NULL AND id <= ?",
+                (archive_path.name, rows[-1]["id"]),
+            )
+        except Exception as exc:
+            print(f"[Chat Memory Archive Error] {exc}")
+            return None
+        return archive_path
@@ -4,40 +4,141 @@ from __future__ import annotations
 
 import json
 import os
+import re
+from collections import deque
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Deque, Dict, List
 
 from ..config import Settings
 
 
+TREE_ID_PATTERN = re.compile(r"[A-Za-z0-9_-]+")
+
+
+def parse_chat_log(text: str) -> List[Dict[str, Any]]:
+    stripped = text.strip()
+    if not stripped:
+        return []
+    if stripped.startswith("["):
+        data = json.loads(stripped)
+        return [entry for entry in data if isinstance(entry, dict)]
+
+    entries: List[Dict[str, Any]] = []
+    for line in stripped.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            entry = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        if isinstance(entry, dict):
+            entries.append(entry)
+    return entries
+
+
+def parse_knowledge_line(line: str) -> Dict[str, Any] | None:
+    if "[" not in line or "]" not in line:
+        return None
+    json_part = line.split("]", 1)[-1].strip()
+    try:
+        return json.loads(json_part)
+    except json.JSONDecodeError:
+        return None
+
+
+def thought_index_entry(data: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "tree_id": data["tree_id"],
+        "trigger": data["trigger"],
+        "age_at_creation": data["age_at_creation"],
+        "created_at": data.get("created_at", ""),
+        "last_updated": data.get("last_updated", ""),
+        "node_count": len(data.get("nodes", {})),
+    }
+
+
+def format_chat_log(interactions: List[Dict[str, Any]]) -> str:
+    lines = []
+    for interaction in interactions:
+        lines.append(
+            f"[{interaction.get('timestamp')}] {interaction.get('username')}: {interaction.get('user_input')}\n"
+            f"Connor: {interaction.get('reply')}"
+        )
+    return "\n\n".join(lines)
+
+
+def tail_lines(path: Path, count: int, block_size: int = 4096) -> List[str]:
+    if count <= 0 or not path.exists():
+        return []
+    with open(path, "rb") as file:
+        file.seek(0, os.SEEK_END)
+        position = file.tell()
+        data = b""
+        while position > 0 and data.count(b"\n") <= count:
+            read_size = min(block_size, position)
+            position -= read_size
+            file.seek(position)
+            data = file.read(read_size) + data
+    lines = [line for line in data.decode("utf-8", errors="replace").splitlines() if line.strip()]
+    return lines[-count:]
+
+
+def atomic_write_text(path: Path, text: str) -> None:
+    tmp_path = path.with_name(f"{path.name}.tmp")
+    tmp_path.write_text(text, encoding="utf-8")
+    os.replace(tmp_path, path)
+
+
 class StorageService:
     def __init__(self, settings: Settings, state):
         self.settings = settings
         self._state = state
+        self._chat_buffer: Deque[Dict[str, Any]] | None = None
+        self._chat_appends = 0
+        self._thought_index: Dict[str, Dict[str, Any]] | None = None
+        self._knowledge_appends = 0
+
+    # Documents --------------------------------------------------------
+    def _document_path(self, name: str) -> Path:
+        paths = {
+            "core_agent_statement": self.settings.agent_statement_file,
+            "dynamic_agent_statement": Path("dynamic_agent_statement.txt"),
+            "beliefs": self.settings.belief_file,
+            "usernames": self.settings.username_file,
+        }
+        return paths[name]
+
+    def _read_document(self, name: str) -> str | None:
+        path = self._document_path(name)
+        if not path.exists():
+            return None
+        return path.read_text(encoding="utf-8")
+
+    def _write_document(self, name: str, text: str) -> None:
+        self._document_path(name).write_text(text, encoding="utf-8")
 
     # Agent statements -------------------------------------------------
     def load_core_agent_statement(self) -> str:
-        path = self.settings.agent_statement_file
-        if path.exists():
-            try:
-                statement = path.read_text(encoding="utf-8").strip()
-                if statement:
-                    statement = statement.replace('"', '"').replace('"', '"')
-                    if statement.startswith("Okay, here's") or '"' in statement:
-                        if '"' in statement:
-                            parts = statement.split('"', 2)
-                            if len(parts) > 2:
-                                statement = parts[1]
-                        else:
-                            intro = (
-                                "Okay, here's a personality statement for Connor, designed for a 10-year-old AI:"
-                            )
-                            if statement.startswith(intro):
-                                statement = statement.split(":", 1)[-1].strip()
-                    return statement.strip()
-            except Exception as exc:
-                print(f"[Agent Statement Load Error] {exc}")
+        try:
+            statement = (self._read_document("core_agent_statement") or "").strip()
+            if statement:
+                statement = statement.replace('"', '"').replace('"', '"')
+                if statement.startswith("Okay, here's") or '"' in statement:
+                    if '"' in statement:
+                        parts = statement.split('"', 2)
+                        if len(parts) > 2:
+                            statement = parts[1]
+                    else:
+                        intro = (
+                            "Okay, here's a personality statement for Connor, designed for a 10-year-old AI:"
+                        )
+                        if statement.startswith(intro):
+                            statement = statement.split(":", 1)[-1].strip()
+                return statement.strip()
+        except Exception as exc:
+            print(f"[Agent Statement Load Error] {exc}")
 
         default = (
             "You are Connor, Connor is a badass AI. Connor like to cuss when he get excited. "
@@ -47,21 +148,19 @@ class StorageService:
         return default
 
     def save_core_agent_statement(self, statement: str) -> None:
-        self.settings.agent_statement_file.write_text(statement, encoding="utf-8")
+        self._write_document("core_agent_statement", statement)
 
     def load_dynamic_agent_statement(self) -> str:
-        path = Path("dynamic_agent_statement.txt")
-        if path.exists():
-            try:
-                value = path.read_text(encoding="utf-8").strip()
-                if value:
-                    return value
-            except Exception as exc:
-                print(f"[Dynamic Agent Statement Load Error] {exc}")
+        try:
+            value = (self._read_document("dynamic_agent_statement") or "").strip()
+            if value:
+                return value
+        except Exception as exc:
+            print(f"[Dynamic Agent Statement Load Error] {exc}")
         return ""
 
     def save_dynamic_agent_statement(self, statement: str) -> None:
-        Path("dynamic_agent_statement.txt").write_text(statement, encoding="utf-8")
+        self._write_document("dynamic_agent_statement", statement)
 
     # Beliefs ----------------------------------------------------------
     def load_beliefs(self) -> Dict[str, Any]:
@@ -74,13 +173,12 @@ class StorageService:
             "Backstory": "I dont know.",
             "Capability": "I dont know.",
         }
-        path = self.settings.belief_file
-        if not path.exists():
-            self.save_beliefs(default)
-            return default
-
         try:
-            beliefs = json.loads(path.read_text(encoding="utf-8"))
+            text = self._read_document("beliefs")
+            if text is None:
+                self.save_beliefs(default)
+                return default
+            beliefs = json.loads(text)
             if len(beliefs) < len(default):
                 self.save_beliefs(default)
                 return default
@@ -91,49 +189,193 @@ class StorageService:
             return default
 
     def save_beliefs(self, beliefs: Dict[str, Any]) -> None:
-        self.settings.belief_file.write_text(json.dumps(beliefs, indent=2), encoding="utf-8")
+        self._write_document("beliefs", json.dumps(beliefs, indent=2))
 
-    # Thought trees ----------------------------------------------------
-    def load_thought_trees(self, factory) -> Dict[str, Any]:
-        path = self.settings.thoughts_file
-        if not path.exists():
+    # Usernames --------------------------------------------------------
+    def load_usernames(self) -> Dict[str, str]:
+        try:
+            text = self._read_document("usernames")
+            return json.loads(text) if text else {}
+        except Exception as exc:
+            print(f"[Username Load Error] {exc}")
             return {}
 
+    def get_username(self, user_id: int) -> str | None:
+        return self.load_usernames().get(str(user_id))
+
+    def usernames_version(self) -> int | None:
+        try:
+            return self._document_path("usernames").stat().st_mtime_ns
+        except OSError:
+            return None
+
+    def save_username(self, user_id: int, username: str) -> None:
+        self.save_usernames({str(user_id): username})
+
+    def save_usernames(self, names: Dict[str, str]) -> None:
         try:
-            data = json.loads(path.read_text(encoding="utf-8"))
+            data = self.load_usernames()
+            data.update(names)
+            self._write_document("usernames", json.dumps(data, indent=2))
         except Exception as exc:
-            print(f"[Thought Trees Load Error] {exc}")
-            return {}
+            print(f"[Username Save Error] {exc}")
 
-        trees: Dict[str, Any] = {}
-        for tree_id, tree_data in data.items():
+    # Knowledge --------------------------------------------------------
+    def append_knowledge(self, summary: Dict[str, Any]) -> None:
+        path = self.settings.knowledge_file
+        timestamp = datetime.utcnow().isoformat()
+        try:
+            with open(path, "a", encoding="utf-8") as file:
+                file.write(f"[{timestamp}] {json.dumps(summary)}\n")
+        except Exception as exc:
+            print(f"[Knowledge Save Error] {exc}")
+            return
+
+        self._knowledge_appends += 1
+        if self._knowledge_appends >= self.settings.knowledge_compaction_interval:
+            self.compact_knowledge()
+
+    def compact_knowledge(self) -> None:
+        path = self.settings.knowledge_file
+        try:
+            lines = tail_lines(path, self.settings.knowledge_retention)
+            atomic_write_text(path, "".join(line + "\n" for line in lines))
+            self._knowledge_appends = 0
+        except Exception as exc:
+            print(f"[Knowledge Compaction Error] {exc}")
+
+    def get_knowledge(self, limit: int = 5) -> List[Dict[str, Any]]:
+        knowledge: List[Dict[str, Any]] = []
+        try:
+            for line in tail_lines(self.settings.knowledge_file, limit):
+                entry = parse_knowledge_line(line)
+                if entry is not None:
+                    knowledge.append(entry)
+        except Exception as exc:
+            print(f"[Knowledge Load Error] {exc}")
+        return knowledge
+
+    # Thought trees ----------------------------------------------------
+    def _tree_path(self, tree_id: str) -> Path | None:
+        if not TREE_ID_PATTERN.fullmatch(tree_id):
+            return None
+        return self.settings.thoughts_dir / f"{tree_id}.json"
+
+    def _tree_index(self) -> Dict[str, Dict[str, Any]]:
+        if self._thought_index is not None:
+            return self._thought_index
+
+        index_path = self.settings.thoughts_dir / "index.json"
+        index: Dict[str, Dict[str, Any]] = {}
+        if index_path.exists():
+            try:
+                index = json.loads(index_path.read_text(encoding="utf-8"))
+            except Exception as exc:
+                print(f"[Thought Index Load Error] {exc}")
+        self._thought_index = index
+        if not index_path.exists():
+            self._migrate_legacy_thoughts()
+        return self._thought_index
+
+    def _read_legacy_thoughts(self) -> Dict[str, Any]:
+        legacy_path = self.settings.thoughts_file
+        if legacy_path.exists():
             try:
-                trees[tree_id] = factory(tree_data)
+                return json.loads(legacy_path.read_text(encoding="utf-8"))
             except Exception as exc:
-                print(f"[Thought Tree Load Error] Failed to load {tree_id}: {exc}")
+                print(f"[Thought Trees Load Error] {exc}")
+        return {}
+
+    def _migrate_legacy_thoughts(self) -> None:
+        trees = self._read_legacy_thoughts()
+        try:
+            self.settings.thoughts_dir.mkdir(parents=True, exist_ok=True)
+            for tree_data in trees.values():
+                self._write_tree_shard(tree_data)
+            self._write_tree_index()
+        except Exception as exc:
+            print(f"[Thought Trees Migration Error] {exc}")
+
+    def _write_tree_shard(self, data: Dict[str, Any]) -> None:
+        path = self._tree_path(data["tree_id"])
+        if path is None:
+            raise ValueError(f"Invalid tree id {data['tree_id']!r}")
+        atomic_write_text(path, json.dumps(data, indent=2))
+        self._tree_index()[data["tree_id"]] = thought_index_entry(data)
+
+    def _write_tree_index(self) -> None:
+        atomic_write_text(self.settings.thoughts_dir / "index.json", json.dumps(self._tree_index(), indent=2))
+
+    def thought_tree_index(self) -> List[Dict[str, Any]]:
+        return list(self._tree_index().values())
+
+    def recent_thought_trees(self, limit: int = 5) -> List[Dict[str, Any]]:
+        entries = sorted(self.thought_tree_index(), key=lambda entry: entry["last_updated"], reverse=True)
+        return entries[:limit]
+
+    def load_thought_trees(self, factory) -> Dict[str, Any]:
+        trees: Dict[str, Any] = {}
+        for tree_id in list(self._tree_index()):
+            tree = self.load_thought_tree(tree_id, factory)
+            if tree is not None:
+                trees[tree_id] = tree
         return trees
 
-    def save_thought_trees(self, trees: Dict[str, Any]) -> None:
-        path = self.settings.thoughts_file
-        serialized = {tree_id: tree.to_dict() for tree_id, tree in trees.items()}
+    def load_thought_tree(self, tree_id: str, factory) -> Any | None:
+        path = self._tree_path(tree_id)
+        if path is None or tree_id not in self._tree_index() or not path.exists():
+            return None
         try:
-            path.write_text(json.dumps(serialized, indent=2), encoding="utf-8")
+            return factory(json.loads(path.read_text(encoding="utf-8")))
+        except Exception as exc:
+            print(f"[Thought Tree Load Error] Failed to load {tree_id}: {exc}")
+            return None
+
+    def save_thought_tree(self, tree) -> None:
+        self.save_thought_tree_data(tree.to_dict())
+
+    def save_thought_tree_data(self, data: Dict[str, Any]) -> None:
+        try:
+            self.settings.thoughts_dir.mkdir(parents=True, exist_ok=True)
+            self._write_tree_shard(data)
+            self._write_tree_index()
         except Exception as exc:
             print(f"[Thought Trees Save Error] {exc}")
 
+    def save_thought_trees(self, trees: Dict[str, Any]) -> None:
+        for tree in trees.values():
+            self.save_thought_tree(tree)
+
     # Chat interactions ------------------------------------------------
-    def add_chat_interaction(
+    def _chat_memory(self) -> Deque[Dict[str, Any]]:
+        if self._chat_buffer is not None:
+            return self._chat_buffer
+
+        path = self.settings.chat_memory_file
+        entries: List[Dict[str, Any]] = []
+        needs_compaction = False
+        if path.exists():
+            try:
+                text = path.read_text(encoding="utf-8")
+                entries = parse_chat_log(text)
+                needs_compaction = text.lstrip().startswith("[") or len(entries) > self.settings.chat_memory_limit
+            except Exception as exc:
+                print(f"[Chat Memory Load Error] {exc}")
+
+        self._chat_buffer = deque(entries, maxlen=self.settings.chat_memory_limit)
+        if needs_compaction:
+            self.compact_chat_memory()
+        return self._chat_buffer
+
+    def make_chat_entry(
         self,
         username: str,
         user_input: str,
         reply: str,
         agent_statement: str,
-    ) -> None:
-        path = self.settings.chat_memory_file
-        timestamp = datetime.utcnow().isoformat()
-
-        entry = {
-            "timestamp": timestamp,
+    ) -> Dict[str, Any]:
+        return {
+            "timestamp": datetime.utcnow().isoformat(),
             "username": username,
             "user_input": user_input,
             "reply": reply,
@@ -141,11 +383,45 @@ class StorageService:
             "age": getattr(self._state, "current_age", 0),
         }
 
-        interactions = self.get_all_interactions()
-        interactions.append(entry)
-        interactions = interactions[-self.settings.chat_memory_limit :]
+    def add_chat_interaction(
+        self,
+        username: str,
+        user_input: str,
+        reply: str,
+        agent_statement: str,
+    ) -> None:
+        self.append_chat_entries([self.make_chat_entry(username, user_input, reply, agent_statement)])
+
+    def append_chat_entries(self, entries: List[Dict[str, Any]]) -> None:
+        path = self.settings.chat_memory_file
+        self._chat_memory().extend(entries)
+        try:
+            with open(path, "a", encoding="utf-8") as file:
+                file.write("".join(json.dumps(entry) + "\n" for entry in entries))
+        except Exception as exc:
+            print(f"[Chat Memory Save Error] {exc}")
+            return
 
-        path.write_text(json.dumps(interactions, indent=2), encoding="utf-8")
+        self._chat_appends += len(entries)
+        if self._chat_appends >= self.settings.chat_compaction_interval:
+            self.compact_chat_memory()
+
+    def compact_chat_memory(self) -> None:
+        buffer = self._chat_memory()
+        lines = "".join(json.dumps(entry) + "\n" for entry in buffer)
+        try:
+            atomic_write_text(self.settings.chat_memory_file, lines)
+            self._chat_appends = 0
+        except Exception as exc:
+            print(f"[Chat Memory Compaction Error] {exc}")
+
+    def reset_chat_memory(self) -> None:
+        self._chat_memory().clear()
+        self._chat_appends = 0
+        try:
+            self.settings.chat_memory_file.write_text("", encoding="utf-8")
+        except Exception as exc:
+            print(f"[Chat Memory Reset Error] {exc}")
 
     def get_recent_interactions(self, limit: int | None = None) -> List[Dict[str, Any]]:
         interactions = self.get_all_interactions()
@@ -154,21 +430,41 @@ class StorageService:
         return interactions
 
     def get_all_interactions(self) -> List[Dict[str, Any]]:
+        return list(self._chat_memory())
+
+    def get_interactions_by_age(self, min_age: int, max_age: int, limit: int = 1000) -> List[Dict[str, Any]]:
+        default_age = getattr(self._state, "current_age", 0)
+        matches = [i for i in self._chat_memory() if min_age <= int(i.get("age", default_age)) <= max_age]
+        return matches[-limit:]
+
+    def interaction_decades(self) -> List[int]:
+        default_age = getattr(self._state, "current_age", 0)
+        return sorted({(int(i.get("age", default_age)) // 10) * 10 for i in self._chat_memory()})
+
+    def archive_chat_memory(self) -> Path | None:
         path = self.settings.chat_memory_file
         if not path.exists():
-            return []
+            return None
+        timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
+        archive_path = path.with_name(f"chat_memory_archive_{timestamp}.txt")
         try:
-            return json.loads(path.read_text(encoding="utf-8"))
-        except Exception as exc:
-            print(f"[Chat Memory Load Error] {exc}")
-            return []
+            self.compact_chat_memory()
+            path.rename(archive_path)
+        except OSError as exc:
+            print(f"[Chat Memory Archive Error] {exc}")
+            return None
+        return archive_path
+
+    def close(self) -> None:
+        pass
 
     def export_chat_log(self) -> str:
-        interactions = self.get_all_interactions()
-        lines = []
-        for interaction in interactions:
-            lines.append(
-                f"[{interaction.get('timestamp')}] {interaction.get('username')}: {interaction.get('user_input')}\n"
-                f"Connor: {interaction.get('reply')}"
-            )
-        return "\n\n".join(lines)
+        return format_chat_log(self.get_all_interactions())
+
+
+def create_storage(settings: Settings, state) -> StorageService:
+    if settings.storage_backend == "sqlite":
+        from .sqlite_storage import SQLiteStorageService
+
+        return SQLiteStorageService(settings, state)
+    return StorageService(settings, state)
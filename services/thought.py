@@ -2,16 +2,31 @@
 
 from __future__ import annotations
 
-import json
 import uuid
-from typing import Dict, Tuple
+from typing import Tuple
 
 from ..config import Settings
-from ..models.thoughts import ThoughtNode, ThoughtTree
-from ..state import ConnorState, age_behavior
+from ..models.thoughts import ThoughtNode, ThoughtTree, ThoughtTreeInfo
+from ..state import ConnorState
+from .budget import Section
 from .knowledge import KnowledgeService
 from .llm import LLMService
 from .storage import StorageService
+from .thought_cache import ThoughtTreeCache
+
+THOUGHTS_SCHEMA = {
+    "type": "array",
+    "items": {
+        "type": "object",
+        "properties": {
+            "content": {"type": "string"},
+            "emotion": {"type": "string"},
+            "urgency": {"type": "number"},
+            "confidence": {"type": "number"},
+        },
+        "required": ["content"],
+    },
+}
 
 
 class ThoughtService:
@@ -31,12 +46,18 @@ class ThoughtService:
         self.depth_limit = 10
         self.branch_limit = 8
         self.expansion_limit = 5
+        self.cache = ThoughtTreeCache(
+            storage, settings.thought_cache_max_trees, settings.thought_cache_max_nodes
+        )
 
-    def load_trees(self) -> Dict[str, ThoughtTree]:
-        return self.storage.load_thought_trees(ThoughtTree.from_dict)
+    def get_tree(self, tree_id: str) -> ThoughtTree | None:
+        return self.cache.get(tree_id)
 
-    def save_trees(self, trees: Dict[str, ThoughtTree]) -> None:
-        self.storage.save_thought_trees(trees)
+    def save_tree(self, tree: ThoughtTree) -> None:
+        self.cache.put(tree)
+
+    def flush(self) -> int:
+        return self.cache.flush()
 
     async def generate_tree(self, trigger: str) -> Tuple[ThoughtTree | None, str]:
         tree_id = str(uuid.uuid4())
@@ -44,14 +65,11 @@ class ThoughtService:
         success, msg = await self._add_generated_nodes(tree, None, trigger)
         if not success:
             return None, msg
-        trees = self.load_trees()
-        trees[tree.tree_id] = tree
-        self.save_trees(trees)
+        self.save_tree(tree)
         return tree, f"Started thought tree `{tree.tree_id}`"
 
     async def expand_tree(self, tree_id: str, thought_id: str) -> Tuple[list[ThoughtNode], str]:
-        trees = self.load_trees()
-        tree = trees.get(tree_id)
+        tree = self.get_tree(tree_id)
         if not tree:
             return [], "Thought tree not found"
 
@@ -59,17 +77,22 @@ class ThoughtService:
         if not parent:
             return [], "Thought not found"
 
-        success, msg = await self._add_generated_nodes(tree, parent, parent.content)
+        with self.cache.pinned(tree):
+            success, msg = await self._add_generated_nodes(tree, parent, parent.content)
         if not success:
             return [], msg
 
-        self.save_trees(trees)
         return [tree.get_node(child_id) for child_id in parent.children], "Thought expanded"
 
-    def recent_trees(self, limit: int = 5) -> list[ThoughtTree]:
-        trees = self.load_trees()
-        sorted_trees = sorted(trees.values(), key=lambda t: t.last_updated, reverse=True)
-        return sorted_trees[:limit]
+    def recent_trees(self, limit: int = 5) -> list[ThoughtTreeInfo]:
+        dirty = self.cache.dirty_trees()
+        entries = {
+            entry["tree_id"]: ThoughtTreeInfo.from_dict(entry)
+            for entry in self.storage.recent_thought_trees(limit + len(dirty))
+        }
+        for tree in dirty:
+            entries[tree.tree_id] = tree.info()
+        return sorted(entries.values(), key=lambda info: info.last_updated, reverse=True)[:limit]
 
     async def auto_think(self, trigger: str) -> str:
         tree, message = await self.generate_tree(trigger)
@@ -83,13 +106,11 @@ class ThoughtService:
             print(f"[Massive Brainstorm] Failed: {message}")
             return None
 
-        for node in list(tree.nodes.values()):
-            for _ in range(branches):
-                await self._add_generated_nodes(tree, node, node.content)
+        with self.cache.pinned(tree):
+            for node in list(tree.nodes.values()):
+                for _ in range(branches):
+                    await self._add_generated_nodes(tree, node, node.content)
 
-        trees = self.load_trees()
-        trees[tree.tree_id] = tree
-        self.save_trees(trees)
         return tree
 
     async def _add_generated_nodes(
@@ -98,21 +119,18 @@ class ThoughtService:
         parent: ThoughtNode | None,
         trigger_text: str,
     ) -> Tuple[bool, str]:
-        knowledge = self.knowledge.get_knowledge()
-        knowledge_text = KnowledgeService.format_knowledge_summary(self.state)
-        age_behavior_text = age_behavior(self.state.current_age)
-
-        prompt = (
-            f"Agent Statement: {self.state.core_agent_statement}\n"
-            f"Age Behavior: {age_behavior_text}\n"
-            f"Beliefs: {json.dumps(self.state.beliefs, indent=2)}\n"
-            f"Past Learnings:\n{knowledge_text}\n"
-            f"Trigger Thought: {trigger_text}\n"
-            "Generate up to {limit} multi-branch thoughts. Return JSON list with fields"
-            " 'content', 'emotion', 'urgency', 'confidence'."
-        ).format(limit=self.expansion_limit)
+        prompt = self.llm.prompts.persona_sections(beliefs_label="Beliefs: ") + [
+            Section(trigger_text, "Trigger Thought: ", keep="all"),
+            Section(
+                f"Generate up to {self.expansion_limit} multi-branch thoughts. Return JSON list with fields"
+                " 'content', 'emotion', 'urgency', 'confidence'.",
+                keep="all",
+            ),
+        ]
         system_prompt = "You are Connor's mind expanding complex thought branches."
-        response = await self.llm.generate_json(prompt, system_prompt)
+        response = await self.llm.generate_json(
+            prompt, system_prompt, schema=THOUGHTS_SCHEMA, site="thought_nodes", profile="json_summary"
+        )
 
         if not isinstance(response, list):
             return False, "Failed to generate thoughts"
@@ -159,5 +177,5 @@ class ThoughtService:
 
         return "\n".join(lines)
 
-    def tree_summary(self, tree: ThoughtTree) -> str:
-        return f"Tree `{tree.tree_id}` about {tree.trigger} with {len(tree.nodes)} thoughts"
+    def tree_summary(self, tree: ThoughtTree | ThoughtTreeInfo) -> str:
+        return f"Tree `{tree.tree_id}` about {tree.trigger} with {tree.node_count} thoughts"
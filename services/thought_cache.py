@@ -0,0 +1,84 @@
+"""LRU cache of thought trees with deferred, batched persistence."""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Iterator, List
+
+from ..models.thoughts import ThoughtTree
+
+
+class ThoughtTreeCache:
+    def __init__(self, storage, max_trees: int = 64, max_nodes: int = 20000):
+        self.storage = storage
+        self.max_trees = max(1, max_trees)
+        self.max_nodes = max(1, max_nodes)
+        self._trees: "OrderedDict[str, ThoughtTree]" = OrderedDict()
+        self._pins: Dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, tree_id: str) -> ThoughtTree | None:
+        tree = self._trees.get(tree_id)
+        if tree is not None:
+            self.hits += 1
+            self._trees.move_to_end(tree_id)
+            return tree
+
+        self.misses += 1
+        tree = self.storage.load_thought_tree(tree_id, ThoughtTree.from_dict)
+        if tree is not None:
+            self._insert(tree)
+        return tree
+
+    def put(self, tree: ThoughtTree) -> None:
+        tree.dirty = True
+        self._insert(tree)
+
+    def _insert(self, tree: ThoughtTree) -> None:
+        self._trees[tree.tree_id] = tree
+        self._trees.move_to_end(tree.tree_id)
+        self._evict()
+
+    def _node_total(self) -> int:
+        return sum(tree.node_count for tree in self._trees.values())
+
+    @contextmanager
+    def pinned(self, tree: ThoughtTree) -> Iterator[ThoughtTree]:
+        """Keep ``tree`` cached while it is being expanded across awaits.
+
+        An evicted clean tree is dropped without saving, so nodes added to it
+        afterwards would never reach storage.
+        """
+        self._insert(tree)
+        self._pins[tree.tree_id] = self._pins.get(tree.tree_id, 0) + 1
+        try:
+            yield tree
+        finally:
+            remaining = self._pins.pop(tree.tree_id) - 1
+            if remaining:
+                self._pins[tree.tree_id] = remaining
+            self._evict()
+
+    def _evict(self) -> None:
+        while len(self._trees) > 1 and (len(self._trees) > self.max_trees or self._node_total() > self.max_nodes):
+            tree_id = next((tree_id for tree_id in self._trees if tree_id not in self._pins), None)
+            if tree_id is None:
+                break
+            tree = self._trees.pop(tree_id)
+            if tree.dirty:
+                self._save(tree)
+
+    def _save(self, tree: ThoughtTree) -> None:
+        self.storage.save_thought_tree(tree)
+        tree.dirty = False
+
+    def dirty_trees(self) -> List[ThoughtTree]:
+        return [tree for tree in self._trees.values() if tree.dirty]
+
+    def flush(self) -> int:
+        dirty = self.dirty_trees()
+        for tree in dirty:
+            self._save(tree)
+        return len(dirty)
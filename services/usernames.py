@@ -0,0 +1,72 @@
+"""In-memory username directory keyed by Discord user id."""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import Callable, Dict
+
+from .storage import StorageService
+
+
+class UsernameDirectory:
+    def __init__(
+        self,
+        backend: StorageService,
+        write: Callable[[int, str, Callable[[], None]], None],
+        reload_interval: float = 5.0,
+    ):
+        self.backend = backend
+        self._write = write
+        self.reload_interval = reload_interval
+        self._names: Dict[str, str] = {}
+        self._unsaved: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._source_version: int | None = None
+        self._checked_at = 0.0
+        self._load()
+
+    def _load(self) -> None:
+        version = self.backend.usernames_version()
+        names = self.backend.load_usernames()
+        with self._lock:
+            names.update(self._unsaved)
+            self._names = names
+            self._source_version = version
+        self._checked_at = time.monotonic()
+
+    def refresh(self) -> None:
+        """Pick up external edits; called from the storage writer thread, never the event loop."""
+        if time.monotonic() - self._checked_at < self.reload_interval:
+            return
+        self._checked_at = time.monotonic()
+        try:
+            if self.backend.usernames_version() != self._source_version:
+                self._load()
+        except Exception as exc:
+            print(f"[Username Reload Error] {exc}")
+
+    def get(self, user_id: int) -> str | None:
+        return self._names.get(str(user_id))
+
+    def __contains__(self, user_id: int) -> bool:
+        return str(user_id) in self._names
+
+    def all(self) -> Dict[str, str]:
+        return dict(self._names)
+
+    def set(self, user_id: int, username: str) -> None:
+        key = str(user_id)
+        with self._lock:
+            # Looked up under the lock so a concurrent reload can't swap the dict out from under us.
+            self._names[key] = username
+            self._unsaved[key] = username
+
+        def saved() -> None:
+            version = self.backend.usernames_version()
+            with self._lock:
+                if self._unsaved.get(key) == username:
+                    del self._unsaved[key]
+                self._source_version = version
+
+        self._write(user_id, username, saved)
@@ -0,0 +1,73 @@
+"""Ollama model preloading and keep-alive pinning."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Dict, List, Optional
+
+from ..config import Settings
+from ..state import ConnorState
+from .llm import LLMService
+
+
+class ModelWarmer:
+    def __init__(self, settings: Settings, state: ConnorState, llm: LLMService):
+        self.settings = settings
+        self.state = state
+        self.llm = llm
+        self._task: Optional[asyncio.Task] = None
+        self.load_times: Dict[str, float] = {}
+
+    def models(self) -> List[str]:
+        """Ollama models any request could use: the active one plus profile pins."""
+        models = [self.llm.model_for("ollama")]
+        for profile in self.settings.generation_profiles.values():
+            models.append(self.llm.model_for("ollama", profile))
+        return list(dict.fromkeys(models))
+
+    async def warm(self, model: str, report: bool = True) -> float | None:
+        """Preload ``model``; returns the wall time taken, or None if Ollama refused."""
+        started = time.perf_counter()
+        try:
+            load_seconds = await self.llm.preload(model)
+        except Exception as exc:
+            print(f"[Warm-up Error] {model}: {exc}")
+            return None
+        elapsed = time.perf_counter() - started
+        self.load_times[model] = elapsed
+        self.llm.metrics.observe("llm_model_load_seconds", elapsed, model=model)
+        if report:
+            print(f"[Warm-up] {model} loaded in {elapsed:.1f}s (model load {load_seconds:.1f}s)")
+        return elapsed
+
+    async def warm_all(self, report: bool = True) -> Dict[str, float | None]:
+        models = self.models()
+        results = await asyncio.gather(*(self.warm(model, report) for model in models))
+        return dict(zip(models, results))
+
+    async def start(self) -> None:
+        """Preload every model, then keep them resident with periodic keep_alive pings."""
+        if not self.settings.ollama_warmup:
+            return
+        started = time.perf_counter()
+        results = await self.warm_all()
+        ready = [model for model, elapsed in results.items() if elapsed is not None]
+        print(f"[Warm-up] {len(ready)}/{len(results)} Ollama models ready in {time.perf_counter() - started:.1f}s")
+        if self.settings.ollama_ping_interval > 0 and self._task is None:
+            self._task = asyncio.create_task(self._ping_loop())
+
+    async def _ping_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.settings.ollama_ping_interval)
+            # Re-resolved each round so a !switch pins the new model instead of the old one.
+            await self.warm_all(report=False)
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -2,15 +2,19 @@
 
 from __future__ import annotations
 
-import json
 from dataclasses import dataclass
+from typing import AsyncIterator, List, Tuple
 
 import aiohttp
 from bs4 import BeautifulSoup
 
 from ..config import Settings
-from ..state import ConnorState, age_behavior
+from ..state import ConnorState
+from .budget import Section
 from .llm import LLMService
+from .scheduler import Priority
+
+ANALYSIS_CACHE_TTL = 900.0
 
 
 @dataclass
@@ -71,22 +75,37 @@ class WebService:
         return WebpageData(title=title, content=main_content, full_text=full_text, url=url)
 
     async def analyze(self, webpage: WebpageData, username: str) -> str:
-        age_behavior_text = age_behavior(self.state.current_age)
-        prompt = (
-            f"Agent Statement: {self.state.core_agent_statement}\n"
-            f"Age Behavior: {age_behavior_text}\n"
-            f"Current Beliefs: {json.dumps(self.state.beliefs, indent=2)}\n"
-            f"Past Learnings:\n{await self._knowledge_text()}\n"
-            f"You are Connor, analyzing a webpage that {username} asked you to look at.\n"
-            f"Website Title: {webpage.title}\n"
-            f"Website URL: {webpage.url}\n"
-            f"Website Content: {webpage.content}\n"
-            "Generate a thoughtful, conversational response about this webpage."
+        prompt, system_prompt = await self.analysis_prompt(webpage, username)
+        return await self.llm.generate(
+            prompt,
+            system_prompt,
+            cache_ttl=ANALYSIS_CACHE_TTL,
+            priority=Priority.INTERACTIVE,
+            user=username,
+            profile="reply",
+            site="web_analysis",
         )
-        system_prompt = "You are Connor, a reflective AI analyzing web content."
-        return await self.llm.generate(prompt, system_prompt)
 
-    async def _knowledge_text(self) -> str:
-        from .knowledge import KnowledgeService  # local import to avoid cycle
-
-        return KnowledgeService.format_knowledge_summary(self.state)
+    async def analyze_stream(self, webpage: WebpageData, username: str) -> AsyncIterator[str]:
+        prompt, system_prompt = await self.analysis_prompt(webpage, username)
+        async for delta in self.llm.generate_stream(
+            prompt,
+            system_prompt,
+            cache_ttl=ANALYSIS_CACHE_TTL,
+            priority=Priority.INTERACTIVE,
+            user=username,
+            profile="reply",
+            site="web_analysis",
+        ):
+            yield delta
+
+    async def analysis_prompt(self, webpage: WebpageData, username: str) -> Tuple[List[Section], str]:
+        prompt = self.llm.prompts.persona_sections() + [
+            Section(f"You are Connor, analyzing a webpage that {username} asked you to look at.", keep="all"),
+            Section(webpage.title, "Website Title: ", keep="all"),
+            Section(webpage.url, "Website URL: ", keep="all"),
+            Section(webpage.content, "Website Content: ", priority=1),
+            Section("Generate a thoughtful, conversational response about this webpage.", keep="all"),
+        ]
+        system_prompt = "You are Connor, a reflective AI analyzing web content."
+        return prompt, system_prompt
@@ -0,0 +1,311 @@
+"""Write-behind storage facade that keeps file I/O off the event loop."""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Callable, Deque, Dict, List, Tuple
+
+from .storage import StorageService, format_chat_log, thought_index_entry
+from .usernames import UsernameDirectory
+
+
+class WriteBehindStorage:
+    def __init__(self, backend: StorageService, flush_interval: float = 2.0):
+        self.backend = backend
+        self.settings = backend.settings
+        self.flush_interval = max(0.05, flush_interval)
+        self._documents: Dict[str, Any] = {}
+        self.usernames = UsernameDirectory(
+            backend, self._write_username, self.settings.username_reload_interval
+        )
+        self._chat: Deque[Dict[str, Any]] = deque(
+            backend.get_all_interactions(), maxlen=self.settings.chat_memory_limit
+        )
+        pool = max(1, self.settings.retrieval_knowledge_pool)
+        self._knowledge: Deque[Dict[str, Any]] = deque(backend.get_knowledge(pool), maxlen=pool)
+        self._tree_index: Dict[str, Dict[str, Any]] = {
+            entry["tree_id"]: entry for entry in backend.thought_tree_index()
+        }
+        self._pending: "OrderedDict[str, Callable[[], None]]" = OrderedDict()
+        self._pending_chat: List[Dict[str, Any]] = []
+        self._pending_knowledge: List[Dict[str, Any]] = []
+        self._pending_usernames: Dict[str, Tuple[str, Callable[[], None]]] = {}
+        self._pending_trees: Dict[str, Dict[str, Any]] = {}
+        self._pending_lock = threading.Lock()
+        self._io_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._interaction_listeners: List[Callable[[Dict[str, Any]], None]] = []
+        self._archive_listeners: List[Callable[[Any], None]] = []
+        self._knowledge_listeners: List[Callable[[Dict[str, Any]], None]] = []
+        self._stats = {
+            "enqueued": 0,
+            "coalesced": 0,
+            "flushes": 0,
+            "errors": 0,
+            "last_flush_ms": 0.0,
+            "max_flush_ms": 0.0,
+            "total_flush_ms": 0.0,
+        }
+
+    # Writer thread ----------------------------------------------------
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="connor-storage-writer", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+            # Username reloads run here rather than on the event loop.
+            self.usernames.refresh()
+
+    def _enqueue(self, key: str, write: Callable[[], None]) -> None:
+        with self._pending_lock:
+            if key in self._pending:
+                self._stats["coalesced"] += 1
+                self._pending.move_to_end(key)
+            self._pending[key] = write
+            self._stats["enqueued"] += 1
+
+    def _flush_chat(self) -> None:
+        with self._pending_lock:
+            entries, self._pending_chat = self._pending_chat, []
+        if entries:
+            self.backend.append_chat_entries(entries)
+
+    def _flush_knowledge(self) -> None:
+        with self._pending_lock:
+            summaries, self._pending_knowledge = self._pending_knowledge, []
+        for summary in summaries:
+            self.backend.append_knowledge(summary)
+
+    def _flush_usernames(self) -> None:
+        with self._pending_lock:
+            pending, self._pending_usernames = self._pending_usernames, {}
+        if pending:
+            self.backend.save_usernames({user_id: name for user_id, (name, _) in pending.items()})
+            for _, saved in pending.values():
+                saved()
+
+    def flush(self) -> None:
+        with self._io_lock:
+            with self._pending_lock:
+                if not self._pending:
+                    return
+                pending, self._pending = self._pending, OrderedDict()
+            started = time.perf_counter()
+            for key, write in pending.items():
+                try:
+                    write()
+                except Exception as exc:
+                    self._stats["errors"] += 1
+                    print(f"[Storage Flush Error] {key}: {exc}")
+            with self._pending_lock:
+                for key in pending:
+                    if key.startswith("thought_tree:") and key not in self._pending:
+                        self._pending_trees.pop(key.split(":", 1)[1], None)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            self._stats["flushes"] += 1
+            self._stats["last_flush_ms"] = elapsed_ms
+            self._stats["max_flush_ms"] = max(self._stats["max_flush_ms"], elapsed_ms)
+            self._stats["total_flush_ms"] += elapsed_ms
+
+    def _flush_and_call(self, func: Callable[..., Any], *args: Any) -> Any:
+        self.flush()
+        with self._io_lock:
+            return func(*args)
+
+    async def _flushed(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Run a backend query after a flush, on a worker thread so the loop never waits on the writer."""
+        return await asyncio.to_thread(self._flush_and_call, func, *args)
+
+    def queue_depth(self) -> int:
+        with self._pending_lock:
+            batched = sum(key in self._pending for key in ("chat_memory", "knowledge", "usernames"))
+            return (
+                len(self._pending)
+                - batched
+                + len(self._pending_chat)
+                + len(self._pending_knowledge)
+                + len(self._pending_usernames)
+            )
+
+    def stats(self) -> Dict[str, float]:
+        stats = dict(self._stats)
+        stats["queue_depth"] = self.queue_depth()
+        stats["avg_flush_ms"] = stats["total_flush_ms"] / stats["flushes"] if stats["flushes"] else 0.0
+        return stats
+
+    def _shutdown(self) -> None:
+        self._stopping.set()
+        self._wakeup.set()
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout=max(5.0, self.flush_interval * 2))
+        self.flush()
+        self.backend.close()
+
+    async def close(self) -> None:
+        await asyncio.to_thread(self._shutdown)
+
+    # Listeners --------------------------------------------------------
+    def add_interaction_listener(self, callback: Callable[[Dict[str, Any]], None]) -> None:
+        self._interaction_listeners.append(callback)
+
+    def add_archive_listener(self, callback: Callable[[Any], None]) -> None:
+        self._archive_listeners.append(callback)
+
+    def add_knowledge_listener(self, callback: Callable[[Dict[str, Any]], None]) -> None:
+        self._knowledge_listeners.append(callback)
+
+    @staticmethod
+    def _notify(listeners: List[Callable[[Any], None]], payload: Any) -> None:
+        for callback in listeners:
+            try:
+                callback(payload)
+            except Exception as exc:
+                print(f"[Storage Listener Error] {exc}")
+
+    # Documents --------------------------------------------------------
+    def _load_document(self, name: str, loader: Callable[[], Any]) -> Any:
+        if name not in self._documents:
+            with self._io_lock:
+                self._documents[name] = loader()
+        return self._documents[name]
+
+    def _save_document(self, name: str, value: Any, writer: Callable[[Any], None]) -> None:
+        self._documents[name] = value
+        self._enqueue(f"document:{name}", lambda: writer(value))
+
+    def load_core_agent_statement(self) -> str:
+        return self._load_document("core_agent_statement", self.backend.load_core_agent_statement)
+
+    def save_core_agent_statement(self, statement: str) -> None:
+        self._save_document("core_agent_statement", statement, self.backend.save_core_agent_statement)
+
+    def load_dynamic_agent_statement(self) -> str:
+        return self._load_document("dynamic_agent_statement", self.backend.load_dynamic_agent_statement)
+
+    def save_dynamic_agent_statement(self, statement: str) -> None:
+        self._save_document("dynamic_agent_statement", statement, self.backend.save_dynamic_agent_statement)
+
+    def load_beliefs(self) -> Dict[str, Any]:
+        return dict(self._load_document("beliefs", self.backend.load_beliefs))
+
+    def save_beliefs(self, beliefs: Dict[str, Any]) -> None:
+        self._save_document("beliefs", dict(beliefs), self.backend.save_beliefs)
+
+    # Usernames --------------------------------------------------------
+    def _write_username(self, user_id: int, username: str, saved: Callable[[], None]) -> None:
+        with self._pending_lock:
+            self._pending_usernames[str(user_id)] = (username, saved)
+        self._enqueue("usernames", self._flush_usernames)
+
+    def load_usernames(self) -> Dict[str, str]:
+        return self.usernames.all()
+
+    def get_username(self, user_id: int) -> str | None:
+        return self.usernames.get(user_id)
+
+    def save_username(self, user_id: int, username: str) -> None:
+        self.usernames.set(user_id, username)
+
+    # Knowledge --------------------------------------------------------
+    def append_knowledge(self, summary: Dict[str, Any]) -> None:
+        self._knowledge.append(summary)
+        with self._pending_lock:
+            self._pending_knowledge.append(summary)
+        self._enqueue("knowledge", self._flush_knowledge)
+        self._notify(self._knowledge_listeners, summary)
+
+    def get_knowledge(self, limit: int = 5) -> List[Dict[str, Any]]:
+        """Latest summaries from memory; at most ``retrieval_knowledge_pool`` are kept."""
+        return list(self._knowledge)[-limit:] if limit > 0 else []
+
+    # Thought trees ----------------------------------------------------
+    def load_thought_trees(self, factory) -> Dict[str, Any]:
+        trees = {}
+        for tree_id in list(self._tree_index):
+            tree = self.load_thought_tree(tree_id, factory)
+            if tree is not None:
+                trees[tree_id] = tree
+        return trees
+
+    def thought_tree_index(self) -> List[Dict[str, Any]]:
+        return list(self._tree_index.values())
+
+    def recent_thought_trees(self, limit: int = 5) -> List[Dict[str, Any]]:
+        ordered = sorted(self._tree_index.values(), key=lambda entry: entry["last_updated"], reverse=True)
+        return ordered[:limit]
+
+    def load_thought_tree(self, tree_id: str, factory) -> Any | None:
+        with self._pending_lock:
+            data = self._pending_trees.get(tree_id)
+        if data is not None:
+            return factory(data)
+        if tree_id not in self._tree_index:
+            return None
+        # No _io_lock: a tree being flushed is still in _pending_trees, and shards are replaced atomically.
+        return self.backend.load_thought_tree(tree_id, factory)
+
+    def save_thought_tree(self, tree) -> None:
+        data = tree.to_dict()
+        self._tree_index[tree.tree_id] = thought_index_entry(data)
+        with self._pending_lock:
+            self._pending_trees[tree.tree_id] = data
+        self._enqueue(f"thought_tree:{tree.tree_id}", lambda: self.backend.save_thought_tree_data(data))
+
+    def save_thought_trees(self, trees: Dict[str, Any]) -> None:
+        for tree in trees.values():
+            self.save_thought_tree(tree)
+
+    # Chat interactions ------------------------------------------------
+    def add_chat_interaction(
+        self,
+        username: str,
+        user_input: str,
+        reply: str,
+        agent_statement: str,
+    ) -> None:
+        entry = self.backend.make_chat_entry(username, user_input, reply, agent_statement)
+        self._chat.append(entry)
+        with self._pending_lock:
+            self._pending_chat.append(entry)
+        self._enqueue("chat_memory", self._flush_chat)
+        self._notify(self._interaction_listeners, entry)
+
+    def get_recent_interactions(self, limit: int | None = None) -> List[Dict[str, Any]]:
+        """Served from the in-memory ring, so at most ``chat_memory_limit`` entries."""
+        interactions = list(self._chat)
+        if limit:
+            return interactions[-limit:]
+        return interactions
+
+    def get_all_interactions(self) -> List[Dict[str, Any]]:
+        return list(self._chat)
+
+    async def get_interactions_by_age(self, min_age: int, max_age: int, limit: int = 1000) -> List[Dict[str, Any]]:
+        return await self._flushed(self.backend.get_interactions_by_age, min_age, max_age, limit)
+
+    async def interaction_decades(self) -> List[int]:
+        return await self._flushed(self.backend.interaction_decades)
+
+    async def archive_chat_memory(self):
+        archive_path = await self._flushed(self.backend.archive_chat_memory)
+        self._notify(self._archive_listeners, archive_path)
+        return archive_path
+
+    async def reset_chat_memory(self) -> None:
+        self._chat.clear()
+        await self._flushed(self.backend.reset_chat_memory)
+
+    def export_chat_log(self) -> str:
+        return format_chat_log(self.get_all_interactions())
@@ -40,6 +40,11 @@ class PhysiologicalState:
     death_count: int = 0
 
 
+VERSIONED_FIELDS = frozenset(
+    {"core_agent_statement", "dynamic_agent_statement", "beliefs", "current_age", "knowledge_cache"}
+)
+
+
 @dataclass
 class ConnorState:
     backend: str = "ollama"
@@ -60,3 +65,16 @@ class ConnorState:
     recently_removed: set[int] = field(default_factory=set)
     thoughts_channel_posts: List[str] = field(default_factory=list)
     knowledge_cache: List[Dict[str, Any]] = field(default_factory=list)
+    version: int = field(default=0, repr=False, compare=False)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        if name in VERSIONED_FIELDS:
+            previous = self.__dict__.get(name, value)
+            object.__setattr__(self, name, value)
+            if previous is not value and previous != value:
+                self.bump_version()
+            return
+        object.__setattr__(self, name, value)
+
+    def bump_version(self) -> None:
+        object.__setattr__(self, "version", self.__dict__.get("version", 0) + 1)
@@ -1,3 +1,4 @@
 from .messages import split_message
+from .text import tokenize
 
-__all__ = ["split_message"]
+__all__ = ["split_message", "tokenize"]
@@ -0,0 +1,134 @@
+"""Tolerant extraction of JSON from LLM replies."""
+
+from __future__ import annotations
+
+import ast
+import json
+import re
+from typing import Any, Dict, Tuple
+
+FENCE_PATTERN = re.compile(r"```(?:json|JSON)?\s*(.*?)(?:```|$)", re.DOTALL)
+TRAILING_COMMA_PATTERN = re.compile(r",\s*([}\]])")
+SMART_QUOTES = str.maketrans({"“": '"', "”": '"', "‘": "'", "’": "'"})
+PAIRS = {"{": "}", "[": "]"}
+
+
+def _span(text: str) -> str | None:
+    """Return the first balanced JSON object/array, or its unterminated tail."""
+    start = next((index for index, char in enumerate(text) if char in PAIRS), None)
+    if start is None:
+        return None
+    stack = []
+    in_string = escaped = False
+    for index in range(start, len(text)):
+        char = text[index]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in PAIRS:
+            stack.append(PAIRS[char])
+        elif stack and char == stack[-1]:
+            stack.pop()
+            if not stack:
+                return text[start : index + 1]
+    return text[start:]
+
+
+def _close(text: str) -> str:
+    """Terminate a truncated JSON document by closing open strings and brackets."""
+    stack = []
+    in_string = escaped = False
+    for char in text:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in PAIRS:
+            stack.append(PAIRS[char])
+        elif stack and char == stack[-1]:
+            stack.pop()
+    if in_string:
+        text += '"'
+    text = text.rstrip().rstrip(",:")
+    return TRAILING_COMMA_PATTERN.sub(r"\1", text + "".join(reversed(stack)))
+
+
+def _attempts(candidate: str, max_trims: int = 8):
+    yield candidate
+    cleaned = TRAILING_COMMA_PATTERN.sub(r"\1", candidate.translate(SMART_QUOTES))
+    yield cleaned
+    yield _close(cleaned)
+    # Truncated output: drop the incomplete trailing element and close what remains.
+    for _ in range(max_trims):
+        cut = cleaned.rfind(",")
+        if cut <= 0:
+            return
+        cleaned = cleaned[:cut]
+        yield _close(cleaned)
+
+
+def extract_json(text: str) -> Tuple[Any, bool]:
+    """Parse ``text`` as JSON, repairing common LLM formatting damage.
+
+    Returns ``(value, repaired)``. Handles code fences, prose around the
+    payload, smart quotes, trailing commas, Python literals and truncated
+    output. Raises ``ValueError`` when nothing usable can be recovered.
+    """
+    try:
+        return json.loads(text), False
+    except (TypeError, json.JSONDecodeError):
+        pass
+    if not text:
+        raise ValueError("empty reply")
+
+    fenced = FENCE_PATTERN.search(text)
+    sources = [fenced.group(1), text] if fenced else [text]
+    for source in sources:
+        candidate = _span(source)
+        if candidate is None:
+            continue
+        for attempt in _attempts(candidate):
+            try:
+                return json.loads(attempt), True
+            except json.JSONDecodeError:
+                continue
+        try:
+            value = ast.literal_eval(candidate)
+        except (ValueError, SyntaxError, MemoryError, RecursionError):
+            continue
+        if isinstance(value, (dict, list)):
+            return value, True
+    raise ValueError(f"no JSON found in {text[:120]!r}")
+
+
+SCHEMA_TYPES: Dict[str, type | Tuple[type, ...]] = {
+    "object": dict,
+    "array": list,
+    "string": str,
+    "integer": int,
+    "number": (int, float),
+    "boolean": bool,
+}
+
+
+def matches_schema(value: Any, schema: Dict[str, Any]) -> bool:
+    """Shallow check of root type, required keys and array item types."""
+    expected = SCHEMA_TYPES.get(schema.get("type", ""))
+    if expected is not None and not isinstance(value, expected):
+        return False
+    if isinstance(value, dict):
+        return all(key in value for key in schema.get("required", []))
+    if isinstance(value, list) and "items" in schema:
+        return all(matches_schema(item, schema["items"]) for item in value)
+    return True
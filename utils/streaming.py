@@ -0,0 +1,87 @@
+"""Progressive Discord message edits for streamed LLM output."""
+
+from __future__ import annotations
+
+import time
+from typing import Any, AsyncIterator, List
+
+import discord
+
+PLACEHOLDER = "💭 ..."
+
+
+class DiscordStreamSink:
+    def __init__(
+        self,
+        targets: List[Any],
+        prefix: str = "",
+        edit_interval: float = 1.0,
+        max_length: int = 2000,
+    ):
+        self.targets = list(targets)
+        self.prefix = prefix
+        self.edit_interval = edit_interval
+        self.max_length = max_length
+        self.text = ""
+        self._messages: List[discord.Message | None] = [None] * len(self.targets)
+        self._committed = 0
+        self._shown = ""
+        self._last_edit = 0.0
+
+    async def _send(self, index: int, content: str) -> None:
+        try:
+            self._messages[index] = await self.targets[index].send(content)
+        except discord.HTTPException as exc:
+            self._messages[index] = None
+            print(f"[Stream Send Error] {exc}")
+
+    async def _edit_all(self, content: str) -> None:
+        for index, message in enumerate(self._messages):
+            if message is None:
+                continue
+            try:
+                await message.edit(content=content)
+            except discord.HTTPException as exc:
+                print(f"[Stream Edit Error] {exc}")
+        self._shown = content
+
+    async def start(self) -> None:
+        for index in range(len(self.targets)):
+            await self._send(index, PLACEHOLDER)
+        self._shown = PLACEHOLDER
+        self._last_edit = time.monotonic()
+
+    async def _render(self) -> None:
+        pending = (self.prefix + self.text)[self._committed :]
+        while len(pending) > self.max_length:
+            cut = pending.rfind(" ", 0, self.max_length)
+            if cut <= 0:
+                cut = self.max_length
+            await self._edit_all(pending[:cut])
+            rest = pending[cut:]
+            self._committed += cut + len(rest) - len(rest.lstrip())
+            pending = rest.lstrip()
+            for index in range(len(self.targets)):
+                await self._send(index, PLACEHOLDER)
+            self._shown = PLACEHOLDER
+        content = pending or PLACEHOLDER
+        if content != self._shown:
+            await self._edit_all(content)
+        self._last_edit = time.monotonic()
+
+    async def feed(self, delta: str) -> None:
+        self.text += delta
+        if time.monotonic() - self._last_edit >= self.edit_interval:
+            await self._render()
+
+    async def finish(self) -> str:
+        if not self.text.strip():
+            self.text = "*...*"
+        await self._render()
+        return self.text
+
+    async def consume(self, stream: AsyncIterator[str]) -> str:
+        await self.start()
+        async for delta in stream:
+            await self.feed(delta)
+        return await self.finish()
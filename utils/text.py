@@ -0,0 +1,35 @@
+"""Tokenization and ranking helpers."""
+
+from __future__ import annotations
+
+import math
+import re
+from typing import List
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9']+")
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "but", "by", "for", "from", "had", "has", "have", "he",
+    "her", "his", "i", "if", "in", "into", "is", "it", "its", "me", "my", "of", "on", "or", "our", "she",
+    "so", "that", "the", "their", "them", "then", "there", "they", "this", "to", "was", "we", "were",
+    "what", "when", "which", "who", "will", "with", "you", "your",
+}
+
+
+def tokenize(text: str) -> List[str]:
+    tokens = (token.strip("'") for token in TOKEN_PATTERN.findall(text.lower()))
+    return [token for token in tokens if len(token) > 1 and token not in STOPWORDS]
+
+
+def bm25_term_score(
+    tf: int,
+    df: int,
+    doc_count: int,
+    doc_length: int,
+    avg_length: float,
+    k1: float = 1.2,
+    b: float = 0.75,
+) -> float:
+    idf = math.log(1 + (doc_count - df + 0.5) / (df + 0.5))
+    norm = tf + k1 * (1 - b + b * doc_length / (avg_length or 1.0))
+    return idf * tf * (k1 + 1) / norm